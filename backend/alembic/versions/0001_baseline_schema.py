@@ -0,0 +1,124 @@
+"""Baseline schema, as previously created by Base.metadata.create_all
+
+Databases that were bootstrapped by create_all should be stamped with this
+revision (alembic stamp 0001) before running alembic upgrade head.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+direction_enum = sa.Enum("BULLISH", "BEARISH", "NEUTRAL", name="directionenum")
+persona_enum = sa.Enum(
+    "VALUE_INVESTOR",
+    "TECHNICAL_ANALYST",
+    "MOMENTUM_TRADER",
+    "CONTRARIAN",
+    "MACRO_ECONOMIST",
+    "QUANT_ANALYST",
+    "RISK_MANAGER",
+    name="personaenum",
+)
+sentiment_enum = sa.Enum("POSITIVE", "NEGATIVE", "NEUTRAL", name="sentimentenum")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crypto_prices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String(length=20), nullable=False),
+        sa.Column("exchange", sa.String(length=50), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("open", sa.Float(), nullable=False),
+        sa.Column("high", sa.Float(), nullable=False),
+        sa.Column("low", sa.Float(), nullable=False),
+        sa.Column("close", sa.Float(), nullable=False),
+        sa.Column("volume", sa.Float(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+    op.create_index("ix_crypto_prices_id", "crypto_prices", ["id"])
+    op.create_index("ix_crypto_prices_symbol", "crypto_prices", ["symbol"])
+    op.create_index("ix_crypto_prices_timestamp", "crypto_prices", ["timestamp"])
+
+    op.create_table(
+        "predictions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("persona", persona_enum, nullable=False),
+        sa.Column("symbol", sa.String(length=20), nullable=False),
+        sa.Column("direction", direction_enum, nullable=False),
+        sa.Column("confidence", sa.Float(), nullable=False),
+        sa.Column("timeframe", sa.String(length=20), nullable=False),
+        sa.Column("reasoning", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+        sa.Column("target_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_predictions_id", "predictions", ["id"])
+    op.create_index("ix_predictions_persona", "predictions", ["persona"])
+    op.create_index("ix_predictions_symbol", "predictions", ["symbol"])
+    op.create_index("ix_predictions_created_at", "predictions", ["created_at"])
+
+    op.create_table(
+        "news_articles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(length=500), nullable=False),
+        sa.Column("url", sa.String(length=1000), nullable=False, unique=True),
+        sa.Column("source", sa.String(length=100), nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("symbols", sa.String(length=200), nullable=True),
+        sa.Column("sentiment_score", sa.Float(), nullable=True),
+        sa.Column("sentiment_label", sentiment_enum, nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+    op.create_index("ix_news_articles_id", "news_articles", ["id"])
+    op.create_index("ix_news_articles_published_at", "news_articles", ["published_at"])
+
+    op.create_table(
+        "sentiment_analysis",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("symbol", sa.String(length=20), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("timeframe", sa.String(length=20), nullable=False),
+        sa.Column("sentiment_score", sa.Float(), nullable=False),
+        sa.Column("sentiment_label", sentiment_enum, nullable=False),
+        sa.Column("sample_size", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+    op.create_index("ix_sentiment_analysis_id", "sentiment_analysis", ["id"])
+    op.create_index("ix_sentiment_analysis_symbol", "sentiment_analysis", ["symbol"])
+    op.create_index(
+        "ix_sentiment_analysis_timestamp", "sentiment_analysis", ["timestamp"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sentiment_analysis")
+    op.drop_table("news_articles")
+    op.drop_table("predictions")
+    op.drop_table("crypto_prices")
+    bind = op.get_bind()
+    for enum in (sentiment_enum, persona_enum, direction_enum):
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,60 @@
+"""Unique candles per (symbol, exchange, timestamp) and ingestion cursors
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the newest copy of any candle stored more than once
+    op.execute(
+        """
+        DELETE FROM crypto_prices
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY symbol, exchange, timestamp ORDER BY id DESC
+                ) AS copy
+                FROM crypto_prices
+            ) ranked
+            WHERE copy > 1
+        )
+        """
+    )
+    with op.batch_alter_table("crypto_prices") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_crypto_prices_symbol_exchange_timestamp",
+            ["symbol", "exchange", "timestamp"],
+        )
+
+    op.create_table(
+        "ingestion_cursors",
+        sa.Column("exchange", sa.String(length=50), primary_key=True),
+        sa.Column("symbol", sa.String(length=20), primary_key=True),
+        sa.Column("last_timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingestion_cursors")
+    with op.batch_alter_table("crypto_prices") as batch_op:
+        batch_op.drop_constraint(
+            "uq_crypto_prices_symbol_exchange_timestamp", type_="unique"
+        )
@@ -0,0 +1,82 @@
+"""Composite indexes matched to the hot price and prediction queries
+
+crypto_prices: every read filters on (symbol, exchange) and walks timestamp
+in descending order, so one unique (symbol, exchange, timestamp) index that
+INCLUDEs the candle columns turns them into index-only backward range scans.
+It replaces both the unique constraint from 0002 (ON CONFLICT infers the new
+index) and the single-column symbol index.
+
+predictions: listing and consensus filter on symbol plus optional timeframe
+or persona and order by created_at.
+
+Indexes are built CONCURRENTLY on PostgreSQL so ingestion keeps running.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CANDLE_COLUMNS = ["id", "open", "high", "low", "close", "volume"]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_crypto_prices_symbol_exchange_timestamp",
+            "crypto_prices",
+            ["symbol", "exchange", "timestamp"],
+            unique=True,
+            postgresql_include=CANDLE_COLUMNS,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_predictions_symbol_timeframe_created_at",
+            "predictions",
+            ["symbol", "timeframe", "created_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_predictions_symbol_persona_created_at",
+            "predictions",
+            ["symbol", "persona", "created_at"],
+            postgresql_concurrently=True,
+        )
+
+    with op.batch_alter_table("crypto_prices") as batch_op:
+        batch_op.drop_constraint(
+            "uq_crypto_prices_symbol_exchange_timestamp", type_="unique"
+        )
+    # Leading columns of the composite indexes cover these
+    op.drop_index("ix_crypto_prices_symbol", table_name="crypto_prices")
+    op.drop_index("ix_predictions_symbol", table_name="predictions")
+    op.drop_index("ix_predictions_persona", table_name="predictions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_predictions_persona", "predictions", ["persona"])
+    op.create_index("ix_predictions_symbol", "predictions", ["symbol"])
+    op.create_index("ix_crypto_prices_symbol", "crypto_prices", ["symbol"])
+    with op.batch_alter_table("crypto_prices") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_crypto_prices_symbol_exchange_timestamp",
+            ["symbol", "exchange", "timestamp"],
+        )
+    op.drop_index("ix_predictions_symbol_persona_created_at", table_name="predictions")
+    op.drop_index(
+        "ix_predictions_symbol_timeframe_created_at", table_name="predictions"
+    )
+    op.drop_index(
+        "ix_crypto_prices_symbol_exchange_timestamp", table_name="crypto_prices"
+    )
@@ -0,0 +1,66 @@
+"""Partial indexes for active predictions and target_date backfill
+
+Predictions now carry target_date (created_at plus the timeframe) and are
+expired by a set-based sweep, so only a small, recent fraction of the table
+stays active. Partial indexes restricted to active rows keep the API's
+active-only listings and the expiry sweep cheap as history grows.
+
+Existing rows with a known timeframe get their target_date backfilled.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMEFRAMES = {"24h": "24 hours", "7d": "7 days", "30d": "30 days"}
+
+ACTIVE = sa.text("is_active")
+
+
+def upgrade() -> None:
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for timeframe, span in TIMEFRAMES.items():
+        if postgresql:
+            target = f"created_at + interval '{span}'"
+        else:
+            target = f"datetime(created_at, '+{span}')"
+        op.execute(
+            f"UPDATE predictions SET target_date = {target} "
+            f"WHERE target_date IS NULL AND timeframe = '{timeframe}'"
+        )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_predictions_active_symbol_created_at",
+            "predictions",
+            ["symbol", "created_at"],
+            postgresql_where=ACTIVE,
+            sqlite_where=ACTIVE,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_predictions_active_target_date",
+            "predictions",
+            ["target_date"],
+            postgresql_where=ACTIVE,
+            sqlite_where=ACTIVE,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_predictions_active_target_date", table_name="predictions")
+    op.drop_index("ix_predictions_active_symbol_created_at", table_name="predictions")
@@ -0,0 +1,42 @@
+"""Checkpoints for resumable historical backfills
+
+One row per (exchange, symbol, range) the backfill engine works through,
+recording how far it has fetched, so an interrupted run resumes mid-range
+and ranges the exchange has no data for are not requested again.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "backfill_checkpoints",
+        sa.Column("exchange", sa.String(length=50), primary_key=True),
+        sa.Column("symbol", sa.String(length=20), primary_key=True),
+        sa.Column("range_start", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("range_end", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("next_since", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("backfill_checkpoints")
@@ -0,0 +1,46 @@
+"""Match the SQLite partial index predicate to the queries
+
+SQLite only uses a partial index when the query's WHERE clause contains the
+index's predicate as written. SQLAlchemy renders `is_active == True` as
+`is_active = 1`, so the 0004 indexes built with `WHERE is_active` were never
+chosen. They are rebuilt with `WHERE is_active = 1`; PostgreSQL proves the
+implication itself and keeps its indexes.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_predictions_active_symbol_created_at": ["symbol", "created_at"],
+    "ix_predictions_active_target_date": ["target_date"],
+}
+
+
+def _rebuild(predicate: str) -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for name, columns in INDEXES.items():
+        op.drop_index(name, table_name="predictions")
+        op.create_index(name, "predictions", columns, sqlite_where=sa.text(predicate))
+
+
+def upgrade() -> None:
+    _rebuild("is_active = 1")
+
+
+def downgrade() -> None:
+    _rebuild("is_active")
@@ -0,0 +1,74 @@
+"""Append id to the prediction listing indexes
+
+Prediction listings page newest first by (created_at DESC, id DESC), since
+created_at alone is not unique. With id as the last index column the index
+yields rows in exactly that order, so a page no longer sorts every matching
+row. Each index is rebuilt under its existing name; on PostgreSQL the new
+one is built CONCURRENTLY before the old one is dropped.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (columns without the id tiebreaker, partial index predicate)
+INDEXES = {
+    "ix_predictions_symbol_timeframe_created_at": (
+        ["symbol", "timeframe", "created_at"],
+        None,
+    ),
+    "ix_predictions_symbol_persona_created_at": (
+        ["symbol", "persona", "created_at"],
+        None,
+    ),
+    "ix_predictions_active_symbol_created_at": (["symbol", "created_at"], "active"),
+}
+
+
+def _rebuild(with_id: bool) -> None:
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    for name, (columns, partial) in INDEXES.items():
+        columns = columns + ["id"] if with_id else columns
+        where = {}
+        if partial:
+            where = {
+                "postgresql_where": sa.text("is_active"),
+                "sqlite_where": sa.text("is_active = 1"),
+            }
+        if postgresql:
+            with op.get_context().autocommit_block():
+                op.create_index(
+                    f"{name}_new",
+                    "predictions",
+                    columns,
+                    postgresql_concurrently=True,
+                    **where,
+                )
+                op.drop_index(
+                    name, table_name="predictions", postgresql_concurrently=True
+                )
+                op.execute(f"ALTER INDEX {name}_new RENAME TO {name}")
+        else:
+            op.drop_index(name, table_name="predictions")
+            op.create_index(name, "predictions", columns, **where)
+
+
+def upgrade() -> None:
+    _rebuild(with_id=True)
+
+
+def downgrade() -> None:
+    _rebuild(with_id=False)
@@ -0,0 +1,40 @@
+"""Index the consensus lookup
+
+Consensus takes the newest active prediction of each persona for a
+(symbol, timeframe). A partial index over active rows on (symbol, timeframe,
+persona, created_at, id) turns that into one short backward index probe per
+persona, however many predictions are active.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_predictions_active_consensus",
+            "predictions",
+            ["symbol", "timeframe", "persona", "created_at", "id"],
+            postgresql_where=sa.text("is_active"),
+            sqlite_where=sa.text("is_active = 1"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_predictions_active_consensus", table_name="predictions")
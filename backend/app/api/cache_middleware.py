@@ -0,0 +1,201 @@
+"""
+Response cache middleware for the read-only price and prediction routes
+
+GET responses are stored in Redis under the route plus normalized query
+parameters and the negotiated representation, and carry Vary: Accept so
+shared caches keep JSON, msgpack and Arrow apart too. Writers invalidate a whole
+namespace by bumping its generation counter, with the entry TTL as a safety
+net. Every cacheable response carries an ETag and Last-Modified so polling
+clients revalidate and get 304s without touching the database or the
+serializers. Streaming responses (NDJSON, SSE) pass straight through.
+"""
+
+import hashlib
+import logging
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qsl
+from app.api.formats import JSON, negotiate
+from app.api.pagination import NDJSON
+from app.services.response_cache import PREDICTIONS, PRICES, response_cache
+
+logger = logging.getLogger(__name__)
+
+# Path prefix -> namespace whose writers invalidate it
+NAMESPACES = {
+    "/api/v1/prices": PRICES,
+    "/api/v1/predictions": PREDICTIONS,
+}
+
+# Response headers replayed from the cache besides the validators
+STORED_HEADERS = ("content-type", "x-next-cursor", "link")
+
+STREAMING_TYPES = (NDJSON, "text/event-stream")
+
+
+def _namespace(path: str):
+    for prefix, namespace in NAMESPACES.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return namespace
+    return None
+
+
+def _digest(scope, headers: dict) -> str:
+    # Symbols are case-insensitive in these routes, parameter names are not.
+    # The order of different parameters is not significant (a repeated one
+    # keeps its order: the last value wins) and empty values are dropped.
+    # ?format is part of the query; the Accept header picks binary encodings.
+    query = sorted(
+        (
+            (name, value)
+            for name, value in parse_qsl(scope.get("query_string", b"").decode())
+            if value != ""
+        ),
+        key=lambda param: param[0],
+    )
+    parts = [
+        headers.get("host", ""),
+        scope["path"].lower(),
+        repr(query),
+        negotiate(headers.get("accept")) or JSON,
+    ]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def _not_modified(headers: dict, entry: dict) -> bool:
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or entry["etag"] in tags or f"W/{entry['etag']}" in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(entry["modified"]) <= since
+    return False
+
+
+def _headers(entry: dict, status: str, body: bool = True) -> list:
+    headers = [
+        (b"etag", entry["etag"].encode()),
+        (b"last-modified", formatdate(entry["modified"], usegmt=True).encode()),
+        (b"cache-control", b"no-cache"),
+        (b"vary", b"Accept"),
+        (b"x-cache", status.encode()),
+    ]
+    if body:
+        headers += [(name.encode(), value.encode()) for name, value in entry["headers"]]
+        headers.append((b"content-length", str(len(entry["body"])).encode()))
+    return headers
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, cache=response_cache):
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        namespace = _namespace(scope["path"])
+        if namespace is None:
+            return await self.app(scope, receive, send)
+
+        headers = {
+            name.decode().lower(): value.decode()
+            for name, value in scope.get("headers", [])
+        }
+        if any(media in headers.get("accept", "") for media in STREAMING_TYPES):
+            return await self.app(scope, receive, send)
+
+        try:
+            generation = await self.cache.generation(namespace)
+            key = self.cache.key(namespace, generation, _digest(scope, headers))
+            entry = await self.cache.get(key)
+        except Exception as e:
+            self.cache.stats["errors"] += 1
+            logger.warning(f"Error reading response cache: {e}")
+            return await self.app(scope, receive, send)
+
+        if entry is not None:
+            self.cache.stats["hits"] += 1
+            await self._replay(send, headers, entry, "HIT")
+            return
+
+        self.cache.stats["misses"] += 1
+        await self._render(scope, receive, send, headers, key)
+
+    async def _replay(self, send, headers: dict, entry: dict, status: str):
+        if _not_modified(headers, entry):
+            self.cache.stats["not_modified"] += 1
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": _headers(entry, status, body=False),
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": _headers(entry, status),
+            }
+        )
+        await send({"type": "http.response.body", "body": entry["body"]})
+
+    async def _render(self, scope, receive, send, headers: dict, key: str):
+        """Run the endpoint, buffering a cacheable 200 to store and replay it"""
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if start is None and message["type"] == "http.response.start":
+                content_type = dict(message.get("headers", [])).get(
+                    b"content-type", b""
+                )
+                streaming = any(
+                    content_type.decode().startswith(media) for media in STREAMING_TYPES
+                )
+                if message["status"] != 200 or streaming:
+                    start = False
+                    await send(message)
+                else:
+                    start = message
+                return
+            if start is False or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            response_headers = {
+                name.decode().lower(): value.decode()
+                for name, value in start.get("headers", [])
+            }
+            body = b"".join(chunks)
+            entry = {
+                "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+                "modified": int(time.time()),
+                "headers": [
+                    (name, response_headers[name])
+                    for name in STORED_HEADERS
+                    if name in response_headers
+                ],
+                "body": body,
+            }
+            try:
+                await self.cache.put(key, entry)
+            except Exception as e:
+                self.cache.stats["errors"] += 1
+                logger.warning(f"Error writing response cache: {e}")
+            await self._replay(send, headers, entry, "MISS")
+
+        await self.app(scope, receive, capture)
@@ -0,0 +1,93 @@
+"""
+Compact columnar encodings for candle series
+
+Columnar payloads carry one array per field ({"t": [...], "o": [...], ...})
+instead of one object per candle, and are built directly from query tuples.
+Besides JSON they can be returned as msgpack or Arrow IPC through the
+Accept header.
+"""
+
+import io
+import json
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from fastapi.responses import Response
+from app.db.candles import epoch_ms
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Accept values mapped to the media type we answer with
+BINARY_TYPES = {
+    MSGPACK: MSGPACK,
+    "application/msgpack": MSGPACK,
+    ARROW: ARROW,
+}
+
+# Column name in the payload -> field of the candle row
+FIELDS = {"o": "open", "h": "high", "l": "low", "c": "close", "v": "volume"}
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Binary media type requested by the Accept header, if any"""
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in BINARY_TYPES:
+            return BINARY_TYPES[media_type]
+    return None
+
+
+def to_columns(rows: Iterable) -> dict:
+    """Transpose candle rows (timestamp, open, high, low, close, volume) into arrays"""
+    columns = {"t": [], **{key: [] for key in FIELDS}}
+    for row in rows:
+        columns["t"].append(epoch_ms(row.timestamp))
+        for key, field in FIELDS.items():
+            columns[key].append(getattr(row, field))
+    return columns
+
+
+def _arrow(meta: dict, columns: dict) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=406, detail="Arrow encoding is unavailable")
+
+    table = pa.table(
+        {
+            "t": pa.array(columns["t"], type=pa.timestamp("ms", tz="UTC")),
+            **{key: pa.array(columns[key], type=pa.float64()) for key in FIELDS},
+        }
+    ).replace_schema_metadata({key: str(value) for key, value in meta.items()})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _msgpack(payload: dict) -> bytes:
+    try:
+        import msgpack
+    except ImportError:
+        raise HTTPException(status_code=406, detail="msgpack encoding is unavailable")
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def columnar_response(
+    meta: dict, columns: dict, media_type: Optional[str] = None
+) -> Response:
+    """
+    Encode a columnar candle series as JSON (default), msgpack or Arrow IPC.
+    `meta` (symbol, exchange, interval) is sent once per payload, as schema
+    metadata for Arrow.
+    """
+    if media_type == ARROW:
+        return Response(_arrow(meta, columns), media_type=ARROW)
+
+    payload = {**meta, **columns}
+    if media_type == MSGPACK:
+        return Response(_msgpack(payload), media_type=MSGPACK)
+    return Response(
+        json.dumps(payload, separators=(",", ":")).encode(), media_type=JSON
+    )
@@ -0,0 +1,97 @@
+"""
+Keyset pagination and NDJSON streaming helpers
+
+Cursors are opaque base64url tokens over (timestamp in µs, id) of the last
+row a client received; the next page continues strictly before that key in
+descending order. Streaming responses run their query on a server-side
+cursor and write one JSON object per line, so exports use constant memory.
+"""
+
+import base64
+import enum
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, tuple_
+from app.db.session import AsyncSessionLocal
+
+NDJSON = "application/x-ndjson"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Rows fetched per round trip while streaming
+STREAM_BATCH_SIZE = 1000
+
+
+def encode_cursor(timestamp: datetime, row_id: Optional[int] = None) -> str:
+    # Full microsecond precision: created_at values are not minute-aligned
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    micros = (timestamp - EPOCH) // timedelta(microseconds=1)
+    raw = json.dumps([micros, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Optional[int]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        micros, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        timestamp = EPOCH + timedelta(microseconds=int(micros))
+        return timestamp, None if row_id is None else int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_before(timestamp_column, id_column, cursor: str):
+    """
+    WHERE clause selecting rows strictly before the cursor in
+    (timestamp DESC, id DESC) order. The plain timestamp bound lets the
+    planner use a timestamp index range; the row comparison breaks ties.
+    """
+    timestamp, row_id = decode_cursor(cursor)
+    if row_id is None or id_column is None:
+        return timestamp_column < timestamp
+    return and_(
+        timestamp_column <= timestamp,
+        tuple_(timestamp_column, id_column) < tuple_(timestamp, row_id),
+    )
+
+
+def next_page_headers(request: Request, cursor: str) -> dict:
+    """X-Next-Cursor plus an RFC 8288 Link header pointing at the next page"""
+    url = request.url.include_query_params(cursor=cursor)
+    return {"X-Next-Cursor": cursor, "Link": f'<{url}>; rel="next"'}
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    return stream or NDJSON in request.headers.get("accept", "")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_response(stmt, to_dict: Callable[[object], dict]) -> StreamingResponse:
+    """
+    Stream `stmt` as NDJSON. The generator opens its own session: request
+    dependencies are torn down before a streaming body is sent.
+    """
+
+    async def lines():
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                yield "".join(
+                    json.dumps(to_dict(row), default=_json_default) + "\n"
+                    for row in partition
+                )
+
+    return StreamingResponse(lines(), media_type=NDJSON)
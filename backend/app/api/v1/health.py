@@ -1,36 +1,58 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from sqlalchemy import text
-import redis
-from app.core.config import settings
+from fastapi import APIRouter, Response
+from app.services.consensus_service import consensus_service
+from app.services.health import health_prober
+from app.services.llm_cache import llm_cache
+from app.services.price_cache import latest_price_cache
+from app.services.price_stream import price_broadcaster
+from app.services.response_cache import response_cache
 
 router = APIRouter()
 
 
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
     Health check endpoint
     Returns the status of database and redis connections
     """
-    try:
-        # Check database
-        db.execute(text("SELECT 1"))
-        db_status = "healthy"
-    except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
-
-    try:
-        # Check Redis
-        r = redis.from_url(settings.REDIS_URL)
-        r.ping()
-        redis_status = "healthy"
-    except Exception as e:
-        redis_status = f"unhealthy: {str(e)}"
-
+    status = await health_prober.get()
     return {
         "status": "ok",
-        "database": db_status,
-        "redis": redis_status,
+        "database": status["database"]["status"],
+        "redis": status["redis"]["status"],
+    }
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and serving requests
+    """
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe: database and redis are reachable
+    Answers from the background prober's cache, with component latencies
+    """
+    status = await health_prober.get()
+    ready = health_prober.healthy(status)
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "unavailable", **status}
+
+
+@router.get("/health/cache")
+async def cache_stats():
+    """
+    Hit/miss counters for this worker's caches
+    """
+    return {
+        "latest_price": latest_price_cache.get_stats(),
+        "consensus": consensus_service.stats,
+        "llm": await llm_cache.get_stats(),
+        "http": response_cache.get_stats(),
+        "live": price_broadcaster.get_stats(),
     }
@@ -0,0 +1,120 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketDisconnect
+from app.core.config import settings
+from app.services.price_stream import Subscription, channels_for, price_broadcaster
+
+router = APIRouter()
+
+
+def _channels(exchange: str, symbols: str) -> list:
+    channels = channels_for(exchange, symbols.split(","))
+    if len(channels) > settings.PRICE_PUSH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.PRICE_PUSH_MAX_SYMBOLS} symbols per stream",
+        )
+    return channels
+
+
+@router.get("/stream/prices")
+async def stream_prices(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated symbols, e.g. BTC,ETH"),
+    exchange: str = "binance",
+):
+    """
+    Live price updates as Server-Sent Events
+    At most one event per symbol per PRICE_PUSH_INTERVAL
+    """
+    channels = _channels(exchange, symbols)
+    subscription = Subscription()
+    try:
+        await price_broadcaster.subscribe(subscription, channels)
+    except Exception:
+        # Don't leave a mailbox nobody drains registered with the broadcaster
+        await price_broadcaster.unsubscribe(subscription)
+        raise
+
+    async def events():
+        try:
+            async for batch in subscription.updates():
+                if await request.is_disconnected():
+                    break
+                if not batch:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(f"event: price\ndata: {data}\n\n" for data in batch)
+        finally:
+            await price_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws/prices")
+async def price_socket(
+    websocket: WebSocket, symbols: str = "", exchange: str = "binance"
+):
+    """
+    Live price updates over a WebSocket
+
+    Subscribe with ?symbols=BTC,ETH and/or by sending
+    {"action": "subscribe" | "unsubscribe", "symbols": [...], "exchange": "binance"}
+    """
+    await websocket.accept()
+    subscription = Subscription()
+
+    async def change(action: str, channels: list):
+        if action == "subscribe":
+            room = settings.PRICE_PUSH_MAX_SYMBOLS - len(subscription.channels)
+            await price_broadcaster.subscribe(subscription, channels[: max(room, 0)])
+        elif action == "unsubscribe":
+            await price_broadcaster.unsubscribe(subscription, channels)
+
+    async def receive():
+        while True:
+            try:
+                command = await websocket.receive_json()
+                requested = command.get("symbols", [])
+                if not isinstance(requested, list):
+                    # A bare string would be taken one character at a time
+                    raise TypeError("symbols must be a list")
+                channels = channels_for(command.get("exchange", exchange), requested)
+            except (ValueError, AttributeError, TypeError):
+                await websocket.send_json({"error": "Invalid command"})
+                continue
+            await change(command.get("action"), channels)
+            await websocket.send_json({"subscribed": sorted(subscription.channels)})
+
+    async def push():
+        async for batch in subscription.updates():
+            for data in batch:
+                try:
+                    await asyncio.wait_for(
+                        websocket.send_text(data),
+                        timeout=settings.PRICE_PUSH_SEND_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    # The client is not draining its socket; drop it
+                    price_broadcaster.stats["slow_disconnects"] += 1
+                    await websocket.close(code=1013)
+                    return
+
+    try:
+        if symbols:
+            await change("subscribe", channels_for(exchange, symbols.split(",")))
+        tasks = [asyncio.create_task(receive()), asyncio.create_task(push())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await price_broadcaster.unsubscribe(subscription)
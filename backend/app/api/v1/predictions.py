@@ -1,6 +1,15 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.pagination import (
+    encode_cursor,
+    keyset_before,
+    ndjson_response,
+    next_page_headers,
+    wants_stream,
+)
+from app.db.session import get_async_db
+from app.services.consensus_service import consensus_service
 from app.db.models import Prediction, PersonaEnum, DirectionEnum
 from typing import List, Optional
 from datetime import datetime
@@ -8,6 +17,9 @@ from pydantic import BaseModel
 
 router = APIRouter()
 
+# Upper bound on predictions returned by one page
+MAX_PAGE_SIZE = 500
+
 
 class PredictionResponse(BaseModel):
     id: int
@@ -34,29 +46,63 @@ class ConsensusResponse(BaseModel):
     predictions: List[PredictionResponse]
 
 
+def listing_query(
+    symbol: str,
+    persona: Optional[PersonaEnum] = None,
+    timeframe: Optional[str] = None,
+    active_only: bool = True,
+    cursor: Optional[str] = None,
+):
+    """Predictions of `symbol`, newest first, continuing after `cursor`"""
+    query = select(Prediction).where(Prediction.symbol == symbol)
+
+    if persona:
+        query = query.where(Prediction.persona == persona)
+
+    if timeframe:
+        query = query.where(Prediction.timeframe == timeframe)
+
+    if active_only:
+        query = query.where(Prediction.is_active == True)
+
+    if cursor:
+        query = query.where(keyset_before(Prediction.created_at, Prediction.id, cursor))
+
+    return query.order_by(Prediction.created_at.desc(), Prediction.id.desc())
+
+
 @router.get("/predictions/{symbol}", response_model=List[PredictionResponse])
 async def get_predictions(
+    request: Request,
+    response: Response,
     symbol: str,
     persona: Optional[PersonaEnum] = None,
     timeframe: Optional[str] = None,
     active_only: bool = True,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
+    stream: bool = Query(False, description="Stream all matches as NDJSON"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get AI predictions for a cryptocurrency
+    Newest first; follow X-Next-Cursor for older pages or stream everything
     """
-    query = db.query(Prediction).filter(Prediction.symbol == symbol.upper())
-
-    if persona:
-        query = query.filter(Prediction.persona == persona)
+    query = listing_query(symbol.upper(), persona, timeframe, active_only, cursor)
 
-    if timeframe:
-        query = query.filter(Prediction.timeframe == timeframe)
+    if wants_stream(request, stream):
+        return ndjson_response(
+            query,
+            lambda row: PredictionResponse.model_validate(row.Prediction).model_dump(),
+        )
 
-    if active_only:
-        query = query.filter(Prediction.is_active == True)
+    predictions = (await db.scalars(query.limit(limit))).all()
 
-    predictions = query.order_by(Prediction.created_at.desc()).limit(50).all()
+    if len(predictions) == limit:
+        last = predictions[-1]
+        response.headers.update(
+            next_page_headers(request, encode_cursor(last.created_at, last.id))
+        )
 
     return predictions
 
@@ -65,63 +111,10 @@ async def get_predictions(
 async def get_consensus(
     symbol: str,
     timeframe: str = "24h",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get consensus prediction from all AI personas
+    Uses the latest active prediction of each persona, served from the cache
     """
-    predictions = (
-        db.query(Prediction)
-        .filter(
-            Prediction.symbol == symbol.upper(),
-            Prediction.timeframe == timeframe,
-            Prediction.is_active == True,
-        )
-        .order_by(Prediction.created_at.desc())
-        .limit(10)  # Latest predictions from each persona
-        .all()
-    )
-
-    if not predictions:
-        return {
-            "symbol": symbol,
-            "consensus_direction": "neutral",
-            "consensus_confidence": 0,
-            "bullish_count": 0,
-            "bearish_count": 0,
-            "neutral_count": 0,
-            "predictions": [],
-        }
-
-    # Count directions
-    bullish_count = sum(1 for p in predictions if p.direction == DirectionEnum.BULLISH)
-    bearish_count = sum(1 for p in predictions if p.direction == DirectionEnum.BEARISH)
-    neutral_count = sum(1 for p in predictions if p.direction == DirectionEnum.NEUTRAL)
-
-    # Calculate consensus
-    direction_scores = {
-        DirectionEnum.BULLISH: sum(
-            p.confidence for p in predictions if p.direction == DirectionEnum.BULLISH
-        ),
-        DirectionEnum.BEARISH: sum(
-            p.confidence for p in predictions if p.direction == DirectionEnum.BEARISH
-        ),
-        DirectionEnum.NEUTRAL: sum(
-            p.confidence for p in predictions if p.direction == DirectionEnum.NEUTRAL
-        ),
-    }
-
-    consensus_direction = max(direction_scores, key=direction_scores.get)
-    consensus_confidence = (
-        direction_scores[consensus_direction] / len(predictions) if predictions else 0
-    )
-
-    return {
-        "symbol": symbol,
-        "consensus_direction": consensus_direction,
-        "consensus_confidence": consensus_confidence,
-        "bullish_count": bullish_count,
-        "bearish_count": bearish_count,
-        "neutral_count": neutral_count,
-        "predictions": predictions,
-    }
+    return await consensus_service.get(db, symbol.upper(), timeframe)
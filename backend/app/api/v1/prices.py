@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.formats import columnar_response, negotiate, to_columns
+from app.api.pagination import (
+    encode_cursor,
+    keyset_before,
+    ndjson_response,
+    next_page_headers,
+    wants_stream,
+)
+from app.db.session import get_async_db
+from app.db.candles import INTERVAL_SECONDS, resample_query
 from app.db.models import CryptoPrice
+from app.services.price_cache import latest_price_cache
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Upper bound on candles returned by one history request
+MAX_POINTS = 1000
+
 
 class PriceResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # Not set on resampled candles
     symbol: str
     exchange: str
     timestamp: datetime
@@ -24,53 +38,152 @@ class PriceResponse(BaseModel):
         from_attributes = True
 
 
+def history_query(
+    symbol: str, exchange: str, start_time: datetime, cursor: Optional[str] = None
+):
+    """1m candles since `start_time`, newest first, continuing after `cursor`"""
+    # Plain column tuples: no ORM identity map or object hydration.
+    # Timestamps are unique per (symbol, exchange), so they alone order the
+    # keyset and the unique index yields them presorted.
+    stmt = (
+        select(
+            CryptoPrice.id,
+            CryptoPrice.timestamp,
+            CryptoPrice.open,
+            CryptoPrice.high,
+            CryptoPrice.low,
+            CryptoPrice.close,
+            CryptoPrice.volume,
+        )
+        .where(
+            CryptoPrice.symbol == symbol,
+            CryptoPrice.exchange == exchange,
+            CryptoPrice.timestamp >= start_time,
+        )
+        .order_by(CryptoPrice.timestamp.desc())
+    )
+    if cursor:
+        stmt = stmt.where(keyset_before(CryptoPrice.timestamp, None, cursor))
+    return stmt
+
+
+def latest_price_query(symbol: str, exchange: str):
+    return (
+        select(CryptoPrice)
+        .where(CryptoPrice.symbol == symbol, CryptoPrice.exchange == exchange)
+        .order_by(CryptoPrice.timestamp.desc())
+        .limit(1)
+    )
+
+
 @router.get("/prices/{symbol}", response_model=List[PriceResponse])
 async def get_prices(
+    request: Request,
+    response: Response,
     symbol: str,
     exchange: Optional[str] = "binance",
     hours: int = Query(24, description="Hours of historical data"),
-    db: Session = Depends(get_db),
+    interval: str = Query(
+        "1m",
+        pattern="^(auto|" + "|".join(INTERVAL_SECONDS) + ")$",
+        description="Candle width; 'auto' picks the finest one that fits the range",
+    ),
+    format: str = Query(
+        "rows",
+        pattern="^(rows|columnar)$",
+        description="'columnar' returns one array per field; implied by a "
+        "msgpack or Arrow Accept header",
+    ),
+    limit: int = Query(MAX_POINTS, ge=1, le=MAX_POINTS, description="Page size"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the last page"),
+    stream: bool = Query(
+        False, description="Stream the whole range as NDJSON (or Accept it)"
+    ),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get historical price data for a cryptocurrency
+    Pages of at most MAX_POINTS candles, newest first; follow X-Next-Cursor
+    for older candles or stream the whole range as NDJSON
     """
-    start_time = datetime.utcnow() - timedelta(hours=hours)
+    symbol = symbol.upper()
 
-    prices = (
-        db.query(CryptoPrice)
-        .filter(
-            CryptoPrice.symbol == symbol.upper(),
-            CryptoPrice.exchange == exchange,
-            CryptoPrice.timestamp >= start_time,
+    if interval == "auto":
+        interval = next(
+            (
+                name
+                for name, seconds in INTERVAL_SECONDS.items()
+                if hours * 3600 / seconds <= MAX_POINTS
+            ),
+            "1d",
         )
-        .order_by(CryptoPrice.timestamp.desc())
-        .limit(1000)
-        .all()
-    )
 
-    return prices
+    if interval != "1m":
+        seconds = INTERVAL_SECONDS[interval]
+        # Start on a bucket boundary so the oldest candle is not a partial one
+        start_epoch = (datetime.now(timezone.utc) - timedelta(hours=hours)).timestamp()
+        start_time = datetime.fromtimestamp(
+            start_epoch // seconds * seconds, tz=timezone.utc
+        )
+        # Whole buckets only: the cursor filters candles, not aggregated rows
+        criteria = (
+            [keyset_before(CryptoPrice.timestamp, None, cursor)] if cursor else []
+        )
+        stmt = resample_query(
+            symbol,
+            exchange,
+            start_time,
+            seconds,
+            dialect=db.get_bind().dialect.name,
+            criteria=criteria,
+        )
+        stmt = stmt.order_by(stmt.selected_columns.timestamp.desc())
+    else:
+        start_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+        stmt = history_query(symbol, exchange, start_time, cursor)
+
+    def to_dict(row) -> dict:
+        return {"symbol": symbol, "exchange": exchange, **row._mapping}
+
+    if wants_stream(request, stream):
+        return ndjson_response(stmt, to_dict)
+
+    rows = (await db.execute(stmt.limit(limit))).all()
+
+    headers = {}
+    if len(rows) == limit:
+        last = rows[-1]
+        headers = next_page_headers(request, encode_cursor(last.timestamp))
+
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type or format == "columnar":
+        meta = {"symbol": symbol, "exchange": exchange, "interval": interval}
+        encoded = columnar_response(meta, to_columns(rows), media_type)
+        encoded.headers.update(headers)
+        return encoded
+
+    response.headers.update(headers)
+    return [to_dict(row) for row in rows]
 
 
 @router.get("/prices/{symbol}/latest", response_model=PriceResponse)
 async def get_latest_price(
     symbol: str,
     exchange: Optional[str] = "binance",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the latest price for a cryptocurrency
+    Served from the latest-price cache; the database is only hit on a miss
     """
-    price = (
-        db.query(CryptoPrice)
-        .filter(
-            CryptoPrice.symbol == symbol.upper(),
-            CryptoPrice.exchange == exchange,
-        )
-        .order_by(CryptoPrice.timestamp.desc())
-        .first()
-    )
+    cached = await latest_price_cache.get(exchange, symbol.upper())
+    if cached:
+        return cached
+
+    price = await db.scalar(latest_price_query(symbol.upper(), exchange))
 
     if not price:
         return {"error": "Price not found"}
 
+    await latest_price_cache.set(price)
     return price
@@ -0,0 +1,44 @@
+"""
+Historical price backfill
+
+Run with: python -m app.backfill --exchange binance --days 365 [--symbols BTC ETH]
+"""
+
+from app.services.backfill import BackfillEngine
+from app.services.exchanges import get_exchange
+from datetime import datetime, timedelta, timezone
+import argparse
+import asyncio
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing 1m candles")
+    parser.add_argument("--exchange", default="binance")
+    parser.add_argument(
+        "--symbols", nargs="+", help="Default: every symbol the exchange tracks"
+    )
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--start", type=parse_time, help="ISO time; overrides --days")
+    parser.add_argument("--end", type=parse_time, help="ISO time; default now")
+    parser.add_argument("--segment-pages", type=int)
+    args = parser.parse_args()
+
+    adapter = get_exchange(args.exchange)
+    end = args.end or datetime.now(timezone.utc)
+    start = args.start or end - timedelta(days=args.days)
+    engine = BackfillEngine(adapter, segment_pages=args.segment_pages)
+    stats = asyncio.run(engine.run(args.symbols or adapter.symbols, start, end))
+    logger.info(f"Backfill complete: {stats}")
+
+
+if __name__ == "__main__":
+    main()
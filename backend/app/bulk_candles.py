@@ -0,0 +1,83 @@
+"""
+Bulk candle import/export
+
+Run with:
+    python -m app.bulk_candles import candles.parquet [--exchange binance]
+    python -m app.bulk_candles export candles.parquet --exchange binance --symbols BTC
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timezone
+from app.db.bulk import export_candles, import_candles
+from app.db.session import engine
+from app.services.response_cache import PRICES, bump_generation
+
+logger = logging.getLogger(__name__)
+
+
+def parse_time(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk candle import/export")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("import", help="Load a CSV or Parquet file")
+    load.add_argument("path")
+    load.add_argument("--format", choices=["csv", "parquet"])
+    load.add_argument("--exchange", help="Exchange for files without that column")
+    load.add_argument("--symbol", help="Symbol for files without that column")
+    load.add_argument("--chunk-rows", type=int)
+    load.add_argument(
+        "--keep-existing",
+        action="store_true",
+        help="Leave stored candles untouched instead of overwriting them",
+    )
+
+    dump = commands.add_parser("export", help="Write candles to a Parquet file")
+    dump.add_argument("path")
+    dump.add_argument("--exchange")
+    dump.add_argument("--symbols", nargs="+")
+    dump.add_argument("--start", type=parse_time)
+    dump.add_argument("--end", type=parse_time)
+    dump.add_argument("--chunk-rows", type=int)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    started = time.monotonic()
+    with engine.connect() as conn:
+        if args.command == "import":
+            result = import_candles(
+                conn,
+                args.path,
+                fmt=args.format,
+                exchange=args.exchange,
+                symbol=args.symbol,
+                chunk_rows=args.chunk_rows,
+                update_existing=not args.keep_existing,
+            )
+            if result.written:
+                bump_generation(PRICES)
+            summary = f"{result.inserted} inserted, {result.updated} updated"
+        else:
+            written = export_candles(
+                conn,
+                args.path,
+                exchange=args.exchange,
+                symbols=args.symbols,
+                start=args.start,
+                end=args.end,
+                chunk_rows=args.chunk_rows,
+            )
+            summary = f"{written} rows written to {args.path}"
+    logger.info(
+        f"Bulk {args.command} done in {time.monotonic() - started:.1f}s: {summary}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
-from celery import Celery
+from celery import Celery, chord
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.services.binance_service import binance_service
+from app.core.redis import acquire_lock, release_lock, reset_redis
+from app.db.session import SessionLocal, engine
 from app.services.ai_service import ai_service
+from app.services.backfill import BackfillEngine
+from app.services.exchange_adapter import ingest_all
+from app.services.exchanges import enabled_exchanges, get_exchange
+from app.services.consensus_service import consensus_service
+from app.services.response_cache import PREDICTIONS, bump_generation
+from app.db.predictions import expire_predictions as expire_prediction_rows
+from datetime import datetime, timedelta, timezone
 import asyncio
 import logging
 
@@ -17,53 +25,218 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND,
 )
 
+# Time-critical ingestion never waits behind LLM batches or housekeeping;
+# each queue gets its own workers (see docker-compose.yml)
+INGESTION_QUEUE = "ingestion"
+LLM_QUEUE = "llm"
+MAINTENANCE_QUEUE = "maintenance"
+BACKFILL_QUEUE = "backfill"
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_default_queue=MAINTENANCE_QUEUE,
+    task_routes={
+        "update_price_data": {"queue": INGESTION_QUEUE},
+        "update_exchange_prices": {"queue": INGESTION_QUEUE},
+        "finish_price_update": {"queue": INGESTION_QUEUE},
+        "generate_predictions": {"queue": LLM_QUEUE},
+        "generate_symbol_predictions": {"queue": LLM_QUEUE},
+        "finish_predictions": {"queue": LLM_QUEUE},
+        # Hours of history can take a while; keep it off the maintenance queue
+        "backfill_prices": {"queue": BACKFILL_QUEUE},
+    },
+    # Reserve one message per process so a long task never holds back work
+    # an idle process could take; ingestion workers raise it on the CLI
+    worker_prefetch_multiplier=1,
 )
 
 
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """
+    Per-child setup for prefork workers. Pooled connections inherited from
+    the parent are dropped (without closing the parent's sockets) so each
+    child opens its own; exchange clients and LLM providers are built on
+    first use.
+    """
+    engine.dispose(close=False)
+    reset_redis()
+
+
+def _chunks(items: list, size: int) -> list:
+    size = max(size, 1)
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _fan_out(lock: str, ttl: int, header: list, callback):
+    """
+    Dispatch `header` subtasks as a chord under a Redis lock, so a run that
+    is still in flight makes the next beat tick a no-op. The callback
+    releases the lock; `ttl` bounds how long a lost run can block.
+    """
+    token = acquire_lock(lock, ttl)
+    if token is None:
+        logger.warning(f"Previous {lock} run still in progress; skipping")
+        return None
+    try:
+        return chord(header)(callback.s(token))
+    except Exception:
+        release_lock(lock, token)
+        raise
+
+
 @celery_app.task(name="update_price_data")
 def update_price_data():
     """
-    Fetch and update price data from Binance
+    Fetch and update price data from every enabled exchange
+    Chunk i of each exchange's symbols goes to subtask i, which fetches its
+    exchanges concurrently
     Runs every 1 minute
     """
     logger.info("Starting price data update...")
+    plans = {}
+    for adapter in enabled_exchanges():
+        chunks = _chunks(adapter.symbols, settings.INGESTION_CHUNK_SIZE)
+        for i, chunk in enumerate(chunks):
+            plans.setdefault(i, {})[adapter.name] = chunk
+    _fan_out(
+        "update_price_data",
+        settings.PRICE_UPDATE_LOCK_TTL,
+        [update_exchange_prices.s(plan) for plan in plans.values()],
+        finish_price_update,
+    )
+
+
+@celery_app.task(name="update_exchange_prices", acks_late=True)
+def update_exchange_prices(plan: dict) -> dict:
+    """
+    Incremental candle update for {exchange: [symbols]} (idempotent upserts)
+    """
     db = SessionLocal()
     try:
-        asyncio.run(binance_service.update_price_data(db))
-        logger.info("Price data update completed")
+        results = asyncio.run(
+            ingest_all(
+                db, {get_exchange(name): symbols for name, symbols in plan.items()}
+            )
+        )
+        return {
+            "inserted": sum(result.inserted for result in results.values()),
+            "updated": sum(result.updated for result in results.values()),
+        }
     except Exception as e:
-        logger.error(f"Error updating price data: {e}")
+        logger.error(f"Error updating price data for {plan}: {e}")
+        return {"inserted": 0, "updated": 0}
     finally:
         db.close()
 
 
+@celery_app.task(name="finish_price_update")
+def finish_price_update(results: list, token: str):
+    release_lock("update_price_data", token)
+    logger.info(
+        f"Price data update completed: "
+        f"{sum(r['inserted'] for r in results)} inserted, "
+        f"{sum(r['updated'] for r in results)} updated "
+        f"across {len(results)} subtasks"
+    )
+
+
+# Symbols the scheduled prediction run covers
+PREDICTION_SYMBOLS = ["BTC", "ETH", "BNB", "SOL", "XRP"]
+
+
 @celery_app.task(name="generate_predictions")
-def generate_predictions():
+def generate_predictions(symbols: list = None, timeframe: str = "24h"):
     """
-    Generate AI predictions for top cryptocurrencies
+    Generate AI predictions for top cryptocurrencies, one subtask per
+    LLM batch of symbols
     Runs every 4 hours to control LLM costs
     """
     logger.info("Starting AI predictions generation...")
+    chunks = _chunks(symbols or PREDICTION_SYMBOLS, settings.LLM_BATCH_SIZE)
+    _fan_out(
+        "generate_predictions",
+        settings.PREDICTION_LOCK_TTL,
+        [generate_symbol_predictions.s(chunk, timeframe) for chunk in chunks],
+        finish_predictions,
+    )
+
+
+@celery_app.task(name="generate_symbol_predictions")
+def generate_symbol_predictions(symbols: list, timeframe: str = "24h") -> int:
+    """Run every persona over a chunk of symbols; returns predictions made"""
     db = SessionLocal()
     try:
-        symbols = ["BTC", "ETH", "BNB", "SOL", "XRP"]
-        for symbol in symbols:
-            logger.info(f"Generating predictions for {symbol}...")
-            asyncio.run(ai_service.analyze_all(db, symbol, timeframe="24h"))
+        predictions = asyncio.run(ai_service.generate(db, symbols, timeframe))
+        return sum(len(results) for results in predictions.values())
+    except Exception as e:
+        logger.error(f"Error generating predictions for {symbols}: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+@celery_app.task(name="finish_predictions")
+def finish_predictions(results: list, token: str):
+    release_lock("generate_predictions", token)
+    logger.info(
+        f"AI predictions completed: {sum(results)} predictions "
+        f"across {len(results)} subtasks"
+    )
 
-        logger.info("AI predictions completed")
+
+@celery_app.task(name="expire_predictions")
+def expire_predictions():
+    """
+    Deactivate predictions whose target date has passed
+    Runs every hour
+    """
+    db = SessionLocal()
+    try:
+        expired, affected = expire_prediction_rows(db)
+        for symbol, timeframe in affected:
+            consensus_service.refresh(db, symbol, timeframe)
+        if expired:
+            bump_generation(PREDICTIONS)
+        logger.info(
+            f"Expired {expired} predictions across {len(affected)} consensus keys"
+        )
     except Exception as e:
-        logger.error(f"Error generating predictions: {e}")
+        db.rollback()
+        logger.error(f"Error expiring predictions: {e}")
     finally:
         db.close()
 
 
+@celery_app.task(name="backfill_prices")
+def backfill_prices(exchange: str = None, days: float = None, symbols: list = None):
+    """
+    Fill missing 1m candles over the last `days` (default: the repair window)
+    Runs every hour for the enabled exchanges; call with larger `days` to load
+    history for new symbols
+    """
+    adapters = [get_exchange(exchange)] if exchange else enabled_exchanges()
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(days=days or settings.BACKFILL_REPAIR_DAYS)
+    for adapter in adapters:
+        lock = f"backfill_prices:{adapter.name}"
+        token = acquire_lock(lock, settings.BACKFILL_LOCK_TTL)
+        if token is None:
+            logger.warning(f"Previous {lock} run still in progress; skipping")
+            continue
+        try:
+            backfill = BackfillEngine(adapter)
+            asyncio.run(backfill.run(symbols or adapter.symbols, start, end))
+        except Exception as e:
+            logger.error(f"Error backfilling {adapter.name}: {e}")
+        finally:
+            release_lock(lock, token)
+
+
 @celery_app.task(name="cleanup_old_data")
 def cleanup_old_data():
     """
@@ -73,26 +246,25 @@ def cleanup_old_data():
     logger.info("Starting data cleanup...")
     db = SessionLocal()
     try:
-        from datetime import datetime, timedelta
-        from app.db.models import CryptoPrice, Prediction
+        from app.db.models import BackfillCheckpoint, CryptoPrice
 
-        # Delete price data older than 30 days
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
+        # Delete price data older than the retention window
+        cutoff_date = datetime.utcnow() - timedelta(days=settings.PRICE_RETENTION_DAYS)
         deleted_prices = (
-            db.query(CryptoPrice)
-            .filter(CryptoPrice.timestamp < cutoff_date)
-            .delete()
+            db.query(CryptoPrice).filter(CryptoPrice.timestamp < cutoff_date).delete()
         )
-
-        # Deactivate old predictions
-        old_predictions = (
-            db.query(Prediction).filter(Prediction.created_at < cutoff_date).all()
+        # Checkpoints of ranges whose candles were just dropped
+        deleted_checkpoints = (
+            db.query(BackfillCheckpoint)
+            .filter(BackfillCheckpoint.range_end <= cutoff_date)
+            .delete()
         )
-        for pred in old_predictions:
-            pred.is_active = False
 
         db.commit()
-        logger.info(f"Cleaned up {deleted_prices} old price records")
+        logger.info(
+            f"Cleaned up {deleted_prices} old price records and "
+            f"{deleted_checkpoints} backfill checkpoints"
+        )
 
     except Exception as e:
         db.rollback()
@@ -111,6 +283,14 @@ celery_app.conf.beat_schedule = {
         "task": "generate_predictions",
         "schedule": crontab(minute=0, hour="*/4"),  # Every 4 hours
     },
+    "expire-predictions-hourly": {
+        "task": "expire_predictions",
+        "schedule": crontab(minute=30),  # Every hour at :30
+    },
+    "backfill-price-gaps-hourly": {
+        "task": "backfill_prices",
+        "schedule": crontab(minute=45),  # Every hour at :45
+    },
     "cleanup-old-data-daily": {
         "task": "cleanup_old_data",
         "schedule": crontab(minute=0, hour=2),  # Daily at 2 AM
@@ -15,13 +15,39 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
 
     # Redis
     REDIS_URL: str
+    REDIS_MAX_CONNECTIONS: int = 50  # Shared async pool per API worker
+
+    # Health checks
+    HEALTH_CHECK_INTERVAL: float = 5.0  # Seconds between background probes
+    HEALTH_CHECK_TIMEOUT: float = 2.0  # Seconds before a component counts as down
+
+    # Caching
+    PRICE_CACHE_LOCAL_TTL: float = 1.0  # Seconds a worker trusts its in-process copy
+    PRICE_CACHE_TTL: int = 300  # Seconds before an unrefreshed Redis entry expires
+    CONSENSUS_CACHE_TTL: int = 6 * 3600  # Outlives the 4h prediction cycle
+    HTTP_CACHE_TTL: int = 300  # Safety net; writers invalidate by generation
+    HTTP_CACHE_MAX_BODY: int = 2_000_000  # Larger responses are not stored
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL: int = 24 * 3600  # Max age of a reused model answer
+    LLM_CACHE_STEP_PCT: float = 0.5  # Snapshot quantization step for fingerprints
+    LLM_MATERIAL_CHANGE_PCT: float = (
+        1.0  # Smaller moves reuse the last answer; 0 disables
+    )
+    LLM_CACHE_MAX_ENTRIES: int = 10000
 
     # Celery
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
+    INGESTION_CHUNK_SIZE: int = 5  # Symbols per price-update subtask
+    PRICE_UPDATE_LOCK_TTL: int = 300  # A crashed run's lock lapses after this
+    PREDICTION_LOCK_TTL: int = 4 * 3600
 
     # API Keys
     GEMINI_API_KEY: str
@@ -31,6 +57,61 @@ class Settings(BaseSettings):
     UPBIT_SECRET_KEY: str = ""
     CRYPTOPANIC_API_KEY: str = ""
 
+    # Exchange ingestion
+    INGEST_EXCHANGES: str = "binance"  # Comma-separated, e.g. "binance,upbit"
+    # Venue budgets are per IP, for the whole deployment
+    BINANCE_WEIGHT_PER_MINUTE: int = 1200  # Binance allows 6000; leave headroom
+    UPBIT_REQUESTS_PER_MINUTE: int = 600  # Quotation API: 10 requests/s
+    EXCHANGE_CLIENT_PROCESSES: int = 1  # Processes splitting those budgets evenly
+    EXCHANGE_MAX_CONCURRENCY: int = 10  # In-flight requests per exchange
+    MARKETS_CACHE_TTL: int = 24 * 3600  # Shared ccxt market metadata in Redis
+
+    # Historical backfill
+    PRICE_RETENTION_DAYS: int = 30  # Raise before backfilling longer history
+    BACKFILL_SEGMENT_PAGES: int = 50  # Pages per checkpointed, parallel segment
+    BACKFILL_BATCH_ROWS: int = 20000  # Candles buffered per bulk write
+    BACKFILL_RETRIES: int = 3
+    BACKFILL_REPAIR_DAYS: int = 3  # Window the scheduled gap repair scans
+    BACKFILL_LOCK_TTL: int = 6 * 3600
+    BULK_CHUNK_ROWS: int = 100_000  # Rows per COPY/merge chunk in bulk imports
+
+    # LLM predictions
+    LLM_PROVIDER: str = "gemini"  # "gemini" or "local" (offline stand-in)
+    GEMINI_MODEL: str = "gemini-1.5-flash"
+    GEMINI_REQUESTS_PER_MINUTE: int = 60
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT: float = 60.0  # Seconds before a single model call is abandoned
+    LLM_BATCH_SIZE: int = 25  # Symbols per persona call; 1 disables batching
+    LOCAL_LLM_LATENCY: float = 0.5  # Seconds per simulated call
+    LOCAL_LLM_JITTER: float = 0.1
+    LOCAL_LLM_ERROR_RATE: float = 0.0
+    LOCAL_LLM_DIRECTION: str = ""  # Pin every answer; empty derives it from the prompt
+
+    # Live price push (WebSocket / SSE)
+    PRICE_PUSH_INTERVAL: float = 1.0  # Max one update per symbol per interval
+    PRICE_PUSH_HEARTBEAT: float = 15.0  # Seconds between SSE keep-alives
+    PRICE_PUSH_SEND_TIMEOUT: float = 5.0  # Slower clients are disconnected
+    PRICE_PUSH_MAX_SYMBOLS: int = 50
+
+    # Streaming ingestion
+    BINANCE_WS_URL: str = "wss://stream.binance.com:9443"
+    STREAM_FLUSH_INTERVAL: float = 1.0  # Seconds between micro-batch writes
+    STREAM_BATCH_SIZE: int = 500  # Flush early once this many candles are buffered
+
+    @property
+    def async_database_url(self) -> str:
+        """DATABASE_URL rewritten for the asyncio driver (asyncpg / aiosqlite)"""
+        url = self.DATABASE_URL
+        for sync_prefix, async_prefix in (
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("postgres://", "postgresql+asyncpg://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix) :]
+        return url
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
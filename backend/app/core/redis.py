@@ -0,0 +1,82 @@
+import uuid
+from typing import Optional
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+_client = None
+_async_client = None
+
+
+def get_redis() -> redis.Redis:
+    """Process-wide synchronous Redis client (Celery tasks, sync services)"""
+    global _client
+    if _client is None:
+        _client = redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def init_async_redis() -> aioredis.Redis:
+    """
+    Create the shared asyncio connection pool; called from the API lifespan
+    so the pool belongs to the server's event loop
+    """
+    global _async_client
+    if _async_client is None:
+        pool = aioredis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            health_check_interval=30,
+        )
+        _async_client = aioredis.Redis(connection_pool=pool)
+    return _async_client
+
+
+async def close_async_redis():
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Process-wide asyncio Redis client over the shared pool"""
+    return _async_client or init_async_redis()
+
+
+def reset_redis():
+    """Forget clients inherited across a fork so the child opens its own"""
+    global _client, _async_client
+    _client = None
+    _async_client = None
+
+
+# Delete the lock only if it still holds the caller's token
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(name: str, ttl: int) -> Optional[str]:
+    """
+    Take a cross-process lock that expires after `ttl` seconds. Returns a
+    token to release it with (possibly from another process), or None if
+    the lock is already held.
+    """
+    token = uuid.uuid4().hex
+    if get_redis().set(f"lock:{name}", token, nx=True, ex=ttl):
+        return token
+    return None
+
+
+def release_lock(name: str, token: str) -> bool:
+    return bool(get_redis().eval(_RELEASE_LOCK, 1, f"lock:{name}", token))
+
+
+def price_channel(exchange: str, symbol: str) -> str:
+    """Pub/sub channel carrying live price updates for one market"""
+    return f"prices:{exchange}:{symbol}"
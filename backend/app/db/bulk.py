@@ -0,0 +1,288 @@
+"""
+Bulk candle import and export
+
+Imports stream CSV or Parquet files in fixed-size chunks. On PostgreSQL with
+psycopg2 (COPY goes through its copy_expert) each chunk is COPYed into a
+temporary staging table and merged into crypto_prices with one INSERT ...
+SELECT ... ON CONFLICT, then ingestion cursors are advanced from the staged
+rows; other drivers and databases fall back to upsert_candles.
+Exports stream rows through a server-side cursor into a Parquet writer.
+Memory stays bounded by the chunk size either way.
+
+Expected columns: timestamp (ISO string, timestamp, or epoch milliseconds),
+open, high, low, close, volume, plus symbol and exchange unless defaults are
+given.
+"""
+
+import io
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator, List, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.candles import UpsertResult, advance_cursors, upsert_candles
+from app.db.models import CryptoPrice
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["symbol", "exchange", "timestamp", "open", "high", "low", "close", "volume"]
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Rows per INSERT on the portable path, within SQLite's bind-parameter limit
+SQLITE_CHUNK_SIZE = 1000
+
+SCHEMA = pa.schema(
+    [
+        ("symbol", pa.string()),
+        ("exchange", pa.string()),
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        *((name, pa.float64()) for name in PRICE_COLUMNS),
+    ]
+)
+
+# Rows delete themselves at commit, so every chunk starts from an empty table;
+# seq preserves file order so the last copy of a duplicated candle wins
+CREATE_STAGING = """
+CREATE TEMPORARY TABLE IF NOT EXISTS candle_staging (
+    seq bigserial,
+    symbol varchar(20) NOT NULL,
+    exchange varchar(50) NOT NULL,
+    timestamp timestamptz NOT NULL,
+    open float8 NOT NULL,
+    high float8 NOT NULL,
+    low float8 NOT NULL,
+    close float8 NOT NULL,
+    volume float8 NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING = (
+    f"COPY candle_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+_ASSIGN = ", ".join(f"{name} = EXCLUDED.{name}" for name in PRICE_COLUMNS)
+_CHANGED = " OR ".join(
+    f"crypto_prices.{name} IS DISTINCT FROM EXCLUDED.{name}" for name in PRICE_COLUMNS
+)
+_MERGE = f"""
+WITH merged AS (
+    INSERT INTO crypto_prices ({', '.join(COLUMNS)})
+    SELECT DISTINCT ON (symbol, exchange, timestamp) {', '.join(COLUMNS)}
+    FROM candle_staging
+    ORDER BY symbol, exchange, timestamp, seq DESC
+    ON CONFLICT (symbol, exchange, timestamp) DO {{action}}
+    RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted) AS inserted,
+       count(*) FILTER (WHERE NOT inserted) AS updated
+FROM merged
+"""
+MERGE_UPDATE = _MERGE.format(action=f"UPDATE SET {_ASSIGN} WHERE {_CHANGED}")
+MERGE_IGNORE = _MERGE.format(action="NOTHING")
+
+ADVANCE_CURSORS = """
+INSERT INTO ingestion_cursors (exchange, symbol, last_timestamp)
+SELECT exchange, symbol, max(timestamp) FROM candle_staging GROUP BY exchange, symbol
+ON CONFLICT (exchange, symbol) DO UPDATE SET
+    last_timestamp = GREATEST(ingestion_cursors.last_timestamp, EXCLUDED.last_timestamp),
+    updated_at = now()
+"""
+
+
+def detect_format(path: str) -> str:
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def read_batches(
+    path: str, fmt: str = None, chunk_rows: int = None
+) -> Iterator[pa.RecordBatch]:
+    """Stream a CSV or Parquet file as record batches of about `chunk_rows`"""
+    chunk_rows = chunk_rows or settings.BULK_CHUNK_ROWS
+    if (fmt or detect_format(path)) == "parquet":
+        # pre_buffer keeps every column chunk read so far until the file closes
+        parquet = pq.ParquetFile(path, pre_buffer=False)
+        yield from parquet.iter_batches(batch_size=chunk_rows)
+        return
+
+    reader = pacsv.open_csv(
+        path,
+        # CSV blocks are sized in bytes; a candle line is roughly 64 bytes
+        read_options=pacsv.ReadOptions(block_size=max(chunk_rows * 64, 1 << 20)),
+        convert_options=pacsv.ConvertOptions(
+            column_types={
+                "symbol": pa.string(),
+                "exchange": pa.string(),
+                **{name: pa.float64() for name in PRICE_COLUMNS},
+            }
+        ),
+    )
+    yield from reader
+
+
+def normalize(
+    batch: pa.RecordBatch, exchange: str = None, symbol: str = None
+) -> pa.Table:
+    """Coerce a batch to SCHEMA, filling symbol/exchange from the defaults"""
+    names = batch.schema.names
+    missing = [name for name in ["timestamp", *PRICE_COLUMNS] if name not in names]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    columns = {}
+    for name, default in (("symbol", symbol), ("exchange", exchange)):
+        if name in names:
+            columns[name] = batch.column(name).cast(pa.string())
+        elif default:
+            columns[name] = pa.array([default] * batch.num_rows, pa.string())
+        else:
+            raise ValueError(f"Missing column {name} and no default given")
+    columns["symbol"] = pc.utf8_upper(columns["symbol"])
+
+    timestamp = batch.column("timestamp")
+    if pa.types.is_integer(timestamp.type):
+        # Exchange-style epoch milliseconds
+        timestamp = timestamp.cast(pa.int64()).cast(pa.timestamp("ms", tz="UTC"))
+    columns["timestamp"] = timestamp.cast(pa.timestamp("ms", tz="UTC"))
+    for name in PRICE_COLUMNS:
+        columns[name] = batch.column(name).cast(pa.float64())
+    return pa.table([columns[name] for name in COLUMNS], schema=SCHEMA)
+
+
+def _copy_chunk(conn: Connection, table: pa.Table, merge: str) -> UpsertResult:
+    """COPY path; needs the raw psycopg2 connection for copy_expert"""
+    buffer = io.BytesIO()
+    pacsv.write_csv(table, buffer, pacsv.WriteOptions(include_header=False))
+    buffer.seek(0)
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(COPY_STAGING, buffer)
+    finally:
+        cursor.close()
+    counts = conn.execute(text(merge)).one()
+    conn.execute(text(ADVANCE_CURSORS))
+    return UpsertResult(inserted=counts.inserted, updated=counts.updated)
+
+
+def import_candles(
+    conn: Connection,
+    path: str,
+    fmt: str = None,
+    exchange: str = None,
+    symbol: str = None,
+    chunk_rows: int = None,
+    update_existing: bool = True,
+) -> UpsertResult:
+    """
+    Load a CSV or Parquet file into crypto_prices, committing per chunk.
+    Existing candles are overwritten when their values differ, or left
+    alone with update_existing=False.
+    """
+    copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2"
+    if copy:
+        conn.execute(text(CREATE_STAGING))
+        conn.commit()
+    merge = MERGE_UPDATE if update_existing else MERGE_IGNORE
+
+    total = UpsertResult()
+    read = 0
+    for batch in read_batches(path, fmt, chunk_rows):
+        table = normalize(batch, exchange, symbol)
+        try:
+            if copy:
+                result = _copy_chunk(conn, table, merge)
+            else:
+                result = _upsert_chunk(conn, table, update_existing)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        total += result
+        read += table.num_rows
+        logger.info(
+            f"Imported {read} rows ({total.inserted} inserted, "
+            f"{total.updated} updated)"
+        )
+    return total
+
+
+def _upsert_chunk(
+    conn: Connection, table: pa.Table, update_existing: bool
+) -> UpsertResult:
+    """Portable path without COPY (e.g. SQLite in development)"""
+    rows = table.to_pylist()
+    db = Session(bind=conn)
+    if update_existing:
+        result = upsert_candles(db, rows)
+    else:
+        insert = (
+            postgresql_insert if conn.dialect.name == "postgresql" else sqlite_insert
+        )
+        result = UpsertResult()
+        for start in range(0, len(rows), SQLITE_CHUNK_SIZE):
+            stmt = insert(CryptoPrice.__table__).values(
+                rows[start : start + SQLITE_CHUNK_SIZE]
+            )
+            result.inserted += db.execute(stmt.on_conflict_do_nothing()).rowcount
+
+    marks = defaultdict(dict)
+    for row in rows:
+        symbols = marks[row["exchange"]]
+        if row["symbol"] not in symbols or row["timestamp"] > symbols[row["symbol"]]:
+            symbols[row["symbol"]] = row["timestamp"]
+    for exchange, symbols in marks.items():
+        advance_cursors(db, exchange, symbols)
+    return result
+
+
+def export_candles(
+    conn: Connection,
+    path: str,
+    exchange: str = None,
+    symbols: Optional[List[str]] = None,
+    start: datetime = None,
+    end: datetime = None,
+    chunk_rows: int = None,
+) -> int:
+    """Stream candles, ordered by symbol and time, into a Parquet file"""
+    chunk_rows = chunk_rows or settings.BULK_CHUNK_ROWS
+    stmt = select(*(CryptoPrice.__table__.c[name] for name in COLUMNS)).order_by(
+        CryptoPrice.symbol, CryptoPrice.exchange, CryptoPrice.timestamp
+    )
+    if exchange:
+        stmt = stmt.where(CryptoPrice.exchange == exchange)
+    if symbols:
+        stmt = stmt.where(CryptoPrice.symbol.in_([s.upper() for s in symbols]))
+    if start:
+        stmt = stmt.where(CryptoPrice.timestamp >= start)
+    if end:
+        stmt = stmt.where(CryptoPrice.timestamp < end)
+
+    written = 0
+    result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(
+        stmt
+    )
+    with pq.ParquetWriter(path, SCHEMA, compression="zstd") as writer:
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            writer.write_batch(
+                pa.record_batch(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(columns, SCHEMA)
+                    ],
+                    schema=SCHEMA,
+                )
+            )
+            written += len(rows)
+            logger.info(f"Exported {written} rows")
+    return written
@@ -0,0 +1,476 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    String,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from app.db.models import CryptoPrice, IngestionCursor
+
+# Columns that make up a candle's identity and its mutable payload
+CANDLE_KEY = ("symbol", "exchange", "timestamp")
+CANDLE_VALUES = ("open", "high", "low", "close", "volume")
+
+# Keep multi-row VALUES statements well below the 65535 bind-parameter limit
+UPSERT_CHUNK_SIZE = 5000
+
+# Candle widths the price API can resample to, finest first
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+
+
+@dataclass
+class UpsertResult:
+    """Row counts reported by a bulk candle upsert"""
+
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    def __iadd__(self, other: "UpsertResult") -> "UpsertResult":
+        self.inserted += other.inserted
+        self.updated += other.updated
+        return self
+
+
+@dataclass
+class Gap:
+    """A run of missing 1m candles: [start, end)"""
+
+    symbol: str
+    start: datetime
+    end: datetime
+
+    @property
+    def minutes(self) -> int:
+        return int((self.end - self.start).total_seconds() // 60)
+
+
+def to_utc(ms: int) -> datetime:
+    """Convert an exchange millisecond timestamp to an aware UTC datetime"""
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+
+def epoch_ms(ts: datetime) -> int:
+    """Inverse of to_utc; naive datetimes (e.g. read back from SQLite) are UTC"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1000)
+
+
+def candle_rows(symbol: str, exchange: str, ohlcv: Iterable[list]) -> List[dict]:
+    """Turn ccxt OHLCV lists into row dicts for upsert_candles"""
+    return [
+        {
+            "symbol": symbol,
+            "exchange": exchange,
+            "timestamp": to_utc(candle[0]),
+            "open": float(candle[1]),
+            "high": float(candle[2]),
+            "low": float(candle[3]),
+            "close": float(candle[4]),
+            "volume": float(candle[5]),
+        }
+        for candle in ohlcv
+    ]
+
+
+def _dedupe(rows: Iterable[dict]) -> List[dict]:
+    """
+    Collapse duplicate keys within a batch, keeping the last occurrence.
+    ON CONFLICT cannot touch the same row twice in one statement.
+    """
+    unique = {}
+    for row in rows:
+        unique[(row["symbol"], row["exchange"], epoch_ms(row["timestamp"]))] = row
+    return list(unique.values())
+
+
+def _upsert_postgresql(db: Session, rows: List[dict]) -> UpsertResult:
+    result = UpsertResult()
+    table = CryptoPrice.__table__
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = pg_insert(table).values(rows[start : start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(CANDLE_KEY),
+            set_={name: stmt.excluded[name] for name in CANDLE_VALUES},
+            # Skip no-op rewrites so "updated" only counts candles that changed
+            where=or_(
+                *(
+                    table.c[name].is_distinct_from(stmt.excluded[name])
+                    for name in CANDLE_VALUES
+                )
+            ),
+        ).returning(literal_column("(xmax = 0)").label("inserted"))
+
+        for (inserted,) in db.execute(stmt):
+            if inserted:
+                result.inserted += 1
+            else:
+                result.updated += 1
+
+    return result
+
+
+def _upsert_generic(db: Session, rows: List[dict]) -> UpsertResult:
+    """
+    Portable path (SQLite and anything without ON CONFLICT ... RETURNING xmax):
+    one SELECT for the existing keys, one multi-row INSERT for new candles and
+    one executemany UPDATE for candles whose values changed.
+    """
+    result = UpsertResult()
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start : start + UPSERT_CHUNK_SIZE]
+        keys = [tuple(row[name] for name in CANDLE_KEY) for row in chunk]
+
+        existing = {
+            (row.symbol, row.exchange, epoch_ms(row.timestamp)): row
+            for row in db.execute(
+                select(
+                    CryptoPrice.id,
+                    *(
+                        getattr(CryptoPrice, name)
+                        for name in CANDLE_KEY + CANDLE_VALUES
+                    ),
+                ).where(
+                    tuple_(
+                        CryptoPrice.symbol, CryptoPrice.exchange, CryptoPrice.timestamp
+                    ).in_(keys)
+                )
+            )
+        }
+
+        new_rows, changed_rows = [], []
+        for row in chunk:
+            current = existing.get(
+                (row["symbol"], row["exchange"], epoch_ms(row["timestamp"]))
+            )
+            if current is None:
+                new_rows.append(row)
+            elif any(getattr(current, name) != row[name] for name in CANDLE_VALUES):
+                changed_rows.append(
+                    {"id": current.id, **{name: row[name] for name in CANDLE_VALUES}}
+                )
+
+        if new_rows:
+            db.execute(CryptoPrice.__table__.insert(), new_rows)
+        if changed_rows:
+            db.execute(update(CryptoPrice), changed_rows)
+
+        result.inserted += len(new_rows)
+        result.updated += len(changed_rows)
+
+    return result
+
+
+def upsert_candles(db: Session, rows: Iterable[dict]) -> UpsertResult:
+    """
+    Insert or update a batch of candles keyed on (symbol, exchange, timestamp).
+
+    Uses a single multi-row INSERT ... ON CONFLICT DO UPDATE on PostgreSQL and
+    a set-based SELECT + INSERT + UPDATE elsewhere. The caller owns the
+    transaction and is responsible for committing.
+    """
+    rows = _dedupe(rows)
+    if not rows:
+        return UpsertResult()
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _upsert_postgresql(db, rows)
+    return _upsert_generic(db, rows)
+
+
+def resample_query(
+    symbol: str,
+    exchange: str,
+    start: datetime,
+    seconds: int,
+    dialect: str = "postgresql",
+    criteria: Iterable = (),
+):
+    """
+    OHLCV buckets `seconds` wide: first open, max high, min low, last close
+    and summed volume. Buckets are aligned to the Unix epoch, so 1d buckets
+    start at midnight UTC. Columns are labelled like CryptoPrice's, with
+    `timestamp` being the bucket start. Extra `criteria` filter the
+    underlying candles (e.g. a keyset bound), so buckets stay whole.
+    """
+    where = (
+        CryptoPrice.symbol == symbol,
+        CryptoPrice.exchange == exchange,
+        CryptoPrice.timestamp >= start,
+        *criteria,
+    )
+    if dialect == "postgresql":
+        return _resample_postgresql(seconds, where)
+    return _resample_generic(dialect, seconds, where)
+
+
+def _resample_postgresql(seconds: int, where: tuple):
+    """One pass, with first/last picked by ordered array_agg"""
+    # Inlined rather than bound, so GROUP BY repeats the SELECT expression verbatim
+    width = literal_column(str(int(seconds)))
+    bucket = func.to_timestamp(
+        func.floor(func.extract("epoch", CryptoPrice.timestamp) / width) * width
+    ).label("timestamp")
+
+    return (
+        select(
+            bucket,
+            array_agg(
+                aggregate_order_by(CryptoPrice.open, CryptoPrice.timestamp.asc())
+            )[1].label("open"),
+            func.max(CryptoPrice.high).label("high"),
+            func.min(CryptoPrice.low).label("low"),
+            array_agg(
+                aggregate_order_by(CryptoPrice.close, CryptoPrice.timestamp.desc())
+            )[1].label("close"),
+            func.sum(CryptoPrice.volume).label("volume"),
+        )
+        .where(*where)
+        .group_by(bucket)
+    )
+
+
+def _resample_generic(dialect: str, seconds: int, where: tuple):
+    """
+    Portable form for other databases (SQLite in development): first and
+    last come from window functions over each bucket, then one row is kept
+    per bucket
+    """
+    bucket = (_epoch(dialect, CryptoPrice.timestamp) // int(seconds)) * int(seconds)
+    candles = (
+        select(
+            bucket.label("bucket"),
+            func.first_value(CryptoPrice.open)
+            .over(partition_by=bucket, order_by=CryptoPrice.timestamp.asc())
+            .label("open"),
+            CryptoPrice.high,
+            CryptoPrice.low,
+            func.first_value(CryptoPrice.close)
+            .over(partition_by=bucket, order_by=CryptoPrice.timestamp.desc())
+            .label("close"),
+            CryptoPrice.volume,
+        )
+        .where(*where)
+        .subquery()
+    )
+    return select(
+        # The expression's type is lost in the subquery; restore it for results
+        type_coerce(
+            _from_epoch(dialect, candles.c.bucket), DateTime(timezone=True)
+        ).label("timestamp"),
+        # Constant within a bucket
+        func.max(candles.c.open).label("open"),
+        func.max(candles.c.high).label("high"),
+        func.min(candles.c.low).label("low"),
+        func.max(candles.c.close).label("close"),
+        func.sum(candles.c.volume).label("volume"),
+    ).group_by(candles.c.bucket)
+
+
+def _epoch(dialect: str, column):
+    if dialect == "postgresql":
+        return func.extract("epoch", column)
+    return cast(func.strftime("%s", column), Integer)
+
+
+def _from_epoch(dialect: str, column):
+    if dialect == "postgresql":
+        return func.to_timestamp(column)
+    return func.datetime(column, "unixepoch")
+
+
+def _aware(ts: datetime) -> datetime:
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def find_gaps(
+    db: Session,
+    exchange: str,
+    symbols: Iterable[str],
+    start: datetime,
+    end: datetime,
+) -> List[Gap]:
+    """
+    Missing 1m candles per symbol in [start, end), found in one query.
+
+    Each symbol's stored timestamps are unioned with two sentinels (the
+    minute before `start` and `end` itself) and a lag() window compares
+    every row with its predecessor, so leading, interior and trailing holes,
+    and symbols with no data at all, all surface as a gap between neighbours.
+    """
+    minute = timedelta(minutes=1)
+    stamp = DateTime(timezone=True)
+    dialect = db.get_bind().dialect.name
+    symbols = list(symbols)
+    if not symbols:
+        return []
+
+    stored = select(
+        CryptoPrice.symbol.label("symbol"), CryptoPrice.timestamp.label("timestamp")
+    ).where(
+        CryptoPrice.exchange == exchange,
+        CryptoPrice.symbol.in_(symbols),
+        CryptoPrice.timestamp >= start,
+        CryptoPrice.timestamp < end,
+    )
+    sentinels = [
+        select(
+            literal(symbol, String).label("symbol"),
+            literal(bound, stamp).label("timestamp"),
+        )
+        for symbol in symbols
+        for bound in (start - minute, end)
+    ]
+    points = union_all(stored, *sentinels).subquery()
+    ordered = select(
+        points.c.symbol,
+        func.lag(points.c.timestamp)
+        .over(partition_by=points.c.symbol, order_by=points.c.timestamp)
+        .label("previous"),
+        points.c.timestamp,
+    ).subquery()
+
+    rows = db.execute(
+        # The union drops the column type on SQLite; restore it for results
+        select(
+            ordered.c.symbol,
+            type_coerce(ordered.c.previous, stamp).label("previous"),
+            type_coerce(ordered.c.timestamp, stamp).label("timestamp"),
+        )
+        .where(
+            _epoch(dialect, ordered.c.timestamp) - _epoch(dialect, ordered.c.previous)
+            > 60
+        )
+        .order_by(ordered.c.symbol, ordered.c.timestamp)
+    )
+    return [
+        Gap(row.symbol, _aware(row.previous) + minute, _aware(row.timestamp))
+        for row in rows
+    ]
+
+
+def load_cursors(
+    db: Session, exchange: str, symbols: Iterable[str]
+) -> Dict[str, datetime]:
+    """
+    Return the newest stored candle timestamp per symbol.
+
+    Symbols without a cursor row fall back to MAX(timestamp) from
+    crypto_prices, so databases populated before cursors existed resume
+    where they left off. Symbols with no data at all are omitted.
+    """
+    symbols = list(symbols)
+    cursors = {
+        row.symbol: row.last_timestamp
+        for row in db.execute(
+            select(IngestionCursor.symbol, IngestionCursor.last_timestamp).where(
+                IngestionCursor.exchange == exchange,
+                IngestionCursor.symbol.in_(symbols),
+            )
+        )
+    }
+
+    missing = [symbol for symbol in symbols if symbol not in cursors]
+    if missing:
+        cursors.update(
+            db.execute(
+                select(CryptoPrice.symbol, func.max(CryptoPrice.timestamp))
+                .where(
+                    CryptoPrice.exchange == exchange, CryptoPrice.symbol.in_(missing)
+                )
+                .group_by(CryptoPrice.symbol)
+            ).all()
+        )
+
+    return cursors
+
+
+def latest_candles(
+    db: Session, exchange: str, marks: Dict[str, datetime]
+) -> List[CryptoPrice]:
+    """
+    Newest stored candle for each symbol in `marks`, in one query.
+    `marks` holds a lower bound per symbol (e.g. the newest timestamp just
+    written) so the ranking only touches a few index entries per symbol.
+    """
+    if not marks:
+        return []
+
+    ranked = (
+        select(
+            CryptoPrice,
+            func.row_number()
+            .over(
+                partition_by=CryptoPrice.symbol, order_by=CryptoPrice.timestamp.desc()
+            )
+            .label("rank"),
+        )
+        .where(
+            CryptoPrice.exchange == exchange,
+            CryptoPrice.symbol.in_(list(marks)),
+            CryptoPrice.timestamp >= min(marks.values()),
+        )
+        .subquery()
+    )
+    latest = aliased(CryptoPrice, ranked)
+    return list(db.scalars(select(latest).where(ranked.c.rank == 1)))
+
+
+def advance_cursors(db: Session, exchange: str, marks: Dict[str, datetime]):
+    """
+    Move per-symbol high-water marks forward (never backwards) in one statement.
+    The caller owns the transaction, so cursors commit together with the candles.
+    """
+    if not marks:
+        return
+
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    greatest = func.greatest if dialect == "postgresql" else func.max
+
+    stmt = insert(IngestionCursor).values(
+        [
+            {"exchange": exchange, "symbol": symbol, "last_timestamp": ts}
+            for symbol, ts in marks.items()
+        ]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["exchange", "symbol"],
+            set_={
+                "last_timestamp": greatest(
+                    IngestionCursor.last_timestamp, stmt.excluded.last_timestamp
+                ),
+                "updated_at": func.now(),
+            },
+        )
+    )
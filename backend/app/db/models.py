@@ -1,4 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Enum
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    Text,
+    Boolean,
+    Enum,
+    Index,
+    text,
+)
 from sqlalchemy.sql import func
 import enum
 from app.db.session import Base
@@ -28,10 +39,24 @@ class SentimentEnum(str, enum.Enum):
 
 class CryptoPrice(Base):
     """Time-series price data for cryptocurrencies"""
+
     __tablename__ = "crypto_prices"
+    __table_args__ = (
+        # One candle per venue and minute; target of the bulk upsert's ON CONFLICT.
+        # Hot reads filter on (symbol, exchange) and order by timestamp DESC, which
+        # this serves as an index-only backward range scan thanks to INCLUDE.
+        Index(
+            "ix_crypto_prices_symbol_exchange_timestamp",
+            "symbol",
+            "exchange",
+            "timestamp",
+            unique=True,
+            postgresql_include=["id", "open", "high", "low", "close", "volume"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(20), nullable=False, index=True)
+    symbol = Column(String(20), nullable=False)
     exchange = Column(String(50), nullable=False)
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     open = Column(Float, nullable=False)
@@ -42,13 +67,92 @@ class CryptoPrice(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class IngestionCursor(Base):
+    """High-water mark of the newest stored candle per (exchange, symbol)"""
+
+    __tablename__ = "ingestion_cursors"
+
+    exchange = Column(String(50), primary_key=True)
+    symbol = Column(String(20), primary_key=True)
+    last_timestamp = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class BackfillCheckpoint(Base):
+    """Progress through one historical range being backfilled"""
+
+    __tablename__ = "backfill_checkpoints"
+
+    exchange = Column(String(50), primary_key=True)
+    symbol = Column(String(20), primary_key=True)
+    range_start = Column(DateTime(timezone=True), primary_key=True)
+    range_end = Column(DateTime(timezone=True), nullable=False)
+    # Everything before next_since has been fetched and written
+    next_since = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
 class Prediction(Base):
     """AI persona predictions"""
+
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Consensus and timeframe-filtered listings, newest first; id breaks
+        # created_at ties in the listings' keyset order
+        Index(
+            "ix_predictions_symbol_timeframe_created_at",
+            "symbol",
+            "timeframe",
+            "created_at",
+            "id",
+        ),
+        # Per-persona listings, newest first
+        Index(
+            "ix_predictions_symbol_persona_created_at",
+            "symbol",
+            "persona",
+            "created_at",
+            "id",
+        ),
+        # Active-only listings; expired rows drop out of the index.
+        # SQLite only matches a partial index whose WHERE appears verbatim in
+        # the query, and `is_active == True` renders as `is_active = 1` there.
+        Index(
+            "ix_predictions_active_symbol_created_at",
+            "symbol",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Consensus: newest active prediction of each persona
+        Index(
+            "ix_predictions_active_consensus",
+            "symbol",
+            "timeframe",
+            "persona",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Expiry sweep over active predictions
+        Index(
+            "ix_predictions_active_target_date",
+            "target_date",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    persona = Column(Enum(PersonaEnum), nullable=False, index=True)
-    symbol = Column(String(20), nullable=False, index=True)
+    persona = Column(Enum(PersonaEnum), nullable=False)
+    symbol = Column(String(20), nullable=False)
     direction = Column(Enum(DirectionEnum), nullable=False)
     confidence = Column(Float, nullable=False)  # 0-100
     timeframe = Column(String(20), nullable=False)  # "24h", "7d", "30d"
@@ -60,6 +164,7 @@ class Prediction(Base):
 
 class NewsArticle(Base):
     """Cryptocurrency news articles"""
+
     __tablename__ = "news_articles"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -76,6 +181,7 @@ class NewsArticle(Base):
 
 class SentimentAnalysis(Base):
     """Aggregated sentiment analysis"""
+
     __tablename__ = "sentiment_analysis"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,79 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set, Tuple
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+from app.db.models import Prediction
+
+# Rows flipped per UPDATE statement (and transaction) during expiry
+EXPIRY_CHUNK_SIZE = 5000
+
+# Predictions saved before target_date was recorded expire after this age
+LEGACY_MAX_AGE = timedelta(days=30)
+
+TIMEFRAME_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def timeframe_delta(timeframe: str) -> Optional[timedelta]:
+    """Horizon of a timeframe such as "24h", "7d" or "30d"; None if unparseable"""
+    match = re.fullmatch(r"(\d+)([mhdw])", (timeframe or "").strip().lower())
+    if match is None:
+        return None
+    return timedelta(**{TIMEFRAME_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def target_date_for(timeframe: str, start: datetime = None) -> Optional[datetime]:
+    delta = timeframe_delta(timeframe)
+    if delta is None:
+        return None
+    return (start or datetime.now(timezone.utc)) + delta
+
+
+def due_filters(now: datetime) -> list:
+    """
+    Predicates of active predictions to expire, one per sweep. Kept apart
+    rather than OR-ed so each is a range or IS NULL lookup on
+    ix_predictions_active_target_date.
+    """
+    return [
+        Prediction.target_date <= now,
+        and_(
+            Prediction.target_date.is_(None),
+            Prediction.created_at < now - LEGACY_MAX_AGE,
+        ),
+    ]
+
+
+def due_batch(due, chunk_size: int = EXPIRY_CHUNK_SIZE):
+    """Ids of at most `chunk_size` active predictions matching `due`"""
+    return (
+        select(Prediction.id).where(Prediction.is_active == True, due).limit(chunk_size)
+    )
+
+
+def expire_predictions(
+    db: Session, now: datetime = None, chunk_size: int = EXPIRY_CHUNK_SIZE
+) -> Tuple[int, Set[Tuple[str, str]]]:
+    """
+    Deactivate predictions past their target date with set-based UPDATEs of
+    at most `chunk_size` rows, committing each chunk so locks stay short.
+    Returns the number of rows expired and the (symbol, timeframe) pairs hit.
+    """
+    now = now or datetime.now(timezone.utc)
+    expired = 0
+    affected = set()
+    for due in due_filters(now):
+        while True:
+            rows = db.execute(
+                update(Prediction)
+                .where(Prediction.id.in_(due_batch(due, chunk_size).scalar_subquery()))
+                .values(is_active=False)
+                .returning(Prediction.symbol, Prediction.timeframe)
+                .execution_options(synchronize_session=False)
+            ).all()
+            db.commit()
+            expired += len(rows)
+            affected.update((row.symbol, row.timeframe) for row in rows)
+            if len(rows) < chunk_size:
+                break
+    return expired, affected
@@ -1,18 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1 import health, prices, predictions
-from app.db.session import engine, Base
+from app.core.redis import close_async_redis, init_async_redis
+from app.api.cache_middleware import ResponseCacheMiddleware
+from app.api.v1 import health, live, prices, predictions
+from app.db.session import async_engine
+from app.services.health import health_prober
+from app.services.price_stream import price_broadcaster
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared connections are created on the server's event loop
+    init_async_redis()
+    health_prober.start()
+    yield
+    await health_prober.stop()
+    await price_broadcaster.close()
+    await close_async_redis()
+    await async_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
+# Response cache for the read routes; added first so CORS wraps its output
+app.add_middleware(ResponseCacheMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -26,6 +45,7 @@ app.add_middleware(
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(prices.router, prefix="/api/v1", tags=["prices"])
 app.include_router(predictions.router, prefix="/api/v1", tags=["predictions"])
+app.include_router(live.router, prefix="/api/v1", tags=["live"])
 
 
 @app.get("/")
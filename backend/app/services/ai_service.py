@@ -1,15 +1,36 @@
-import google.generativeai as genai
 from app.core.config import settings
-from app.db.models import Prediction, PersonaEnum, DirectionEnum, CryptoPrice
+from app.db.models import Prediction, PersonaEnum, DirectionEnum
+from app.db.predictions import target_date_for
+from app.services.consensus_service import consensus_service
+from app.services.llm_cache import llm_cache
+from app.services.llm_providers import LLMProvider, get_provider
+from app.services.market_snapshot import NO_DATA, MarketSnapshot, build_snapshots
+from app.services.rate_limiter import TokenBucket
+from app.services.response_cache import PREDICTIONS, bump_generation
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, List, Optional
+import asyncio
 import logging
 import json
+import time
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
+
+class Analysis(BaseModel):
+    """Schema a persona's answer must satisfy before it is saved"""
+
+    direction: DirectionEnum
+    confidence: float = Field(ge=0, le=100)
+    timeframe: str
+    reasoning: str
+
+
+class SymbolAnalysis(Analysis):
+    """One element of a batched answer"""
+
+    symbol: str
 
 
 class AIPersona:
@@ -60,55 +81,100 @@ Be aggressive with clear momentum signals, cautious otherwise.""",
         },
     }
 
-    def __init__(self, persona: PersonaEnum):
+    def __init__(self, persona: PersonaEnum, provider: LLMProvider = None):
         self.persona = persona
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self.provider = provider or get_provider()
         self.config = self.PERSONA_PROMPTS[persona]
 
-    def get_recent_price_data(self, db: Session, symbol: str, hours: int = 24) -> str:
-        """Get recent price data formatted for AI analysis"""
-        start_time = datetime.utcnow() - timedelta(hours=hours)
+    @property
+    def model_name(self) -> str:
+        return f"{self.provider.name}:{self.provider.model_name}"
+
+    def get_recent_price_data(
+        self,
+        db: Session,
+        symbol: str,
+        hours: int = 24,
+        snapshots: Dict[str, MarketSnapshot] = None,
+    ) -> str:
+        """
+        Get recent price data formatted for AI analysis
+        Uses the run's memoized snapshots when given, else queries the symbol
+        """
+        if snapshots is None:
+            snapshots = build_snapshots(db, [symbol], hours=hours)
+        snapshot = snapshots.get(symbol)
+        return snapshot.to_prompt() if snapshot else NO_DATA
 
-        prices = (
-            db.query(CryptoPrice)
-            .filter(
-                CryptoPrice.symbol == symbol,
-                CryptoPrice.exchange == "binance",
-                CryptoPrice.timestamp >= start_time,
-            )
-            .order_by(CryptoPrice.timestamp.desc())
-            .limit(100)
-            .all()
+    async def _cached(self, snapshot: Optional[MarketSnapshot], timeframe: str):
+        """
+        Cache lookups run in a worker thread: the cache's sync Redis client,
+        unlike the async pool, survives the fresh event loop of each Celery
+        task, and the thread keeps its round trips off that loop
+        """
+        if snapshot is None:
+            return None
+        return await asyncio.to_thread(
+            llm_cache.get,
+            self.persona.value,
+            self.config["prompt"],
+            self.model_name,
+            snapshot,
+            timeframe,
         )
 
-        if not prices:
-            return "No recent price data available."
-
-        # Calculate statistics
-        latest = prices[0]
-        oldest = prices[-1]
-        price_change = ((latest.close - oldest.close) / oldest.close) * 100
-
-        high_24h = max(p.high for p in prices)
-        low_24h = min(p.low for p in prices)
-        avg_volume = sum(p.volume for p in prices) / len(prices)
-
-        return f"""
-Current Price: ${latest.close:,.2f}
-24h Change: {price_change:+.2f}%
-24h High: ${high_24h:,.2f}
-24h Low: ${low_24h:,.2f}
-24h Avg Volume: {avg_volume:,.0f}
-Current Volume: {latest.volume:,.0f}
-"""
+    async def _remember(
+        self, snapshot: Optional[MarketSnapshot], timeframe: str, analysis: dict
+    ):
+        if snapshot is not None:
+            await asyncio.to_thread(
+                llm_cache.put,
+                self.persona.value,
+                self.config["prompt"],
+                self.model_name,
+                snapshot,
+                timeframe,
+                analysis,
+            )
 
-    def analyze(self, db: Session, symbol: str, timeframe: str = "24h") -> dict:
+    async def _generate(
+        self, prompt: str, rate_limiter: TokenBucket = None, timeout: float = None
+    ):
+        """One model call in JSON response mode; returns the decoded JSON"""
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        text = await asyncio.wait_for(
+            self.provider.generate_json(prompt), timeout=timeout
+        )
+        return json.loads(text)
+
+    async def analyze(
+        self,
+        db: Session,
+        symbol: str,
+        timeframe: str = "24h",
+        snapshots: Dict[str, MarketSnapshot] = None,
+        rate_limiter: TokenBucket = None,
+        timeout: float = None,
+    ) -> Optional[dict]:
         """
         Analyze cryptocurrency and generate prediction
+        Returns None if the analysis failed, so no placeholder is recorded
         """
         try:
             # Get price data
-            price_data = self.get_recent_price_data(db, symbol)
+            if snapshots is None:
+                snapshots = build_snapshots(db, [symbol])
+            snapshot = snapshots.get(symbol)
+            price_data = snapshot.to_prompt() if snapshot else NO_DATA
+
+            # Skip the model call when this market state was already analyzed
+            cached = await self._cached(snapshot, timeframe)
+            if cached is not None:
+                logger.info(
+                    f"{self.config['name']} prediction for {symbol} served from cache"
+                )
+                return cached
 
             # Construct prompt
             prompt = f"""
@@ -125,78 +191,251 @@ Return ONLY a JSON object with the exact format:
 """
 
             # Generate prediction
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-
-            # Extract JSON from response
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
+            result = Analysis.model_validate(
+                await self._generate(prompt, rate_limiter, timeout)
+            ).model_dump(mode="json")
 
             logger.info(
                 f"{self.config['name']} prediction for {symbol}: {result['direction']} ({result['confidence']}%)"
             )
 
+            await self._remember(snapshot, timeframe, result)
             return result
 
         except Exception as e:
             logger.error(f"Error in {self.config['name']} analysis for {symbol}: {e}")
-            return {
-                "direction": "neutral",
-                "confidence": 0,
-                "timeframe": timeframe,
-                "reasoning": f"Analysis failed: {str(e)}",
-            }
-
-    def save_prediction(self, db: Session, symbol: str, analysis: dict):
-        """Save prediction to database"""
-        try:
-            prediction = Prediction(
-                persona=self.persona,
-                symbol=symbol,
-                direction=DirectionEnum(analysis["direction"]),
-                confidence=float(analysis["confidence"]),
-                timeframe=analysis["timeframe"],
-                reasoning=analysis["reasoning"],
-                is_active=True,
-            )
+            return None
+
+    async def analyze_batch(
+        self,
+        db: Session,
+        symbols: List[str],
+        timeframe: str = "24h",
+        snapshots: Dict[str, MarketSnapshot] = None,
+        rate_limiter: TokenBucket = None,
+        timeout: float = None,
+    ) -> Dict[str, dict]:
+        """
+        Analyze several cryptocurrencies with a single model call
+        Symbols missing or invalid in the answer fall back to analyze();
+        symbols whose analysis failed are left out
+        """
+        if snapshots is None:
+            snapshots = build_snapshots(db, symbols)
 
-            db.add(prediction)
-            db.commit()
+        results = {}
+        pending = []
+        cached = await asyncio.gather(
+            *(self._cached(snapshots.get(symbol), timeframe) for symbol in symbols)
+        )
+        for symbol, analysis in zip(symbols, cached):
+            if analysis is not None:
+                results[symbol] = analysis
+            else:
+                pending.append(symbol)
+
+        if pending:
+            sections = "\n".join(
+                f"""Cryptocurrency: {symbol}
+Recent Market Data:
+{snapshots[symbol].to_prompt() if symbol in snapshots else NO_DATA}"""
+                for symbol in pending
+            )
+            prompt = f"""
+{self.config['prompt']}
 
-            logger.info(f"Saved prediction for {symbol} by {self.persona.value}")
+{sections}
 
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Error saving prediction: {e}")
+Provide your analysis and prediction for each cryptocurrency above for the {timeframe} timeframe.
+Return ONLY a JSON array with one object per cryptocurrency in the exact format:
+[{{"symbol": "SYMBOL", "direction": "bullish|bearish|neutral", "confidence": 0-100, "timeframe": "{timeframe}", "reasoning": "your reasoning here"}}]
+"""
+            try:
+                items = await self._generate(prompt, rate_limiter, timeout)
+                if not isinstance(items, list):
+                    raise ValueError("expected a JSON array")
+            except Exception as e:
+                logger.error(
+                    f"Error in {self.config['name']} batch of {len(pending)} symbols: {e}"
+                )
+                items = []
+
+            for item in items:
+                try:
+                    analysis = SymbolAnalysis.model_validate(item)
+                except ValidationError as e:
+                    logger.warning(f"Invalid item in {self.config['name']} batch: {e}")
+                    continue
+                symbol = analysis.symbol.upper()
+                if symbol in pending and symbol not in results:
+                    results[symbol] = analysis.model_dump(
+                        mode="json", exclude={"symbol"}
+                    )
+                    await self._remember(
+                        snapshots.get(symbol), timeframe, results[symbol]
+                    )
+
+            missing = [symbol for symbol in pending if symbol not in results]
+            if missing:
+                logger.warning(
+                    f"{self.config['name']} batch missed {missing}; analyzing individually"
+                )
+                fallbacks = await asyncio.gather(
+                    *(
+                        self.analyze(
+                            db, symbol, timeframe, snapshots, rate_limiter, timeout
+                        )
+                        for symbol in missing
+                    )
+                )
+                results.update(
+                    (symbol, analysis)
+                    for symbol, analysis in zip(missing, fallbacks)
+                    if analysis is not None
+                )
+
+        logger.info(
+            f"{self.config['name']} analyzed {len(symbols)} symbols "
+            f"({len(symbols) - len(pending)} from cache)"
+        )
+        return results
+
+    def to_prediction(self, symbol: str, analysis: dict) -> Prediction:
+        return Prediction(
+            persona=self.persona,
+            symbol=symbol,
+            direction=DirectionEnum(analysis["direction"]),
+            confidence=float(analysis["confidence"]),
+            timeframe=analysis["timeframe"],
+            reasoning=analysis["reasoning"],
+            target_date=target_date_for(analysis["timeframe"]),
+            is_active=True,
+        )
 
 
 class AIService:
     """Service for managing all AI personas"""
 
-    def __init__(self):
+    def __init__(self, provider: LLMProvider = None):
+        self.provider = provider or get_provider()
         self.personas = [
-            AIPersona(PersonaEnum.VALUE_INVESTOR),
-            AIPersona(PersonaEnum.TECHNICAL_ANALYST),
-            AIPersona(PersonaEnum.MOMENTUM_TRADER),
+            AIPersona(PersonaEnum.VALUE_INVESTOR, self.provider),
+            AIPersona(PersonaEnum.TECHNICAL_ANALYST, self.provider),
+            AIPersona(PersonaEnum.MOMENTUM_TRADER, self.provider),
+        ]
+        # Provider quota is shared by every persona and symbol
+        self.rate_limiter = TokenBucket.per_minute(settings.GEMINI_REQUESTS_PER_MINUTE)
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self.timeout = settings.LLM_TIMEOUT
+        self.batch_size = settings.LLM_BATCH_SIZE
+
+    async def _run(
+        self,
+        db: Session,
+        persona: AIPersona,
+        symbols: List[str],
+        timeframe: str,
+        snapshots: Dict[str, MarketSnapshot],
+        semaphore: asyncio.Semaphore,
+    ) -> List[tuple]:
+        options = dict(
+            snapshots=snapshots, rate_limiter=self.rate_limiter, timeout=self.timeout
+        )
+        async with semaphore:
+            if len(symbols) == 1:
+                analyses = {
+                    symbols[0]: await persona.analyze(
+                        db, symbols[0], timeframe, **options
+                    )
+                }
+            else:
+                analyses = await persona.analyze_batch(
+                    db, symbols, timeframe, **options
+                )
+        return [
+            (persona, symbol, analysis)
+            for symbol, analysis in analyses.items()
+            if analysis is not None
         ]
 
+    def save_predictions(self, db: Session, analyses: List[tuple]) -> int:
+        """
+        Save (persona, symbol, analysis) results in one transaction, then
+        refresh each affected consensus and the response cache once
+        Returns the number of predictions saved
+        """
+        if not analyses:
+            return 0
+        try:
+            predictions = [
+                persona.to_prediction(symbol, analysis)
+                for persona, symbol, analysis in analyses
+            ]
+            db.add_all(predictions)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving {len(analyses)} predictions: {e}")
+            return 0
+
+        logger.info(f"Saved {len(predictions)} predictions")
+        for symbol, timeframe in {(p.symbol, p.timeframe) for p in predictions}:
+            consensus_service.refresh(db, symbol, timeframe)
+        bump_generation(PREDICTIONS)
+        return len(predictions)
+
+    def use_provider(self, provider: LLMProvider):
+        """Route every persona through another provider (e.g. for load tests)"""
+        self.provider = provider
+        for persona in self.personas:
+            persona.provider = provider
+
     async def analyze_all(
         self, db: Session, symbol: str, timeframe: str = "24h"
     ) -> list:
         """
         Get predictions from all AI personas
         """
-        predictions = []
+        results = await self.generate(db, [symbol], timeframe)
+        return results[symbol]
 
-        for persona in self.personas:
-            analysis = persona.analyze(db, symbol, timeframe)
-            persona.save_prediction(db, symbol, analysis)
-            predictions.append({"persona": persona.persona.value, "analysis": analysis})
+    async def generate(
+        self, db: Session, symbols: List[str], timeframe: str = "24h"
+    ) -> dict:
+        """
+        Run every persona over every symbol as one concurrent batch
+        Returns {symbol: [{"persona": ..., "analysis": ...}, ...]}
+        """
+        started = time.monotonic()
+        # One aggregate query per run, shared by every persona
+        snapshots = build_snapshots(db, symbols)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Each persona covers batch_size symbols per model call
+        size = max(self.batch_size, 1)
+        chunks = [symbols[i : i + size] for i in range(0, len(symbols), size)]
+        results = await asyncio.gather(
+            *(
+                self._run(db, persona, chunk, timeframe, snapshots, semaphore)
+                for chunk in chunks
+                for persona in self.personas
+            )
+        )
+        analyses = [result for batch in results for result in batch]
+        # One write for the whole run, after every model call has finished
+        # and off the event loop
+        await asyncio.to_thread(self.save_predictions, db, analyses)
+
+        predictions = {symbol: [] for symbol in symbols}
+        for persona, symbol, analysis in analyses:
+            predictions[symbol].append(
+                {"persona": persona.persona.value, "analysis": analysis}
+            )
 
+        logger.info(
+            f"Generated {len(analyses)} of {len(symbols) * len(self.personas)} "
+            f"predictions for {len(symbols)} symbols in "
+            f"{time.monotonic() - started:.2f}s"
+        )
         return predictions
 
 
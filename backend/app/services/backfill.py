@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.candles import Gap, candle_rows, epoch_ms, find_gaps, to_utc
+from app.db.models import BackfillCheckpoint
+from app.db.session import SessionLocal
+from app.services.exchange_adapter import CANDLE_MS, ExchangeAdapter, write_candles
+
+logger = logging.getLogger(__name__)
+
+# (symbol, range_start) identifies a checkpointed segment
+SegmentKey = Tuple[str, datetime]
+
+
+def floor_minute(ts: datetime) -> datetime:
+    return ts.replace(second=0, microsecond=0)
+
+
+def _utc(ts: datetime) -> datetime:
+    # SQLite hands back naive UTC datetimes
+    return to_utc(epoch_ms(ts))
+
+
+def _subtract(gap: Gap, done: List[Tuple[datetime, datetime]]) -> List[Gap]:
+    """Parts of `gap` not covered by any already-processed interval"""
+    pieces = [gap]
+    for start, end in done:
+        remaining = []
+        for piece in pieces:
+            if end <= piece.start or start >= piece.end:
+                remaining.append(piece)
+                continue
+            if piece.start < start:
+                remaining.append(Gap(piece.symbol, piece.start, start))
+            if end < piece.end:
+                remaining.append(Gap(piece.symbol, end, piece.end))
+        pieces = remaining
+    return pieces
+
+
+class BackfillEngine:
+    """
+    Historical 1m candle backfill for one exchange.
+
+    Missing ranges come from a single gap-detection query and are cut into
+    segments of `segment_pages` pages, each tracked by a checkpoint row.
+    Segments across all symbols are fetched in parallel, bounded by the
+    adapter's concurrency and rate limiter, with pages inside a segment
+    fetched in order. Candles are buffered and bulk-written, and each
+    checkpoint advances in the same transaction as its candles, so an
+    interrupted run resumes where it stopped and stretches the exchange has
+    no data for are not requested again. Checkpoints are merged after each
+    run, so the table holds about one row per written stretch.
+    """
+
+    def __init__(
+        self,
+        adapter: ExchangeAdapter,
+        segment_pages: int = None,
+        batch_rows: int = None,
+        retries: int = None,
+    ):
+        self.adapter = adapter
+        self.segment_minutes = (
+            segment_pages or settings.BACKFILL_SEGMENT_PAGES
+        ) * adapter.max_ohlcv_limit
+        self.batch_rows = batch_rows or settings.BACKFILL_BATCH_ROWS
+        self.retries = settings.BACKFILL_RETRIES if retries is None else retries
+        self._rows = []
+        self._progress: Dict[SegmentKey, Tuple[datetime, bool]] = {}
+        self._flush_lock = None
+        self.stats = {
+            "gaps": 0,
+            "missing_minutes": 0,
+            "segments": 0,
+            "pages": 0,
+            "candles": 0,
+            "failed_segments": 0,
+            "checkpoints_merged": 0,
+        }
+
+    def plan(
+        self, db: Session, symbols: List[str], start: datetime, end: datetime
+    ) -> List[BackfillCheckpoint]:
+        """
+        Detect gaps, drop what earlier runs already covered and create a
+        checkpoint per segment of remaining work
+        """
+        exchange = self.adapter.name
+        gaps = find_gaps(db, exchange, symbols, start, end)
+        self.stats["gaps"] = len(gaps)
+
+        done = defaultdict(list)
+        for checkpoint in db.scalars(
+            select(BackfillCheckpoint).where(
+                BackfillCheckpoint.exchange == exchange,
+                BackfillCheckpoint.symbol.in_(symbols),
+                BackfillCheckpoint.range_end > start,
+                BackfillCheckpoint.range_start < end,
+            )
+        ):
+            done[checkpoint.symbol].append(
+                (_utc(checkpoint.range_start), _utc(checkpoint.next_since))
+            )
+
+        segment = timedelta(minutes=self.segment_minutes)
+        checkpoints = []
+        for gap in gaps:
+            for piece in _subtract(gap, done[gap.symbol]):
+                self.stats["missing_minutes"] += piece.minutes
+                cursor = piece.start
+                while cursor < piece.end:
+                    checkpoints.append(
+                        BackfillCheckpoint(
+                            exchange=exchange,
+                            symbol=gap.symbol,
+                            range_start=cursor,
+                            range_end=min(cursor + segment, piece.end),
+                            next_since=cursor,
+                        )
+                    )
+                    cursor += segment
+        for checkpoint in checkpoints:
+            db.merge(checkpoint)
+        db.commit()
+        self.stats["segments"] = len(checkpoints)
+        return checkpoints
+
+    async def _fetch_page(self, market: str, since: int, limit: int) -> list:
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.adapter.fetch_ohlcv_page(
+                    market, "1m", limit=limit, since=since
+                )
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(
+                    f"Retrying {self.adapter.name} {market} page at {since}: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _run_segment(self, checkpoint: BackfillCheckpoint):
+        key = (checkpoint.symbol, checkpoint.range_start)
+        market = self.adapter.to_market(checkpoint.symbol)
+        since = epoch_ms(checkpoint.next_since)
+        end = epoch_ms(checkpoint.range_end)
+        try:
+            while since < end:
+                limit = min(self.adapter.max_ohlcv_limit, (end - since) // CANDLE_MS)
+                page = await self._fetch_page(market, since, limit)
+                self.stats["pages"] += 1
+                candles = [candle for candle in page if since <= candle[0] < end]
+                if not page or page[-1][0] >= end - CANDLE_MS or not candles:
+                    # Reached the end of the range, or the exchange has nothing
+                    # more in it (not listed yet, delisted, downtime)
+                    since = end
+                else:
+                    since = candles[-1][0] + CANDLE_MS
+                self._rows.extend(
+                    candle_rows(checkpoint.symbol, self.adapter.name, candles)
+                )
+                self._progress[key] = (to_utc(since), since >= end)
+                self.stats["candles"] += len(candles)
+                if len(self._rows) >= self.batch_rows:
+                    await self.flush()
+        except Exception as e:
+            self.stats["failed_segments"] += 1
+            logger.error(
+                f"Backfill of {self.adapter.name} {checkpoint.symbol} from "
+                f"{to_utc(since).isoformat()} failed: {e}"
+            )
+
+    async def flush(self):
+        """
+        Write buffered candles and the checkpoints they advance
+        If the write fails, both go back into the buffer for the next flush
+        and the error is raised to the segment that triggered it
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            rows, self._rows = self._rows, []
+            progress, self._progress = self._progress, {}
+            if not (rows or progress):
+                return
+            try:
+                await asyncio.to_thread(self._write, rows, progress)
+            except Exception:
+                # Progress buffered meanwhile is newer than the failed batch's
+                self._rows = rows + self._rows
+                self._progress = {**progress, **self._progress}
+                raise
+
+    def _write(self, rows: List[dict], progress: Dict[SegmentKey, tuple]):
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            for (symbol, range_start), (next_since, done) in progress.items():
+                db.execute(
+                    update(BackfillCheckpoint)
+                    .where(
+                        BackfillCheckpoint.exchange == self.adapter.name,
+                        BackfillCheckpoint.symbol == symbol,
+                        BackfillCheckpoint.range_start == range_start,
+                    )
+                    .values(next_since=next_since, completed_at=now if done else None)
+                )
+            # Historical candles never become "latest"; skip cache and push
+            write_candles(db, self.adapter.name, rows, cache=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _merge_checkpoints(self, symbols: List[str]) -> int:
+        """
+        Collapse checkpoints of a symbol whose written ranges (range_start to
+        next_since) overlap or touch into one row, e.g. a segment that failed
+        part way and the later segment that finished it. Checkpoints without
+        progress are left for plan() to reuse. Returns the rows removed.
+        """
+        db = SessionLocal()
+        try:
+            written = db.scalars(
+                select(BackfillCheckpoint)
+                .where(
+                    BackfillCheckpoint.exchange == self.adapter.name,
+                    BackfillCheckpoint.symbol.in_(symbols),
+                    BackfillCheckpoint.next_since > BackfillCheckpoint.range_start,
+                )
+                .order_by(BackfillCheckpoint.symbol, BackfillCheckpoint.range_start)
+            ).all()
+            removed = 0
+            current = None
+            for checkpoint in written:
+                if (
+                    current is None
+                    or checkpoint.symbol != current.symbol
+                    or _utc(checkpoint.range_start) > _utc(current.next_since)
+                ):
+                    current = checkpoint
+                    continue
+                current.next_since = max(
+                    _utc(current.next_since), _utc(checkpoint.next_since)
+                )
+                current.range_end = max(
+                    _utc(current.range_end), _utc(checkpoint.range_end)
+                )
+                finished = [
+                    _utc(cp.completed_at)
+                    for cp in (current, checkpoint)
+                    if cp.completed_at is not None
+                ]
+                current.completed_at = (
+                    max(finished) if current.next_since >= current.range_end else None
+                )
+                db.delete(checkpoint)
+                removed += 1
+            db.commit()
+            return removed
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error merging {self.adapter.name} checkpoints: {e}")
+            return 0
+        finally:
+            db.close()
+
+    async def run(self, symbols: List[str], start: datetime, end: datetime) -> dict:
+        """Backfill every missing 1m candle of `symbols` in [start, end)"""
+        started = time.monotonic()
+        symbols = [self.adapter.to_stored(self.adapter.to_market(s)) for s in symbols]
+        start, end = floor_minute(start), floor_minute(end)
+
+        db = SessionLocal()
+        try:
+            checkpoints = self.plan(db, symbols, start, end)
+        finally:
+            db.close()
+        logger.info(
+            f"Backfilling {self.stats['missing_minutes']} missing minutes of "
+            f"{self.adapter.name} in {len(checkpoints)} segments"
+        )
+
+        semaphore = asyncio.Semaphore(self.adapter.max_concurrency)
+
+        async def bounded(checkpoint):
+            async with semaphore:
+                await self._run_segment(checkpoint)
+
+        try:
+            await asyncio.gather(*(bounded(cp) for cp in checkpoints))
+            await self.flush()
+        finally:
+            await self.adapter.close()
+        self.stats["checkpoints_merged"] = await asyncio.to_thread(
+            self._merge_checkpoints, symbols
+        )
+
+        self.stats["seconds"] = round(time.monotonic() - started, 1)
+        logger.info(f"Backfill of {self.adapter.name} finished: {self.stats}")
+        return self.stats
@@ -0,0 +1,135 @@
+import json
+import logging
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+from app.db.models import DirectionEnum, PersonaEnum, Prediction
+
+logger = logging.getLogger(__name__)
+
+
+def latest_per_persona_query(symbol: str, timeframe: str):
+    """
+    Newest active prediction of every persona for (symbol, timeframe), one
+    query: a LIMIT 1 probe of ix_predictions_active_consensus per persona,
+    so the cost does not grow with the number of active predictions. Rows
+    come back unordered; build_consensus sorts the few winners.
+    """
+    latest = [
+        select(Prediction.id)
+        .where(
+            Prediction.symbol == symbol,
+            Prediction.timeframe == timeframe,
+            Prediction.persona == persona,
+            Prediction.is_active == True,
+        )
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+        .limit(1)
+        .scalar_subquery()
+        for persona in PersonaEnum
+    ]
+    return select(Prediction).where(Prediction.id.in_(latest))
+
+
+def prediction_to_dict(prediction: Prediction) -> dict:
+    return {
+        "id": prediction.id,
+        "persona": prediction.persona.value,
+        "symbol": prediction.symbol,
+        "direction": prediction.direction.value,
+        "confidence": prediction.confidence,
+        "timeframe": prediction.timeframe,
+        "reasoning": prediction.reasoning,
+        "created_at": prediction.created_at.isoformat(),
+        "is_active": prediction.is_active,
+    }
+
+
+def build_consensus(symbol: str, predictions: List[Prediction]) -> dict:
+    """Confidence-weighted vote over one prediction per persona"""
+    predictions = sorted(predictions, key=lambda p: (p.created_at, p.id), reverse=True)
+    counts = {direction: 0 for direction in DirectionEnum}
+    scores = {direction: 0.0 for direction in DirectionEnum}
+    for prediction in predictions:
+        counts[prediction.direction] += 1
+        scores[prediction.direction] += prediction.confidence
+
+    if predictions:
+        consensus_direction = max(scores, key=scores.get)
+        consensus_confidence = scores[consensus_direction] / len(predictions)
+    else:
+        consensus_direction = DirectionEnum.NEUTRAL
+        consensus_confidence = 0
+
+    return {
+        "symbol": symbol,
+        "consensus_direction": consensus_direction.value,
+        "consensus_confidence": consensus_confidence,
+        "bullish_count": counts[DirectionEnum.BULLISH],
+        "bearish_count": counts[DirectionEnum.BEARISH],
+        "neutral_count": counts[DirectionEnum.NEUTRAL],
+        "predictions": [prediction_to_dict(p) for p in predictions],
+    }
+
+
+class ConsensusService:
+    """
+    Consensus per (symbol, timeframe), materialized in Redis.
+
+    Writers refresh it whenever predictions change, so reads are a single
+    cache lookup; a read that misses computes it once and stores it.
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or settings.CONSENSUS_CACHE_TTL
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    @staticmethod
+    def key(symbol: str, timeframe: str) -> str:
+        return f"consensus:{symbol}:{timeframe}"
+
+    def refresh(self, db: Session, symbol: str, timeframe: str) -> dict:
+        """Recompute and store the consensus (synchronous writer path)"""
+        predictions = db.scalars(latest_per_persona_query(symbol, timeframe)).all()
+        consensus = build_consensus(symbol, predictions)
+        try:
+            get_redis().set(
+                self.key(symbol, timeframe), json.dumps(consensus), ex=self.ttl
+            )
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error storing consensus for {symbol}/{timeframe}: {e}")
+        return consensus
+
+    async def get(self, db: AsyncSession, symbol: str, timeframe: str) -> dict:
+        key = self.key(symbol, timeframe)
+        try:
+            cached = await get_async_redis().get(key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error reading consensus for {symbol}/{timeframe}: {e}")
+            cached = None
+
+        if cached is not None:
+            self.stats["hits"] += 1
+            return json.loads(cached)
+
+        self.stats["misses"] += 1
+        predictions = (
+            await db.scalars(latest_per_persona_query(symbol, timeframe))
+        ).all()
+        consensus = build_consensus(symbol, predictions)
+        try:
+            await get_async_redis().set(key, json.dumps(consensus), ex=self.ttl)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error storing consensus for {symbol}/{timeframe}: {e}")
+        return consensus
+
+
+# Singleton instance
+consensus_service = ConsensusService()
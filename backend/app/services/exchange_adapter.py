@@ -0,0 +1,439 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.db.candles import (
+    UpsertResult,
+    advance_cursors,
+    candle_rows,
+    epoch_ms,
+    latest_candles,
+    load_cursors,
+    upsert_candles,
+)
+from app.services.price_cache import latest_price_cache
+from app.services.price_stream import publish_candles
+from app.services.rate_limiter import TokenBucket
+from app.services.response_cache import PRICES, bump_generation
+
+logger = logging.getLogger(__name__)
+
+# Candles pulled for a symbol with no stored history yet
+BOOTSTRAP_LIMIT = 100
+CANDLE_MS = 60_000
+
+
+def write_candles(
+    db: Session,
+    exchange: str,
+    rows: List[dict],
+    publish: bool = True,
+    cache: bool = True,
+) -> UpsertResult:
+    """
+    Shared bulk writer for every ingestion path: one upsert for the whole
+    batch, cursors advanced in the same transaction, then the newest candle
+    per symbol written through to the latest-price cache and (optionally)
+    pushed to live subscribers. Historical loads pass cache=False to skip
+    both. The caller rolls back on error.
+    """
+    if not rows:
+        return UpsertResult()
+    marks = {}
+    for row in rows:
+        if row["symbol"] not in marks or row["timestamp"] > marks[row["symbol"]]:
+            marks[row["symbol"]] = row["timestamp"]
+
+    result = upsert_candles(db, rows)
+    advance_cursors(db, exchange, marks)
+    latest = latest_candles(db, exchange, marks) if cache else []
+    db.commit()
+    if result.written:
+        bump_generation(PRICES)
+    if latest:
+        latest_price_cache.set_many(latest)
+        if publish and result.written:
+            publish_candles(latest)
+    return result
+
+
+class ExchangeAdapter:
+    """
+    One ccxt venue behind the interface the ingestion paths use.
+
+    Each adapter owns its async client (and with it an HTTP connection pool)
+    and a token bucket sized to the venue's own limits, so venues never
+    throttle each other. Prices are stored under a venue-independent symbol
+    ("BTC"); `quote` and `ALIASES` map it to the venue's market symbol.
+    """
+
+    name = "base"  # crypto_prices.exchange
+    ccxt_id = None
+    quote = "USDT"
+    # Largest page the venue returns for candles
+    max_ohlcv_limit = 1000
+    # Cost of each call against the venue's budget; unlisted calls cost 1
+    REQUEST_WEIGHTS: Dict[str, int] = {}
+    # Stored symbol -> venue base currency, where they differ
+    ALIASES: Dict[str, str] = {}
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        weight_per_minute: int,
+        credentials: dict = None,
+        max_concurrency: int = None,
+        client_factory: Callable = None,
+    ):
+        self.symbols = [self.to_market(symbol) for symbol in symbols]
+        self.credentials = credentials or {}
+        # Builds the client instead of ccxt, e.g. SimulatedExchange in load tests
+        self.client_factory = client_factory
+        # The async client is bound to the event loop it was created on, so it
+        # is (re)built lazily per loop; markets are kept across loops.
+        self.exchange = None
+        self._loop = None
+        self._markets_lock = None
+        self._markets = None
+        # Weight-based limiter replaces ccxt's per-request throttle. It only
+        # sees this process, so it gets its share of the venue's budget.
+        self.rate_limiter = TokenBucket.per_minute(
+            weight_per_minute / max(settings.EXCHANGE_CLIENT_PROCESSES, 1)
+        )
+        self.max_concurrency = max_concurrency or settings.EXCHANGE_MAX_CONCURRENCY
+
+    def to_market(self, symbol: str) -> str:
+        """Stored symbol ("BTC") -> venue market symbol ("BTC/USDT")"""
+        if "/" in symbol:
+            return symbol
+        return f"{self.ALIASES.get(symbol, symbol)}/{self.quote}"
+
+    def to_stored(self, market: str) -> str:
+        """Venue market symbol ("BTC/USDT") -> stored symbol ("BTC")"""
+        base = market.split("/")[0]
+        for stored, alias in self.ALIASES.items():
+            if alias == base:
+                return stored
+        return base
+
+    def weight(self, call: str) -> int:
+        return self.REQUEST_WEIGHTS.get(call, 1)
+
+    def _create_client(self):
+        if self.client_factory is not None:
+            return self.client_factory()
+        # ccxt takes most of a second to import; only pay for it on first use
+        import ccxt.async_support as ccxt
+
+        return getattr(ccxt, self.ccxt_id)(
+            {**self.credentials, "enableRateLimit": False}
+        )
+
+    async def _client(self):
+        """Return the async client for the running loop, loading markets once"""
+        loop = asyncio.get_running_loop()
+        if self.exchange is None or self._loop is not loop:
+            self.exchange = self._create_client()
+            self._loop = loop
+            self._markets_lock = asyncio.Lock()
+            if self._markets:
+                self.exchange.set_markets(*self._markets)
+
+        if not self.exchange.markets:
+            async with self._markets_lock:
+                if not self.exchange.markets:
+                    await self._load_markets(self.exchange)
+
+        return self.exchange
+
+    @property
+    def markets_cache_key(self) -> str:
+        return f"exchange_markets:{self.name}"
+
+    async def _load_markets(self, exchange):
+        """
+        Load market metadata from the shared Redis copy, falling back to the
+        exchange (and refreshing the copy) when it is missing or expired
+        """
+        cached = self._cached_markets()
+        if cached is None:
+            await self.rate_limiter.acquire(self.weight("load_markets"))
+            await exchange.load_markets()
+            cached = (exchange.markets, exchange.currencies)
+            self._cache_markets(*cached)
+        else:
+            exchange.set_markets(*cached)
+        self._markets = cached
+
+    def _cached_markets(self):
+        try:
+            payload = get_redis().get(self.markets_cache_key)
+            if payload is None:
+                return None
+            data = json.loads(zlib.decompress(payload))
+            return data["markets"], data["currencies"]
+        except Exception as e:
+            logger.warning(f"Error reading cached {self.name} markets: {e}")
+            return None
+
+    def _cache_markets(self, markets: dict, currencies: dict):
+        try:
+            payload = json.dumps({"markets": markets, "currencies": currencies})
+            get_redis().set(
+                self.markets_cache_key,
+                zlib.compress(payload.encode()),
+                ex=settings.MARKETS_CACHE_TTL,
+            )
+        except Exception as e:
+            logger.warning(f"Error caching {self.name} markets: {e}")
+
+    async def close(self):
+        """Close the HTTP session of the current async client"""
+        if self.exchange is not None:
+            await self.exchange.close()
+            self.exchange = None
+            self._loop = None
+
+    async def fetch_ohlcv(
+        self, symbol: str, timeframe: str = "1m", limit: int = 100, since: int = None
+    ) -> list:
+        """
+        Fetch OHLCV (Open, High, Low, Close, Volume) data
+        If `since` (ms) is given, only candles opened at or after it are returned
+        """
+        try:
+            return await self.fetch_ohlcv_page(symbol, timeframe, limit, since)
+        except Exception as e:
+            logger.error(f"Error fetching {self.name} OHLCV for {symbol}: {e}")
+            return []
+
+    async def fetch_ohlcv_page(
+        self, symbol: str, timeframe: str = "1m", limit: int = 100, since: int = None
+    ) -> list:
+        """fetch_ohlcv that raises on failure, for callers that retry"""
+        exchange = await self._client()
+        await self.rate_limiter.acquire(self.weight("fetch_ohlcv"))
+        return await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+
+    async def fetch_ticker(self, symbol: str) -> dict:
+        """
+        Fetch current ticker information
+        """
+        try:
+            exchange = await self._client()
+            await self.rate_limiter.acquire(self.weight("fetch_ticker"))
+            return await exchange.fetch_ticker(symbol)
+        except Exception as e:
+            logger.error(f"Error fetching {self.name} ticker for {symbol}: {e}")
+            return {}
+
+    async def fetch_all_tickers(self) -> dict:
+        """
+        Fetch tickers for all tracked symbols
+        """
+        results = await self._gather(
+            self.fetch_ticker(symbol) for symbol in self.symbols
+        )
+        return {
+            symbol: ticker for symbol, ticker in zip(self.symbols, results) if ticker
+        }
+
+    async def _gather(self, coros):
+        """Run coroutines with at most max_concurrency in flight"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(bounded(coro) for coro in coros))
+
+    def _incremental_request(self, cursor) -> dict:
+        """
+        fetch_ohlcv arguments for candles newer than the stored high-water mark.
+        The cursor candle itself is re-fetched so a candle that was still open
+        on the previous run gets its final values.
+        """
+        if cursor is None:
+            return {"limit": min(BOOTSTRAP_LIMIT, self.max_ohlcv_limit)}
+        since = epoch_ms(cursor)
+        behind = (int(time.time() * 1000) - since) // CANDLE_MS + 1
+        return {
+            "since": since,
+            "limit": max(1, min(self.max_ohlcv_limit, behind + 1)),
+        }
+
+    async def fetch_updates(
+        self,
+        db: Session,
+        symbols: List[str] = None,
+        cursors: Dict[str, datetime] = None,
+    ) -> Dict[str, list]:
+        """
+        Fetch candles at or after each symbol's cursor, concurrently
+        Pass `cursors` (from load_cursors) to skip reading them through `db`
+        Returns {market symbol: ohlcv} for symbols that returned data
+        """
+        symbols = symbols or self.symbols
+        if cursors is None:
+            cursors = load_cursors(db, self.name, (self.to_stored(s) for s in symbols))
+        try:
+            results = await self._gather(
+                self.fetch_ohlcv(
+                    symbol,
+                    timeframe="1m",
+                    **self._incremental_request(cursors.get(self.to_stored(symbol))),
+                )
+                for symbol in symbols
+            )
+        finally:
+            await self.close()
+        return {symbol: ohlcv for symbol, ohlcv in zip(symbols, results) if ohlcv}
+
+    def save_candles(self, db: Session, candles: Dict[str, list]) -> UpsertResult:
+        """Write fetched candles for any number of symbols in one transaction"""
+        rows = [
+            row
+            for symbol, ohlcv in candles.items()
+            for row in candle_rows(self.to_stored(symbol), self.name, ohlcv)
+        ]
+        try:
+            result = write_candles(db, self.name, rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error saving {self.name} price data: {e}")
+            return UpsertResult()
+        logger.info(
+            f"Saved {len(rows)} {self.name} price records for {len(candles)} "
+            f"symbols ({result.inserted} inserted, {result.updated} updated)"
+        )
+        return result
+
+    async def update_price_data(
+        self, db: Session, symbols: List[str] = None
+    ) -> UpsertResult:
+        """
+        Update price data for the given (default: all tracked) symbols
+        Only candles at or after each symbol's cursor are fetched
+        """
+        started = time.monotonic()
+        candles = await self.fetch_updates(db, symbols)
+        fetched = time.monotonic() - started
+        logger.info(f"Fetched {len(candles)} {self.name} symbols in {fetched:.1f}s")
+
+        total = self.save_candles(db, candles)
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{self.name} price update: {total.inserted} inserted, "
+            f"{total.updated} updated in {elapsed:.1f}s "
+            f"({total.written / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return total
+
+
+async def ingest_all(
+    db: Session, plan: Dict[ExchangeAdapter, Optional[List[str]]]
+) -> Dict[str, UpsertResult]:
+    """
+    Fetch from every venue concurrently, then write each venue's candles with
+    one bulk upsert. Wall time tracks the slowest venue, not the sum.
+    `plan` maps adapters to the symbols to update (None for all tracked).
+    """
+    started = time.monotonic()
+    # Cursor reads are synchronous and run before each fetch's first await,
+    # so the shared session is never used concurrently
+    fetched = await asyncio.gather(
+        *(adapter.fetch_updates(db, symbols) for adapter, symbols in plan.items()),
+        return_exceptions=True,
+    )
+    results = {}
+    for adapter, candles in zip(plan, fetched):
+        if isinstance(candles, Exception):
+            logger.error(f"Error fetching {adapter.name} price data: {candles}")
+            results[adapter.name] = UpsertResult()
+            continue
+        results[adapter.name] = adapter.save_candles(db, candles)
+
+    logger.info(
+        f"Ingested {len(plan)} exchanges in {time.monotonic() - started:.1f}s: "
+        + ", ".join(f"{name} {result.written} rows" for name, result in results.items())
+    )
+    return results
+
+
+class SimulatedExchange:
+    """
+    Offline stand-in for a ccxt async client, for load tests and profiling.
+
+    Candles are derived from a hash of the symbol and minute, so repeated
+    runs see the same prices; every call sleeps `latency` seconds to model
+    the network round trip.
+    """
+
+    def __init__(self, symbols: Iterable[str], latency: float = 0.05):
+        self.latency = latency
+        self._symbols = list(symbols)
+        self.markets = None
+        self.currencies = None
+        self.calls = Counter()
+
+    async def load_markets(self):
+        self.calls["load_markets"] += 1
+        await asyncio.sleep(self.latency)
+        self.set_markets(
+            {
+                symbol: {"symbol": symbol, "base": symbol.split("/")[0]}
+                for symbol in self._symbols
+            }
+        )
+        return self.markets
+
+    def set_markets(self, markets: dict, currencies: dict = None):
+        self.markets = markets
+        self.currencies = currencies or {}
+
+    @staticmethod
+    def _price(symbol: str, minute: int) -> float:
+        digest = hashlib.sha1(f"{symbol}:{minute}".encode()).digest()
+        base = 10 + int.from_bytes(digest[:2], "big")
+        return base * (1 + (digest[2] - 128) / 10_000)
+
+    async def fetch_ohlcv(
+        self, symbol: str, timeframe: str = "1m", since: int = None, limit: int = None
+    ) -> list:
+        self.calls["fetch_ohlcv"] += 1
+        await asyncio.sleep(self.latency)
+        limit = limit or BOOTSTRAP_LIMIT
+        now = int(time.time() * 1000) // CANDLE_MS
+        first = now - limit + 1 if since is None else since // CANDLE_MS
+        candles = []
+        for minute in range(first, min(first + limit, now + 1)):
+            open_, close = self._price(symbol, minute), self._price(symbol, minute + 1)
+            candles.append(
+                [
+                    minute * CANDLE_MS,
+                    open_,
+                    max(open_, close) * 1.001,
+                    min(open_, close) * 0.999,
+                    close,
+                    float(minute % 997),
+                ]
+            )
+        return candles
+
+    async def fetch_ticker(self, symbol: str) -> dict:
+        self.calls["fetch_ticker"] += 1
+        await asyncio.sleep(self.latency)
+        now = int(time.time() * 1000) // CANDLE_MS
+        return {"symbol": symbol, "last": self._price(symbol, now + 1)}
+
+    async def close(self):
+        pass
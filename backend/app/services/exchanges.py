@@ -0,0 +1,25 @@
+from typing import List
+from app.core.config import settings
+from app.services.binance_service import binance_service
+from app.services.exchange_adapter import ExchangeAdapter
+from app.services.upbit_service import upbit_service
+
+EXCHANGES = {
+    binance_service.name: binance_service,
+    upbit_service.name: upbit_service,
+}
+
+
+def get_exchange(name: str) -> ExchangeAdapter:
+    if name not in EXCHANGES:
+        raise ValueError(f"Unknown exchange: {name}")
+    return EXCHANGES[name]
+
+
+def enabled_exchanges() -> List[ExchangeAdapter]:
+    """Adapters the scheduled ingestion covers (INGEST_EXCHANGES)"""
+    return [
+        get_exchange(name.strip())
+        for name in settings.INGEST_EXCHANGES.split(",")
+        if name.strip()
+    ]
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.redis import get_async_redis
+from app.db.session import async_engine
+
+logger = logging.getLogger(__name__)
+
+
+async def _check_database():
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_redis():
+    await get_async_redis().ping()
+
+
+class HealthProber:
+    """
+    Background prober for the API's dependencies.
+
+    Each component is checked every `interval` seconds with its own timeout
+    and the result is cached, so health endpoints answer from memory no
+    matter how often load balancers poll them. A cached result older than
+    `ttl` is refreshed inline on the next read.
+    """
+
+    CHECKS = {"database": _check_database, "redis": _check_redis}
+
+    def __init__(
+        self, interval: float = None, timeout: float = None, ttl: float = None
+    ):
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL
+        self.timeout = timeout or settings.HEALTH_CHECK_TIMEOUT
+        self.ttl = ttl or self.interval * 3
+        self.status = {}
+        self._checked = 0.0
+        self._task = None
+        self._lock = None
+
+    async def _probe(self, name: str, check) -> dict:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=self.timeout)
+            status = "healthy"
+        except asyncio.TimeoutError:
+            status = f"unhealthy: timed out after {self.timeout}s"
+        except Exception as e:
+            status = f"unhealthy: {str(e)}"
+        return {
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    async def check(self) -> dict:
+        """Probe every component concurrently and cache the results"""
+        results = await asyncio.gather(
+            *(self._probe(name, check) for name, check in self.CHECKS.items())
+        )
+        self.status = dict(zip(self.CHECKS, results))
+        self.status["checked_at"] = datetime.now(timezone.utc).isoformat()
+        self._checked = time.monotonic()
+        return self.status
+
+    async def get(self) -> dict:
+        if time.monotonic() - self._checked > self.ttl:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if time.monotonic() - self._checked > self.ttl:
+                    await self.check()
+        return self.status
+
+    def healthy(self, status: dict) -> bool:
+        return all(status[name]["status"] == "healthy" for name in self.CHECKS)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Error probing dependencies: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+health_prober = HealthProber()
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import random
+import time
+import websockets
+from app.core.config import settings
+from app.core.redis import get_async_redis, price_channel
+from app.db.candles import load_cursors, to_utc
+from app.db.session import SessionLocal
+from app.services.binance_service import BinanceService, binance_service
+from app.services.exchange_adapter import write_candles
+
+logger = logging.getLogger(__name__)
+
+# Reconnect backoff bounds in seconds
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+
+class KlineStreamIngestor:
+    """
+    Long-running ingestor for Binance 1m kline WebSocket streams.
+
+    Every kline update is published to Redis as a live tick; closed candles
+    are micro-batched and bulk-upserted into crypto_prices. After each
+    (re)connect the REST path backfills whatever was missed while offline.
+    """
+
+    def __init__(
+        self,
+        service: BinanceService = binance_service,
+        url: str = None,
+        flush_interval: float = None,
+        batch_size: int = None,
+        exchange: str = "binance",
+    ):
+        self.service = service
+        self.url = (url or settings.BINANCE_WS_URL).rstrip("/")
+        self.flush_interval = flush_interval or settings.STREAM_FLUSH_INTERVAL
+        self.batch_size = batch_size or settings.STREAM_BATCH_SIZE
+        self.exchange = exchange
+        # "BTCUSDT" (stream symbol) -> "BTC" (stored symbol)
+        self.symbol_map = {
+            symbol.replace("/", ""): service.to_stored(symbol)
+            for symbol in service.symbols
+        }
+        self._buffer = {}
+        self._stopping = asyncio.Event()
+        self.stats = {"messages": 0, "candles_written": 0, "reconnects": 0}
+
+    def stream_url(self) -> str:
+        streams = "/".join(f"{symbol.lower()}@kline_1m" for symbol in self.symbol_map)
+        return f"{self.url}/stream?streams={streams}"
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        """Consume the stream until stop() is called, reconnecting on failure"""
+        flusher = asyncio.create_task(self._flush_periodically())
+        backoff = MIN_BACKOFF
+        try:
+            while not self._stopping.is_set():
+                try:
+                    async with websockets.connect(
+                        self.stream_url(), ping_interval=20
+                    ) as ws:
+                        logger.info(f"Connected to {self.exchange} kline stream")
+                        backoff = MIN_BACKOFF
+                        # Subscribed first, so the backfill overlaps the live
+                        # stream instead of leaving a gap; upserts are idempotent.
+                        backfill = asyncio.create_task(self.backfill())
+                        try:
+                            await self._consume(ws)
+                        finally:
+                            if not backfill.done():
+                                backfill.cancel()
+                except Exception as e:
+                    logger.warning(f"Kline stream disconnected: {e}")
+
+                if self._stopping.is_set():
+                    break
+                self.stats["reconnects"] += 1
+                delay = backoff * (1 + random.random() / 2)
+                logger.info(f"Reconnecting kline stream in {delay:.1f}s")
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, MAX_BACKOFF)
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+    async def _consume(self, ws):
+        receive = asyncio.ensure_future(ws.recv())
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {receive, stopping}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if stopping in done:
+                    return
+                await self.handle_message(receive.result())
+                receive = asyncio.ensure_future(ws.recv())
+        finally:
+            receive.cancel()
+            stopping.cancel()
+
+    async def backfill(self):
+        """
+        Fill the gap since each symbol's cursor through the REST path
+        Database work runs in a worker thread so live messages keep flowing
+        """
+        try:
+            cursors = await asyncio.to_thread(self._load_cursors)
+            candles = await self.service.fetch_updates(None, cursors=cursors)
+            await asyncio.to_thread(self._save_backfill, candles)
+        except Exception as e:
+            logger.error(f"Error backfilling after reconnect: {e}")
+
+    def _load_cursors(self) -> dict:
+        db = SessionLocal()
+        try:
+            return load_cursors(db, self.service.name, self.symbol_map.values())
+        finally:
+            db.close()
+
+    def _save_backfill(self, candles: dict):
+        db = SessionLocal()
+        try:
+            self.service.save_candles(db, candles)
+        finally:
+            db.close()
+
+    async def handle_message(self, raw):
+        """Publish one kline event and buffer it if the candle has closed"""
+        self.stats["messages"] += 1
+        message = json.loads(raw)
+        event = message.get("data", message)
+        if event.get("e") != "kline":
+            return
+
+        kline = event["k"]
+        symbol = self.symbol_map.get(kline["s"])
+        if symbol is None:
+            return
+
+        tick = {
+            "exchange": self.exchange,
+            "symbol": symbol,
+            "timestamp": kline["t"],
+            "open": float(kline["o"]),
+            "high": float(kline["h"]),
+            "low": float(kline["l"]),
+            "close": float(kline["c"]),
+            "volume": float(kline["v"]),
+            "closed": bool(kline["x"]),
+            "event_time": event.get("E"),
+        }
+        await self.publish(tick)
+
+        if tick["closed"]:
+            self._buffer[(symbol, tick["timestamp"])] = tick
+            if len(self._buffer) >= self.batch_size:
+                await self.flush()
+
+    async def publish(self, tick: dict):
+        try:
+            await get_async_redis().publish(
+                price_channel(tick["exchange"], tick["symbol"]), json.dumps(tick)
+            )
+        except Exception as e:
+            logger.warning(f"Error publishing tick for {tick['symbol']}: {e}")
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered closed candles with one bulk upsert"""
+        if not self._buffer:
+            return
+        batch, self._buffer = list(self._buffer.values()), {}
+        try:
+            await asyncio.to_thread(self._write, batch)
+            self.stats["candles_written"] += len(batch)
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} streamed candles: {e}")
+            # Keep the candles for the next flush unless newer copies arrived
+            for tick in batch:
+                self._buffer.setdefault((tick["symbol"], tick["timestamp"]), tick)
+
+    def _write(self, batch: list):
+        started = time.monotonic()
+        rows = [
+            {
+                "symbol": tick["symbol"],
+                "exchange": tick["exchange"],
+                "timestamp": to_utc(tick["timestamp"]),
+                **{
+                    name: tick[name]
+                    for name in ("open", "high", "low", "close", "volume")
+                },
+            }
+            for tick in batch
+        ]
+        db = SessionLocal()
+        try:
+            # Live ticks were already published as they arrived
+            result = write_candles(db, self.exchange, rows, publish=False)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        logger.info(
+            f"Streamed {len(rows)} closed candles ({result.inserted} inserted, "
+            f"{result.updated} updated) in {time.monotonic() - started:.3f}s"
+        )
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Optional
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+from app.services.market_snapshot import MarketSnapshot
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "llm_cache:stats"
+INDEX_KEY = "llm_cache:index"
+
+
+def quantize(snapshot: MarketSnapshot, step_pct: float) -> dict:
+    """
+    Bucket a snapshot so that market noise below `step_pct` maps to the same
+    values: prices on a geometric grid, percentages on a linear one and
+    volumes by powers of two.
+    """
+    ratio = math.log1p(step_pct / 100)
+
+    def price(value: float) -> Optional[int]:
+        return round(math.log(value) / ratio) if value and value > 0 else None
+
+    def volume(value: float) -> Optional[int]:
+        return round(math.log2(value)) if value and value > 0 else None
+
+    return {
+        "price": price(snapshot.price),
+        "high": price(snapshot.high),
+        "low": price(snapshot.low),
+        "change": round(snapshot.change_pct / step_pct),
+        "avg_volume": volume(snapshot.avg_volume),
+        "current_volume": volume(snapshot.current_volume),
+    }
+
+
+def fingerprint(
+    prompt: str,
+    model: str,
+    snapshot: MarketSnapshot,
+    timeframe: str,
+    step_pct: float,
+) -> str:
+    payload = json.dumps(
+        [prompt, model, snapshot.symbol, quantize(snapshot, step_pct), timeframe],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Redis cache of persona analyses, so unchanged markets skip the model call.
+
+    Lookups try the exact fingerprint of (prompt, model, quantized snapshot,
+    timeframe) first, then reuse the persona's last fresh analysis of the
+    symbol while neither price nor 24h change has moved by more than the
+    material-change threshold since it was made. Entries expire after a TTL
+    and the least recently used fingerprints are evicted beyond max_entries.
+    Counters live in Redis so every worker contributes to the hit rate.
+    """
+
+    def __init__(
+        self,
+        ttl: int = None,
+        step_pct: float = None,
+        material_change_pct: float = None,
+        max_entries: int = None,
+        enabled: bool = None,
+    ):
+        self.enabled = settings.LLM_CACHE_ENABLED if enabled is None else enabled
+        self.ttl = ttl or settings.LLM_CACHE_TTL
+        self.step_pct = step_pct or settings.LLM_CACHE_STEP_PCT
+        self.material_change_pct = (
+            settings.LLM_MATERIAL_CHANGE_PCT
+            if material_change_pct is None
+            else material_change_pct
+        )
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+
+    @staticmethod
+    def entry_key(digest: str) -> str:
+        return f"llm_cache:{digest}"
+
+    @staticmethod
+    def last_key(persona: str, symbol: str, timeframe: str) -> str:
+        return f"llm_cache:last:{persona}:{symbol}:{timeframe}"
+
+    def is_material(self, previous: dict, snapshot: MarketSnapshot) -> bool:
+        """Whether the market moved enough since `previous` to ask again"""
+        if not previous.get("price"):
+            return True
+        moved = abs(snapshot.price - previous["price"]) / previous["price"] * 100
+        drift = abs(snapshot.change_pct - previous["change_pct"])
+        return max(moved, drift) >= self.material_change_pct
+
+    def _count(self, field: str):
+        try:
+            get_redis().hincrby(STATS_KEY, field, 1)
+        except Exception:
+            pass
+
+    def get(
+        self,
+        persona: str,
+        prompt: str,
+        model: str,
+        snapshot: MarketSnapshot,
+        timeframe: str,
+    ) -> Optional[dict]:
+        """Cached analysis for this persona and market state, if any"""
+        if not self.enabled:
+            return None
+        digest = fingerprint(prompt, model, snapshot, timeframe, self.step_pct)
+        try:
+            client = get_redis()
+            raw = client.get(self.entry_key(digest))
+            if raw is not None:
+                client.zadd(INDEX_KEY, {digest: time.time()})
+                self._count("hits")
+                return json.loads(raw)
+
+            raw = client.get(self.last_key(persona, snapshot.symbol, timeframe))
+            if raw is not None:
+                previous = json.loads(raw)
+                if previous["model"] == model and not self.is_material(
+                    previous, snapshot
+                ):
+                    self._count("reused")
+                    return previous["analysis"]
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Error reading LLM cache for {snapshot.symbol}: {e}")
+            return None
+
+        self._count("misses")
+        return None
+
+    def put(
+        self,
+        persona: str,
+        prompt: str,
+        model: str,
+        snapshot: MarketSnapshot,
+        timeframe: str,
+        analysis: dict,
+    ):
+        """Store a fresh model answer and make it the persona's reference point"""
+        if not self.enabled:
+            return
+        digest = fingerprint(prompt, model, snapshot, timeframe, self.step_pct)
+        last = {
+            "model": model,
+            "price": snapshot.price,
+            "change_pct": snapshot.change_pct,
+            "analysis": analysis,
+        }
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.set(self.entry_key(digest), json.dumps(analysis), ex=self.ttl)
+            pipe.set(
+                self.last_key(persona, snapshot.symbol, timeframe),
+                json.dumps(last),
+                ex=self.ttl,
+            )
+            pipe.zadd(INDEX_KEY, {digest: time.time()})
+            pipe.execute()
+            self.evict()
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Error writing LLM cache for {snapshot.symbol}: {e}")
+
+    def evict(self):
+        """Drop the least recently used fingerprints beyond max_entries"""
+        client = get_redis()
+        excess = client.zcard(INDEX_KEY) - self.max_entries
+        if excess <= 0:
+            return
+        stale = client.zrange(INDEX_KEY, 0, excess - 1)
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(*(self.entry_key(digest.decode()) for digest in stale))
+        pipe.zrem(INDEX_KEY, *stale)
+        pipe.execute()
+
+    async def get_stats(self) -> dict:
+        stats = {"hits": 0, "reused": 0, "misses": 0, "errors": 0}
+        try:
+            raw = await get_async_redis().hgetall(STATS_KEY)
+            stats.update({key.decode(): int(value) for key, value in raw.items()})
+        except Exception as e:
+            logger.warning(f"Error reading LLM cache stats: {e}")
+        lookups = stats["hits"] + stats["reused"] + stats["misses"]
+        served = stats["hits"] + stats["reused"]
+        return {**stats, "hit_rate": served / lookups if lookups else 0.0}
+
+
+# Singleton instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,126 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from abc import ABC, abstractmethod
+from typing import Optional
+from app.core.config import settings
+
+DIRECTIONS = ("bullish", "bearish", "neutral")
+
+
+class LLMProvider(ABC):
+    """
+    Interface the personas use to reach a model.
+
+    Implementations return the raw text of a JSON answer; parsing and schema
+    validation stay with the caller.
+    """
+
+    name = "base"
+    model_name = ""
+
+    @abstractmethod
+    async def generate_json(self, prompt: str) -> str:
+        """Send `prompt` and return the model's JSON answer as text"""
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini, configured on first use rather than at import"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = None, api_key: str = None):
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self.api_key = api_key or settings.GEMINI_API_KEY
+        self._model = None
+        self._config = None
+
+    def _client(self):
+        if self._model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+            # Ask for raw JSON instead of parsing markdown-fenced text
+            self._config = genai.GenerationConfig(response_mime_type="application/json")
+        return self._model
+
+    async def generate_json(self, prompt: str) -> str:
+        response = await self._client().generate_content_async(
+            prompt, generation_config=self._config
+        )
+        return response.text
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline stand-in for load tests and profiling.
+
+    Answers are derived from a hash of the prompt (or pinned with
+    `direction`), so the same input always yields the same prediction.
+    Latency is drawn uniformly from latency +/- jitter and a fraction
+    `error_rate` of calls raise, to exercise timeouts and fallbacks.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        latency: float = None,
+        jitter: float = None,
+        error_rate: float = None,
+        direction: Optional[str] = None,
+        seed: int = 0,
+    ):
+        self.model_name = "local"
+        self.latency = settings.LOCAL_LLM_LATENCY if latency is None else latency
+        self.jitter = settings.LOCAL_LLM_JITTER if jitter is None else jitter
+        self.error_rate = (
+            settings.LOCAL_LLM_ERROR_RATE if error_rate is None else error_rate
+        )
+        self.direction = direction or settings.LOCAL_LLM_DIRECTION or None
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def _answer(self, prompt: str, symbol: str, timeframe: str) -> dict:
+        digest = hashlib.sha256(f"{prompt}|{symbol}".encode()).digest()
+        return {
+            "symbol": symbol,
+            "direction": self.direction or DIRECTIONS[digest[0] % len(DIRECTIONS)],
+            "confidence": digest[1] % 101,
+            "timeframe": timeframe,
+            "reasoning": f"Deterministic local answer for {symbol}.",
+        }
+
+    async def generate_json(self, prompt: str) -> str:
+        self.calls += 1
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0))
+        if self._random.random() < self.error_rate:
+            raise RuntimeError("Simulated provider error")
+
+        symbols = re.findall(r"^Cryptocurrency: (\S+)", prompt, re.MULTILINE)
+        match = re.search(r"for the (\S+) timeframe", prompt)
+        timeframe = match.group(1) if match else "24h"
+        answers = [self._answer(prompt, symbol, timeframe) for symbol in symbols]
+        if "JSON array" in prompt:
+            return json.dumps(answers)
+        return json.dumps(
+            answers[0] if answers else self._answer(prompt, "", timeframe)
+        )
+
+
+PROVIDERS = {
+    GeminiProvider.name: GeminiProvider,
+    LocalProvider.name: LocalProvider,
+}
+
+
+def get_provider(name: str = None) -> LLMProvider:
+    """Build the provider selected by LLM_PROVIDER"""
+    name = name or settings.LLM_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    return PROVIDERS[name]()
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.db.models import CryptoPrice
+
+NO_DATA = "No recent price data available."
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Rolling-window statistics for one symbol, as shown to the personas"""
+
+    symbol: str
+    price: float
+    open_price: float
+    high: float
+    low: float
+    avg_volume: float
+    current_volume: float
+    candles: int
+
+    @property
+    def change_pct(self) -> float:
+        if not self.open_price:
+            return 0.0
+        return (self.price - self.open_price) / self.open_price * 100
+
+    def to_prompt(self) -> str:
+        return f"""
+Current Price: ${self.price:,.2f}
+24h Change: {self.change_pct:+.2f}%
+24h High: ${self.high:,.2f}
+24h Low: ${self.low:,.2f}
+24h Avg Volume: {self.avg_volume:,.0f}
+Current Volume: {self.current_volume:,.0f}
+"""
+
+
+def snapshot_query(symbols: List[str], exchange: str, start: datetime):
+    """
+    One aggregate pass over the window for all symbols. The first and last
+    candle of each symbol are picked with row_number() so the statement runs
+    unchanged on PostgreSQL and SQLite.
+    """
+    ranked = (
+        select(
+            CryptoPrice.symbol,
+            CryptoPrice.open,
+            CryptoPrice.high,
+            CryptoPrice.low,
+            CryptoPrice.close,
+            CryptoPrice.volume,
+            func.row_number()
+            .over(
+                partition_by=CryptoPrice.symbol,
+                order_by=CryptoPrice.timestamp.desc(),
+            )
+            .label("newest"),
+            func.row_number()
+            .over(partition_by=CryptoPrice.symbol, order_by=CryptoPrice.timestamp)
+            .label("oldest"),
+        )
+        .where(
+            CryptoPrice.symbol.in_(symbols),
+            CryptoPrice.exchange == exchange,
+            CryptoPrice.timestamp >= start,
+        )
+        .subquery()
+    )
+    return select(
+        ranked.c.symbol,
+        func.max(case((ranked.c.newest == 1, ranked.c.close))).label("price"),
+        func.max(case((ranked.c.oldest == 1, ranked.c.open))).label("open_price"),
+        func.max(ranked.c.high).label("high"),
+        func.min(ranked.c.low).label("low"),
+        func.avg(ranked.c.volume).label("avg_volume"),
+        func.max(case((ranked.c.newest == 1, ranked.c.volume))).label("current_volume"),
+        func.count().label("candles"),
+    ).group_by(ranked.c.symbol)
+
+
+def build_snapshots(
+    db: Session, symbols: List[str], exchange: str = "binance", hours: int = 24
+) -> Dict[str, MarketSnapshot]:
+    """Snapshots for every symbol with data in the last `hours`"""
+    start = datetime.utcnow() - timedelta(hours=hours)
+    return {
+        row.symbol: MarketSnapshot(**row._mapping)
+        for row in db.execute(snapshot_query(symbols, exchange, start))
+    }
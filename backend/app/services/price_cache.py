@@ -0,0 +1,142 @@
+import json
+import logging
+import time
+from typing import Iterable, Optional
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+from app.db.candles import epoch_ms
+from app.db.models import CryptoPrice
+
+logger = logging.getLogger(__name__)
+
+# Only replace the cached candle with one that is at least as new, so a late
+# writer (e.g. a backfill or a slower poll) can never move "latest" backwards.
+SET_IF_NEWER = """
+local current = redis.call('HGET', KEYS[1], 't')
+if current and tonumber(current) > tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 't', ARGV[1], 'v', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+def candle_to_dict(price: CryptoPrice) -> dict:
+    return {
+        "id": price.id,
+        "symbol": price.symbol,
+        "exchange": price.exchange,
+        "timestamp": price.timestamp.isoformat(),
+        "open": price.open,
+        "high": price.high,
+        "low": price.low,
+        "close": price.close,
+        "volume": price.volume,
+    }
+
+
+class LatestPriceCache:
+    """
+    Two-layer cache of the newest candle per (exchange, symbol).
+
+    Writers (the ingestion paths) populate Redis write-through; readers check
+    a short-lived in-process layer first, then Redis, and fall back to the
+    database only on a miss.
+    """
+
+    def __init__(self, local_ttl: float = None, redis_ttl: int = None):
+        self.local_ttl = (
+            settings.PRICE_CACHE_LOCAL_TTL if local_ttl is None else local_ttl
+        )
+        self.redis_ttl = redis_ttl or settings.PRICE_CACHE_TTL
+        self._local = {}
+        self._sync_script = None
+        self._async_script = None
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "errors": 0}
+
+    @staticmethod
+    def key(exchange: str, symbol: str) -> str:
+        return f"latest_price:{exchange}:{symbol}"
+
+    def _remember(self, key: str, candle: dict):
+        current = self._local.get(key)
+        if current is None or current[1]["timestamp"] <= candle["timestamp"]:
+            self._local[key] = (time.monotonic() + self.local_ttl, candle)
+
+    def set_many(self, prices: Iterable[CryptoPrice]):
+        """Write-through from the (synchronous) ingestion path"""
+        prices = list(prices)
+        if not prices:
+            return
+        try:
+            if self._sync_script is None:
+                self._sync_script = get_redis().register_script(SET_IF_NEWER)
+            pipe = get_redis().pipeline(transaction=False)
+            for price in prices:
+                candle = candle_to_dict(price)
+                self._sync_script(
+                    keys=[self.key(price.exchange, price.symbol)],
+                    args=[
+                        epoch_ms(price.timestamp),
+                        json.dumps(candle),
+                        self.redis_ttl,
+                    ],
+                    client=pipe,
+                )
+                self._remember(self.key(price.exchange, price.symbol), candle)
+            pipe.execute()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error writing latest prices to cache: {e}")
+
+    async def set(self, price: CryptoPrice):
+        """Populate the cache after a database fallback"""
+        candle = candle_to_dict(price)
+        key = self.key(price.exchange, price.symbol)
+        self._remember(key, candle)
+        try:
+            if self._async_script is None:
+                self._async_script = get_async_redis().register_script(SET_IF_NEWER)
+            await self._async_script(
+                keys=[key],
+                args=[epoch_ms(price.timestamp), json.dumps(candle), self.redis_ttl],
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error writing latest price for {key} to cache: {e}")
+
+    async def get(self, exchange: str, symbol: str) -> Optional[dict]:
+        key = self.key(exchange, symbol)
+
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.stats["local_hits"] += 1
+            return entry[1]
+
+        try:
+            raw = await get_async_redis().hget(key, "v")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Error reading latest price for {key} from cache: {e}")
+            raw = None
+
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["redis_hits"] += 1
+        candle = json.loads(raw)
+        self._local[key] = (time.monotonic() + self.local_ttl, candle)
+        return candle
+
+    def get_stats(self) -> dict:
+        lookups = (
+            self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        )
+        hits = lookups - self.stats["misses"]
+        return {**self.stats, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+# Singleton instance
+latest_price_cache = LatestPriceCache()
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis, price_channel
+from app.db.candles import epoch_ms
+from app.db.models import CryptoPrice
+
+logger = logging.getLogger(__name__)
+
+# 1m candles: a candle has closed once its open time is a minute old
+CANDLE_MS = 60_000
+
+
+def candle_to_tick(price: CryptoPrice) -> dict:
+    """Same message shape the kline stream ingestor publishes"""
+    timestamp = epoch_ms(price.timestamp)
+    return {
+        "exchange": price.exchange,
+        "symbol": price.symbol,
+        "timestamp": timestamp,
+        "open": price.open,
+        "high": price.high,
+        "low": price.low,
+        "close": price.close,
+        "volume": price.volume,
+        "closed": timestamp + CANDLE_MS <= time.time() * 1000,
+        "event_time": None,
+    }
+
+
+def publish_candles(prices: Iterable[CryptoPrice]):
+    """Publish freshly written candles from the (synchronous) ingestion path"""
+    prices = list(prices)
+    if not prices:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for price in prices:
+            pipe.publish(
+                price_channel(price.exchange, price.symbol),
+                json.dumps(candle_to_tick(price)),
+            )
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Error publishing {len(prices)} price updates: {e}")
+
+
+class Subscription:
+    """
+    One client's mailbox. Only the newest message per channel is kept, so a
+    slow consumer costs at most one pending update per symbol, and updates
+    are released at most once per `interval`.
+    """
+
+    def __init__(self, interval: float = None, heartbeat: float = None):
+        self.interval = settings.PRICE_PUSH_INTERVAL if interval is None else interval
+        self.heartbeat = heartbeat or settings.PRICE_PUSH_HEARTBEAT
+        self.channels: Set[str] = set()
+        self._pending: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+
+    def offer(self, channel: str, data: str):
+        if channel in self._pending:
+            self.coalesced += 1
+        self._pending[channel] = data
+        self._ready.set()
+
+    async def updates(self):
+        """Yield batches of pending messages; an empty batch is a heartbeat"""
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.heartbeat)
+            except asyncio.TimeoutError:
+                yield []
+                continue
+            self._ready.clear()
+            batch, self._pending = list(self._pending.values()), {}
+            yield batch
+            if self.interval:
+                await asyncio.sleep(self.interval)
+
+
+class PriceBroadcaster:
+    """
+    Per-worker fan-out of Redis price channels to local subscribers.
+
+    The worker holds a single pub/sub connection and subscribes to a channel
+    only while at least one local client wants it, so one published update
+    costs one Redis delivery per worker however many clients are attached.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._pubsub = None
+        self._reader = None
+        self._lock = None
+        self.stats = {"messages": 0, "deliveries": 0, "slow_disconnects": 0}
+
+    async def subscribe(self, subscription: Subscription, channels: Iterable[str]):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            new = []
+            for channel in channels:
+                if not self._subscribers[channel]:
+                    new.append(channel)
+                self._subscribers[channel].add(subscription)
+                subscription.channels.add(channel)
+            if new:
+                if self._pubsub is None:
+                    self._pubsub = get_async_redis().pubsub()
+                await self._pubsub.subscribe(*new)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+
+    async def unsubscribe(
+        self, subscription: Subscription, channels: Iterable[str] = None
+    ):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            channels = list(subscription.channels if channels is None else channels)
+            idle = []
+            for channel in channels:
+                subscription.channels.discard(channel)
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+                    idle.append(channel)
+            if idle and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*idle)
+                except Exception as e:
+                    logger.warning(f"Error unsubscribing from {idle}: {e}")
+
+    async def _read(self):
+        while True:
+            if not self._subscribers:
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Price pub/sub connection failed: {e}")
+                await asyncio.sleep(1.0)
+                await self._resubscribe()
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            channel = message["channel"].decode()
+            data = message["data"].decode()
+            self.stats["messages"] += 1
+            for subscription in list(self._subscribers.get(channel, ())):
+                subscription.offer(channel, data)
+                self.stats["deliveries"] += 1
+
+    async def _resubscribe(self):
+        async with self._lock:
+            try:
+                if self._pubsub is not None:
+                    await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = get_async_redis().pubsub()
+            if self._subscribers:
+                try:
+                    await self._pubsub.subscribe(*self._subscribers)
+                except Exception as e:
+                    logger.warning(f"Error resubscribing to price channels: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "channels": len(self._subscribers),
+            "subscribers": len(
+                {sub for subs in self._subscribers.values() for sub in subs}
+            ),
+        }
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+
+def channels_for(exchange: str, symbols: List[str]) -> List[str]:
+    return [
+        price_channel(exchange, symbol.strip().upper())
+        for symbol in symbols
+        if symbol.strip()
+    ]
+
+
+# Singleton instance
+price_broadcaster = PriceBroadcaster()
@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Weighted token bucket for asyncio callers.
+
+    Each request reserves its weight up front; if that leaves the bucket in
+    deficit the caller sleeps until the deficit has been refilled. Reserving
+    before sleeping keeps concurrent callers queued in arrival order without
+    a lock, so one bucket can be shared across event loops in the same thread.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, weight: float, burst: float = None) -> "TokenBucket":
+        """Bucket allowing `weight` units per rolling minute"""
+        return cls(capacity=burst or weight, refill_per_second=weight / 60.0)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.refill_per_second
+        )
+        self._updated = now
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, weight: float = 1):
+        """Wait until `weight` units may be spent"""
+        self._refill()
+        self._tokens -= weight
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.refill_per_second)
@@ -0,0 +1,75 @@
+import json
+import logging
+from typing import Optional
+from app.core.config import settings
+from app.core.redis import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+# Response namespaces and the data each one is derived from
+PRICES = "prices"
+PREDICTIONS = "predictions"
+
+
+def generation_key(namespace: str) -> str:
+    return f"http_cache:gen:{namespace}"
+
+
+def bump_generation(namespace: str):
+    """
+    Invalidate every cached response of a namespace (synchronous writers).
+    Old entries become unreachable and age out through their TTL.
+    """
+    try:
+        get_redis().incr(generation_key(namespace))
+    except Exception as e:
+        logger.warning(f"Error invalidating {namespace} response cache: {e}")
+
+
+class ResponseCache:
+    """
+    Redis store for rendered GET responses.
+
+    Keys embed the namespace's generation counter, so a writer bumping the
+    counter invalidates all of that namespace's responses in O(1). Bodies are
+    stored as-is next to their headers, ETag and Last-Modified.
+    """
+
+    def __init__(self, ttl: int = None, max_body: int = None):
+        self.ttl = ttl or settings.HTTP_CACHE_TTL
+        self.max_body = max_body or settings.HTTP_CACHE_MAX_BODY
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "errors": 0}
+
+    async def generation(self, namespace: str) -> int:
+        value = await get_async_redis().get(generation_key(namespace))
+        return int(value or 0)
+
+    @staticmethod
+    def key(namespace: str, generation: int, digest: str) -> str:
+        return f"http_cache:{namespace}:{generation}:{digest}"
+
+    async def get(self, key: str) -> Optional[dict]:
+        meta, body = await get_async_redis().hmget(key, "meta", "body")
+        if meta is None:
+            return None
+        return {**json.loads(meta), "body": body}
+
+    async def put(self, key: str, entry: dict):
+        if len(entry["body"]) > self.max_body:
+            return
+        meta = {name: value for name, value in entry.items() if name != "body"}
+        pipe = get_async_redis().pipeline(transaction=False)
+        pipe.hset(key, mapping={"meta": json.dumps(meta), "body": entry["body"]})
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,30 @@
+from app.core.config import settings
+from app.services.exchange_adapter import ExchangeAdapter
+
+# KRW markets of the Binance set that Upbit lists
+SYMBOLS = ["BTC", "ETH", "XRP", "SOL", "ADA", "DOGE", "AVAX", "DOT"]
+
+
+class UpbitService(ExchangeAdapter):
+    """Service for fetching cryptocurrency data from Upbit (KRW markets)"""
+
+    name = "upbit"
+    ccxt_id = "upbit"
+    quote = "KRW"
+    # Upbit returns at most 200 candles per request
+    max_ohlcv_limit = 200
+
+    def __init__(self, symbols=SYMBOLS, **kwargs):
+        super().__init__(
+            symbols,
+            weight_per_minute=settings.UPBIT_REQUESTS_PER_MINUTE,
+            credentials={
+                "apiKey": settings.UPBIT_ACCESS_KEY,
+                "secret": settings.UPBIT_SECRET_KEY,
+            },
+            **kwargs,
+        )
+
+
+# Singleton instance
+upbit_service = UpbitService()
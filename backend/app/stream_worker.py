@@ -0,0 +1,31 @@
+"""
+Streaming price ingestion entry point
+
+Run with: python -m app.stream_worker
+"""
+
+from app.services.kline_stream import KlineStreamIngestor
+import asyncio
+import logging
+import signal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    ingestor = KlineStreamIngestor()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, ingestor.stop)
+
+    logger.info(
+        f"Starting kline stream ingestion for {len(ingestor.symbol_map)} symbols..."
+    )
+    await ingestor.run()
+    logger.info(f"Kline stream ingestion stopped: {ingestor.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
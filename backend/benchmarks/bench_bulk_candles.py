@@ -0,0 +1,174 @@
+"""
+Bulk candle import/export benchmark
+
+Generates a synthetic Parquet (or CSV) file of 1m candles, then times the
+COPY-based import, a re-import of the same file (every row conflicts), and
+the streaming Parquet export, each in a fresh interpreter so its peak RSS
+is reported separately. Optionally times the row-wise upsert_candles path
+on a sample for comparison. Writes to the configured DATABASE_URL under a
+throwaway "bench-bulk-*" exchange name.
+
+Run inside the backend container:
+    python -m benchmarks.bench_bulk_candles --rows 10000000 --symbols 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from app.db.bulk import SCHEMA
+from app.db.candles import upsert_candles
+from app.db.session import SessionLocal
+
+START_MS = 1_640_995_200_000  # 2022-01-01 UTC
+
+PROBE = """
+import json, logging, resource, sys, time
+logging.disable(logging.INFO)
+from app.db.bulk import export_candles, import_candles
+from app.db.session import engine
+started = time.perf_counter()
+with engine.connect() as conn:
+    if {command!r} == "import":
+        result = import_candles(conn, {path!r}, exchange={exchange!r}, chunk_rows={chunk_rows})
+        rows = result.written
+    else:
+        rows = export_candles(conn, {path!r}, exchange={exchange!r}, chunk_rows={chunk_rows})
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "rows": rows,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def generate(path: str, rows: int, symbols: int, chunk_rows: int):
+    """Write `rows` candles spread over `symbols` symbols, chunk by chunk"""
+    per_symbol = -(-rows // symbols)
+    writer = None
+    if not path.endswith(".csv"):
+        writer = pq.ParquetWriter(path, SCHEMA.remove(1), compression="zstd")
+    sink = open(path, "wb") if writer is None else None
+    rng = np.random.default_rng(42)
+    written = 0
+    try:
+        for symbol in range(symbols):
+            for start in range(0, per_symbol, chunk_rows):
+                count = min(chunk_rows, per_symbol - start, rows - written)
+                if count <= 0:
+                    break
+                minutes = np.arange(start, start + count, dtype=np.int64)
+                close = 100 + np.cumsum(rng.normal(0, 0.1, count))
+                table = pa.table(
+                    {
+                        "symbol": pa.array([f"SYM{symbol}"] * count),
+                        "timestamp": pa.array(
+                            START_MS + minutes * 60_000, pa.timestamp("ms", tz="UTC")
+                        ),
+                        "open": close - 0.05,
+                        "high": close + 0.1,
+                        "low": close - 0.1,
+                        "close": close,
+                        "volume": rng.random(count) * 10,
+                    }
+                )
+                if writer is not None:
+                    writer.write_table(table)
+                else:
+                    pacsv.write_csv(
+                        table,
+                        sink,
+                        pacsv.WriteOptions(include_header=written == 0),
+                    )
+                written += count
+    finally:
+        if writer is not None:
+            writer.close()
+        else:
+            sink.close()
+    return written
+
+
+def probe(command: str, path: str, exchange: str, chunk_rows: int) -> dict:
+    code = PROBE.format(
+        command=command, path=path, exchange=exchange, chunk_rows=chunk_rows
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def baseline(path: str, exchange: str, sample: int) -> float:
+    """Rows/s of the multi-row INSERT ... ON CONFLICT path on the first rows"""
+    table = pq.ParquetFile(path).read_row_group(0) if path.endswith("parquet") else None
+    if table is None:
+        table = pacsv.read_csv(path)
+    rows = table.slice(0, sample).to_pylist()
+    for row in rows:
+        row["exchange"] = f"{exchange}-rows"
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(rows), 50_000):
+            upsert_candles(db, rows[start : start + 50_000])
+            db.commit()
+        return len(rows) / (time.perf_counter() - started)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--baseline-rows", type=int, default=100_000)
+    parser.add_argument("--dir", default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    exchange = f"bench-bulk-{int(time.time())}"
+    source = os.path.join(args.dir, f"{exchange}.{args.format}")
+    export = os.path.join(args.dir, f"{exchange}-export.parquet")
+
+    started = time.perf_counter()
+    generated = generate(source, args.rows, args.symbols, args.chunk_rows)
+    print(
+        f"generated {generated} rows ({os.path.getsize(source) / 1e6:.0f} MB "
+        f"{args.format}) in {time.perf_counter() - started:.1f}s"
+    )
+
+    print(f"{'phase':<10} {'rows':>10} {'seconds':>8} {'rows/s':>10} {'rss MB':>7}")
+    try:
+        for phase, command, path in (
+            ("import", "import", source),
+            ("reimport", "import", source),
+            ("export", "export", export),
+        ):
+            result = probe(command, path, exchange, args.chunk_rows)
+            rows = result["rows"] if phase != "reimport" else generated
+            print(
+                f"{phase:<10} {result['rows']:>10} {result['seconds']:>8.1f} "
+                f"{rows / result['seconds']:>10.0f} {result['rss_mb']:>7.0f}"
+            )
+        if args.baseline_rows:
+            rate = baseline(source, exchange, args.baseline_rows)
+            print(
+                f"upsert_candles baseline on {args.baseline_rows} rows: {rate:.0f} rows/s"
+            )
+    finally:
+        for path in (source, export):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
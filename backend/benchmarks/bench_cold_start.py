@@ -0,0 +1,89 @@
+"""
+Cold-start benchmark for the API and Celery entry points
+
+Imports each module in a fresh interpreter and reports wall time, peak RSS
+and which heavy dependencies were pulled in. Exits non-zero when a budget is
+exceeded or a module that should load lazily (ccxt, the Gemini SDK, the ML
+stack) is imported at startup, so it can gate CI.
+
+Run inside the backend container:
+    python -m benchmarks.bench_cold_start --runs 5 --max-seconds 3 --max-rss-mb 200
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = ["app.main", "app.celery_worker"]
+
+# Must not be imported until a request or task actually needs them
+LAZY_MODULES = [
+    "ccxt",
+    "google.generativeai",
+    "torch",
+    "transformers",
+    "langchain",
+    "vaderSentiment",
+]
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in {lazy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Import `module` in a clean interpreter and return its probe result"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy=LAZY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=3.0)
+    parser.add_argument("--max-rss-mb", type=float, default=200.0)
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<22} {'median s':>9} {'max s':>7} {'rss MB':>8}  eager")
+    for module in args.modules:
+        results = [measure(module) for _ in range(args.runs)]
+        seconds = [result["seconds"] for result in results]
+        rss = max(result["rss_mb"] for result in results)
+        loaded = sorted({name for result in results for name in result["loaded"]})
+        median = statistics.median(seconds)
+        print(
+            f"{module:<22} {median:>9.3f} {max(seconds):>7.3f} {rss:>8.1f}  "
+            f"{', '.join(loaded) or '-'}"
+        )
+
+        if median > args.max_seconds:
+            failures.append(f"{module}: {median:.2f}s > {args.max_seconds}s")
+        if rss > args.max_rss_mb:
+            failures.append(f"{module}: {rss:.0f} MB > {args.max_rss_mb} MB")
+        if loaded:
+            failures.append(f"{module}: imported {', '.join(loaded)} at startup")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
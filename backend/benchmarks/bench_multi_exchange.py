@@ -0,0 +1,83 @@
+"""
+Multi-exchange ingestion benchmark
+
+Ingests synthetic venues backed by SimulatedExchange clients, first one
+venue after another and then concurrently through ingest_all, and reports
+wall time and rows written. With per-venue clients and limiters the
+concurrent run should track the slowest venue rather than the sum, and
+adding symbols should cost little as long as the rate limit is not hit.
+Writes to the configured DATABASE_URL under throwaway "bench-*" exchange names.
+
+Run inside the backend container:
+    python -m benchmarks.bench_multi_exchange --exchanges 1 3 5 --symbols 10 100
+"""
+
+import argparse
+import asyncio
+import time
+from app.db.session import SessionLocal
+from app.services.exchange_adapter import ExchangeAdapter, SimulatedExchange, ingest_all
+
+
+def make_adapters(run: str, exchanges: int, symbols: int, args) -> list:
+    adapters = []
+    for i in range(exchanges):
+        names = [f"SYM{n}" for n in range(symbols)]
+        adapter = ExchangeAdapter(
+            names,
+            weight_per_minute=args.rpm,
+            max_concurrency=args.concurrency,
+            client_factory=lambda names=names: SimulatedExchange(
+                [f"{name}/USDT" for name in names], latency=args.latency
+            ),
+        )
+        adapter.name = f"bench-{run}-{i}"
+        adapters.append(adapter)
+    return adapters
+
+
+async def sequential(db, adapters) -> int:
+    written = 0
+    for adapter in adapters:
+        written += (await adapter.update_price_data(db)).written
+    return written
+
+
+async def concurrent(db, adapters) -> int:
+    results = await ingest_all(db, {adapter: None for adapter in adapters})
+    return sum(result.written for result in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--exchanges", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--symbols", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rpm", type=int, default=6000)
+    args = parser.parse_args()
+
+    print(f"{'exchanges':>9} {'symbols':>7} {'mode':>10} {'seconds':>8} {'rows':>7}")
+    db = SessionLocal()
+    try:
+        for exchanges in args.exchanges:
+            for symbols in args.symbols:
+                for mode, run in (
+                    ("sequential", sequential),
+                    ("concurrent", concurrent),
+                ):
+                    tag = f"{int(time.time())}-{mode[0]}{exchanges}x{symbols}"
+                    adapters = make_adapters(tag, exchanges, symbols, args)
+                    started = time.perf_counter()
+                    written = asyncio.run(run(db, adapters))
+                    elapsed = time.perf_counter() - started
+                    print(
+                        f"{exchanges:>9} {symbols:>7} {mode:>10} "
+                        f"{elapsed:>8.2f} {written:>7}"
+                    )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Load benchmark for the prediction pipeline
+
+Drives the generate_predictions task over synthetic symbols with the local
+LLM provider, so concurrency, batching and caching changes can be measured
+without the live API. Reports throughput, provider call latency p50/p99 and
+prediction write rates against the configured DATABASE_URL and REDIS_URL.
+
+Run inside the backend container:
+    python -m benchmarks.bench_prediction_pipeline --symbols 300 --latency 0.8
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+from sqlalchemy import func, select
+from app.celery_worker import generate_predictions
+from app.db.candles import upsert_candles
+from app.db.models import Prediction
+from app.db.session import SessionLocal
+from app.services.ai_service import ai_service
+from app.services.llm_cache import llm_cache
+from app.services.llm_providers import LocalProvider
+from app.services.rate_limiter import TokenBucket
+
+
+class TimedProvider(LocalProvider):
+    """Local provider that records the duration of every call"""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.durations = []
+
+    async def generate_json(self, prompt: str) -> str:
+        started = time.perf_counter()
+        try:
+            return await super().generate_json(prompt)
+        finally:
+            self.durations.append(time.perf_counter() - started)
+
+
+def percentile(values: List[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def seed_candles(symbols: List[str], minutes: int):
+    """Give every symbol `minutes` of 1m history so snapshots are non-empty"""
+    end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    db = SessionLocal()
+    try:
+        for symbol in symbols:
+            rows = [
+                {
+                    "symbol": symbol,
+                    "exchange": "binance",
+                    "timestamp": end - timedelta(minutes=i),
+                    "open": 100.0 + i % 7,
+                    "high": 101.0 + i % 7,
+                    "low": 99.0 + i % 7,
+                    "close": 100.5 + i % 7,
+                    "volume": 10.0 + i % 11,
+                }
+                for i in range(minutes)
+            ]
+            upsert_candles(db, rows)
+        db.commit()
+    finally:
+        db.close()
+
+
+def count_predictions(symbols: List[str]) -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(
+            select(func.count(Prediction.id)).where(Prediction.symbol.in_(symbols))
+        )
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument(
+        "--rpm", type=int, default=100000, help="Provider rate limit (calls/minute)"
+    )
+    parser.add_argument("--seed-minutes", type=int, default=60)
+    parser.add_argument(
+        "--cache", action="store_true", help="Keep the LLM response cache enabled"
+    )
+    args = parser.parse_args()
+
+    symbols = [f"BENCH{i:04d}" for i in range(args.symbols)]
+    if args.seed_minutes:
+        seed_candles(symbols, args.seed_minutes)
+
+    provider = TimedProvider(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate
+    )
+    ai_service.use_provider(provider)
+    ai_service.rate_limiter = TokenBucket.per_minute(args.rpm)
+    if args.concurrency:
+        ai_service.max_concurrency = args.concurrency
+    if args.batch_size:
+        ai_service.batch_size = args.batch_size
+    llm_cache.enabled = args.cache
+
+    # One write per generate() run, so one duration per subtask
+    save_durations = []
+    save_predictions = ai_service.save_predictions
+
+    def timed_save(db, analyses):
+        started = time.perf_counter()
+        saved = save_predictions(db, analyses)
+        save_durations.append(time.perf_counter() - started)
+        return saved
+
+    ai_service.save_predictions = timed_save
+
+    before = count_predictions(symbols)
+    started = time.perf_counter()
+    generate_predictions(symbols)
+    elapsed = time.perf_counter() - started
+    written = count_predictions(symbols) - before
+
+    calls = provider.durations
+    print(
+        f"{len(symbols)} symbols x {len(ai_service.personas)} personas "
+        f"(concurrency {ai_service.max_concurrency}, batch {ai_service.batch_size})"
+    )
+    print(f"  wall time        {elapsed:10.2f} s")
+    print(
+        f"  predictions/s    {len(symbols) * len(ai_service.personas) / elapsed:10.1f}"
+    )
+    print(f"  provider calls   {len(calls):10d}")
+    print(
+        f"  call p50 / p99   {percentile(calls, 50) * 1000:8.0f} / "
+        f"{percentile(calls, 99) * 1000:.0f} ms"
+    )
+    print(f"  rows written     {written:10d}")
+    print(f"  writes/s         {written / elapsed:10.1f}")
+    print(
+        f"  save p50 / p99   {percentile(save_durations, 50) * 1000:8.1f} / "
+        f"{percentile(save_durations, 99) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Serialization benchmark for GET /prices/{symbol}
+
+Compares the row path (ORM objects -> PriceResponse list -> JSON) with the
+columnar JSON, msgpack and Arrow IPC encodings on synthetic candles.
+
+Run inside the backend container:
+    python -m benchmarks.bench_price_serialization --rows 1000 10000 100000
+"""
+
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.api.formats import ARROW, MSGPACK, columnar_response, to_columns
+from app.api.v1.prices import PriceResponse
+from app.db.models import CryptoPrice
+
+Row = namedtuple("Row", "id timestamp open high low close volume")
+
+
+def make_rows(count: int) -> List[Row]:
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        Row(
+            i,
+            start + timedelta(minutes=i),
+            42000.0 + i,
+            42010.5 + i,
+            41990.25 + i,
+            42005.75 + i,
+            12.345 + i,
+        )
+        for i in range(count)
+    ]
+
+
+def row_path(rows: List[Row]) -> bytes:
+    # What the endpoint did before: hydrate ORM objects, validate each one
+    # through the response model and dump a list of JSON objects
+    prices = [
+        CryptoPrice(symbol="BTC", exchange="binance", **row._asdict()) for row in rows
+    ]
+    models = TypeAdapter(List[PriceResponse]).validate_python(
+        prices, from_attributes=True
+    )
+    return json.dumps(jsonable_encoder(models)).encode()
+
+
+def columnar_path(media_type):
+    meta = {"symbol": "BTC", "exchange": "binance", "interval": "1m"}
+
+    def encode(rows: List[Row]) -> bytes:
+        return columnar_response(meta, to_columns(rows), media_type).body
+
+    return encode
+
+
+PATHS = {
+    "rows (json)": row_path,
+    "columnar (json)": columnar_path(None),
+    "columnar (msgpack)": columnar_path(MSGPACK),
+    "columnar (arrow)": columnar_path(ARROW),
+}
+
+
+def measure(encode, rows, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = encode(rows)
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>8}  {'encoding':<20} {'time (ms)':>10} {'bytes':>12} {'vs rows':>8}"
+    )
+    for count in args.rows:
+        rows = make_rows(count)
+        baseline = None
+        for name, encode in PATHS.items():
+            elapsed, size = measure(encode, rows, args.repeat)
+            baseline = baseline or elapsed
+            print(
+                f"{count:>8}  {name:<20} {elapsed * 1000:>10.2f} {size:>12,} "
+                f"{baseline / elapsed:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import threading
+import pytest
+from sqlalchemy import func, select
+from app.db.models import PersonaEnum, Prediction
+from app.services.ai_service import AIPersona, AIService
+from app.services.consensus_service import consensus_service
+from app.services.llm_providers import LLMProvider, LocalProvider
+
+SYMBOLS = ["BTC", "ETH"]
+
+
+class FlakyProvider(LLMProvider):
+    """Answers bearish, except that one persona's calls always fail"""
+
+    name = "flaky"
+    model_name = "flaky"
+
+    def __init__(self, failing_style: str):
+        self.failing_style = failing_style
+        self.local = LocalProvider(latency=0, jitter=0, direction="bearish")
+
+    async def generate_json(self, prompt: str) -> str:
+        if self.failing_style in prompt:
+            raise TimeoutError("model did not answer")
+        return await self.local.generate_json(prompt)
+
+
+class BatchProvider(LLMProvider):
+    """Answers batch prompts with `answer(items)`; single prompts normally"""
+
+    name = "batch"
+    model_name = "batch"
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.local = LocalProvider(latency=0, jitter=0, direction="bullish")
+        self.prompts = {"batch": 0, "single": 0}
+
+    async def generate_json(self, prompt: str) -> str:
+        text = await self.local.generate_json(prompt)
+        if "JSON array" not in prompt:
+            self.prompts["single"] += 1
+            return text
+        self.prompts["batch"] += 1
+        return self.answer(json.loads(text))
+
+
+def service(provider: LLMProvider, batch_size: int = 1) -> AIService:
+    ai = AIService(provider)
+    ai.batch_size = batch_size
+    return ai
+
+
+def stored(db) -> dict:
+    return dict(
+        db.execute(
+            select(Prediction.persona, func.count()).group_by(Prediction.persona)
+        ).all()
+    )
+
+
+async def test_failed_analyses_are_not_saved(db):
+    bullish = LocalProvider(latency=0, jitter=0, direction="bullish")
+    await service(bullish).generate(db, SYMBOLS)
+
+    results = await service(FlakyProvider("Warren Buffett")).generate(db, SYMBOLS)
+
+    # The failed persona is missing from the results and from the table
+    assert {r["persona"] for r in results["BTC"]} == {
+        PersonaEnum.TECHNICAL_ANALYST.value,
+        PersonaEnum.MOMENTUM_TRADER.value,
+    }
+    db.expire_all()
+    assert stored(db) == {
+        PersonaEnum.VALUE_INVESTOR: 2,
+        PersonaEnum.TECHNICAL_ANALYST: 4,
+        PersonaEnum.MOMENTUM_TRADER: 4,
+    }
+    assert not db.scalar(
+        select(func.count()).where(Prediction.reasoning.like("Analysis failed%"))
+    )
+    # Consensus keeps the persona's last real vote
+    consensus = json.loads(
+        json.dumps(consensus_service.refresh(db, "BTC", "24h"), default=str)
+    )
+    votes = {p["persona"]: p["direction"] for p in consensus["predictions"]}
+    assert votes == {
+        PersonaEnum.VALUE_INVESTOR.value: "bullish",
+        PersonaEnum.TECHNICAL_ANALYST.value: "bearish",
+        PersonaEnum.MOMENTUM_TRADER.value: "bearish",
+    }
+
+
+@pytest.mark.parametrize("batch_size", [1, len(SYMBOLS)])
+async def test_run_is_written_once_after_every_call(db, batch_size):
+    provider = LocalProvider(latency=0.01, jitter=0)
+    ai = service(provider, batch_size)
+    saves = []
+    save_predictions = ai.save_predictions
+
+    def recording_save(session, analyses):
+        saves.append((threading.current_thread(), provider.calls, len(analyses)))
+        return save_predictions(session, analyses)
+
+    ai.save_predictions = recording_save
+
+    await ai.generate(db, SYMBOLS)
+
+    calls = len(ai.personas) * len(SYMBOLS) // batch_size
+    assert saves == [(saves[0][0], calls, len(ai.personas) * len(SYMBOLS))]
+    # Written from a worker thread, not the event loop's
+    assert saves[0][0] is not threading.main_thread()
+    assert sum(stored(db).values()) == len(ai.personas) * len(SYMBOLS)
+
+
+BATCH_ANSWERS = {
+    "not JSON": (lambda items: "Sure! Here is my analysis:", SYMBOLS),
+    "an object, not an array": (lambda items: json.dumps(items[0]), SYMBOLS),
+    "a symbol left out": (lambda items: json.dumps(items[:1]), SYMBOLS[1:]),
+    "an invalid item": (
+        lambda items: json.dumps([items[0], {**items[1], "confidence": 250}]),
+        SYMBOLS[1:],
+    ),
+}
+
+
+@pytest.mark.parametrize("case", BATCH_ANSWERS)
+async def test_bad_batch_answers_fall_back_to_single_calls(case):
+    answer, retried = BATCH_ANSWERS[case]
+    provider = BatchProvider(answer)
+    persona = AIPersona(PersonaEnum.TECHNICAL_ANALYST, provider)
+
+    results = await persona.analyze_batch(None, SYMBOLS, snapshots={})
+
+    assert sorted(results) == SYMBOLS
+    assert all(result["direction"] == "bullish" for result in results.values())
+    assert provider.prompts == {"batch": 1, "single": len(retried)}
+
+
+async def test_symbol_failing_alone_too_is_left_out():
+    provider = BatchProvider(lambda items: "not JSON")
+    # Single calls fail as well, e.g. the model is down
+    provider.local.error_rate = 1.0
+    persona = AIPersona(PersonaEnum.TECHNICAL_ANALYST, provider)
+
+    assert await persona.analyze_batch(None, SYMBOLS, snapshots={}) == {}
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from app.db.candles import find_gaps
+from app.db.models import BackfillCheckpoint
+from app.services.backfill import BackfillEngine, _utc, floor_minute
+from app.services.binance_service import BinanceService
+from app.services.exchange_adapter import SimulatedExchange
+
+SYMBOLS = ["BTC", "ETH"]
+PAGE = 100
+
+END = floor_minute(datetime.now(timezone.utc)) - timedelta(hours=2)
+START = END - timedelta(hours=8)
+
+
+@pytest.fixture
+def adapter():
+    service = BinanceService(symbols=SYMBOLS)
+    markets = service.symbols
+    service.client_factory = lambda: SimulatedExchange(markets, latency=0)
+    # Small pages, so one run spans many segments and flushes
+    service.max_ohlcv_limit = PAGE
+    return service
+
+
+def make_engine(adapter, monkeypatch, failures: int, segment_pages: int = 1):
+    """An engine whose first `failures` bulk writes raise"""
+    engine = BackfillEngine(
+        adapter, segment_pages=segment_pages, batch_rows=150, retries=0
+    )
+    write = engine._write
+    calls = {"writes": 0}
+
+    def failing_write(rows, progress):
+        calls["writes"] += 1
+        if calls["writes"] <= failures:
+            raise RuntimeError("connection to the database was lost")
+        write(rows, progress)
+
+    monkeypatch.setattr(engine, "_write", failing_write)
+    return engine
+
+
+def missing_minutes(db) -> int:
+    return sum(gap.minutes for gap in find_gaps(db, "binance", SYMBOLS, START, END))
+
+
+def checkpoints(db) -> list:
+    db.expire_all()
+    return db.scalars(
+        select(BackfillCheckpoint).order_by(
+            BackfillCheckpoint.symbol, BackfillCheckpoint.range_start
+        )
+    ).all()
+
+
+async def test_failed_write_is_retried_by_the_next_flush(db, adapter, monkeypatch):
+    engine = make_engine(adapter, monkeypatch, failures=1)
+
+    stats = await engine.run(SYMBOLS, START, END)
+
+    assert stats["failed_segments"] == 1
+    # The failed batch went back into the buffer and a later flush wrote it
+    assert missing_minutes(db) == 0
+    # Completed segments merge into one checkpoint per symbol
+    assert [
+        (cp.symbol, _utc(cp.range_start), _utc(cp.range_end)) for cp in checkpoints(db)
+    ] == [(symbol, START, END) for symbol in SYMBOLS]
+    assert stats["checkpoints_merged"] == stats["segments"] - len(SYMBOLS)
+
+
+async def test_failed_segment_leaves_its_gap_for_the_next_run(db, adapter, monkeypatch):
+    # Three pages per segment, so the failing segment stops part way through
+    engine = make_engine(adapter, monkeypatch, failures=1, segment_pages=3)
+
+    stats = await engine.run(SYMBOLS, START, END)
+
+    assert stats["failed_segments"] == 1
+    missing = missing_minutes(db)
+    assert 0 < missing < stats["missing_minutes"]
+    # Exactly the range past the failed segment's checkpoint is missing
+    pending = [cp for cp in checkpoints(db) if cp.completed_at is None]
+    assert len(pending) == 1
+    assert missing == (_utc(pending[0].range_end) - _utc(pending[0].next_since)) // (
+        timedelta(minutes=1)
+    )
+
+    rerun = await BackfillEngine(adapter, segment_pages=3, retries=0).run(
+        SYMBOLS, START, END
+    )
+
+    assert rerun["missing_minutes"] == missing
+    assert missing_minutes(db) == 0
+    # The resumed tail merges with the segment that failed part way
+    assert [(cp.symbol, cp.completed_at is not None) for cp in checkpoints(db)] == [
+        (symbol, True) for symbol in SYMBOLS
+    ]
+
+
+async def test_unwritten_candles_are_never_checkpointed(db, adapter, monkeypatch):
+    engine = make_engine(adapter, monkeypatch, failures=1_000_000)
+
+    with pytest.raises(RuntimeError):
+        await engine.run(SYMBOLS, START, END)
+
+    assert missing_minutes(db) == engine.stats["missing_minutes"]
+    assert all(
+        _utc(cp.next_since) == _utc(cp.range_start) and cp.completed_at is None
+        for cp in checkpoints(db)
+    )
+
+    await BackfillEngine(adapter, retries=0).run(SYMBOLS, START, END)
+
+    assert missing_minutes(db) == 0
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import select
+from app.db.bulk import COLUMNS, export_candles, import_candles, normalize
+from app.db.candles import epoch_ms
+from app.db.models import CryptoPrice, IngestionCursor
+from app.db.session import engine
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HEADER = ",".join(COLUMNS)
+
+
+def candle_line(symbol: str, minute: int, close: float = 100.0) -> str:
+    timestamp = (START + timedelta(minutes=minute)).isoformat()
+    return f"{symbol},binance,{timestamp},100.0,101.0,99.0,{close},1.0"
+
+
+def write(path, lines: list) -> str:
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def run_import(path: str, **kwargs):
+    with engine.connect() as conn:
+        return import_candles(conn, path, **kwargs)
+
+
+def closes(db) -> dict:
+    db.expire_all()
+    return {
+        (price.symbol, price.timestamp.replace(tzinfo=timezone.utc)): price.close
+        for price in db.scalars(select(CryptoPrice))
+    }
+
+
+def cursors(db) -> dict:
+    return {
+        (cursor.symbol, cursor.exchange): cursor.last_timestamp.replace(
+            tzinfo=timezone.utc
+        )
+        for cursor in db.scalars(select(IngestionCursor))
+    }
+
+
+def test_import_keeps_the_last_duplicate_and_updates_changes(db, tmp_path):
+    path = write(
+        tmp_path / "candles.csv",
+        [
+            HEADER,
+            candle_line("btc", 0, close=1.0),
+            candle_line("BTC", 1),
+            candle_line("BTC", 0, close=2.0),
+            candle_line("ETH", 0),
+        ],
+    )
+
+    result = run_import(path, chunk_rows=2)
+
+    assert (result.inserted, result.updated) == (3, 0)
+    assert closes(db) == {
+        ("BTC", START): 2.0,
+        ("BTC", START + timedelta(minutes=1)): 100.0,
+        ("ETH", START): 100.0,
+    }
+    assert cursors(db) == {
+        ("BTC", "binance"): START + timedelta(minutes=1),
+        ("ETH", "binance"): START,
+    }
+
+    changed = write(
+        tmp_path / "changed.csv",
+        [HEADER, candle_line("BTC", 0, close=3.0), candle_line("ETH", 0)],
+    )
+    result = run_import(changed)
+
+    # Only the candle whose values differ counts as updated
+    assert (result.inserted, result.updated) == (0, 1)
+    assert closes(db)[("BTC", START)] == 3.0
+
+
+def test_import_can_keep_existing_candles(db, tmp_path):
+    run_import(write(tmp_path / "first.csv", [HEADER, candle_line("BTC", 0)]))
+    path = write(
+        tmp_path / "second.csv",
+        [HEADER, candle_line("BTC", 0, close=5.0), candle_line("BTC", 1, close=5.0)],
+    )
+
+    result = run_import(path, update_existing=False)
+
+    assert (result.inserted, result.updated) == (1, 0)
+    assert closes(db) == {
+        ("BTC", START): 100.0,
+        ("BTC", START + timedelta(minutes=1)): 5.0,
+    }
+
+
+def test_import_epoch_milliseconds_with_defaults(db, tmp_path):
+    path = write(
+        tmp_path / "klines.csv",
+        [
+            "timestamp,open,high,low,close,volume",
+            *(
+                f"{epoch_ms(START + timedelta(minutes=minute))},1,2,0.5,1.5,10"
+                for minute in range(3)
+            ),
+        ],
+    )
+
+    result = run_import(path, exchange="upbit", symbol="sol")
+
+    assert result.inserted == 3
+    assert cursors(db) == {("SOL", "upbit"): START + timedelta(minutes=2)}
+
+
+def test_export_round_trips_through_parquet(db, tmp_path):
+    run_import(
+        write(
+            tmp_path / "candles.csv",
+            [HEADER, *(candle_line(s, m) for s in ("BTC", "ETH") for m in range(5))],
+        )
+    )
+    path = str(tmp_path / "btc.parquet")
+
+    with engine.connect() as conn:
+        written = export_candles(
+            conn,
+            path,
+            symbols=["btc"],
+            start=START + timedelta(minutes=1),
+            chunk_rows=2,
+        )
+
+    table = pq.read_table(path)
+    assert written == table.num_rows == 4
+    assert set(table.column("symbol").to_pylist()) == {"BTC"}
+    assert table.column("timestamp").to_pylist() == [
+        START + timedelta(minutes=minute) for minute in range(1, 5)
+    ]
+
+    db.execute(CryptoPrice.__table__.delete())
+    db.commit()
+    assert run_import(path).inserted == 4
+
+
+def test_normalize_reports_missing_columns():
+    batch = pa.record_batch(
+        [pa.array([1]), pa.array([1.0])], names=["timestamp", "open"]
+    )
+
+    with pytest.raises(ValueError, match="Missing columns: high, low, close, volume"):
+        normalize(batch, exchange="binance", symbol="BTC")
+
+
+def test_normalize_needs_a_default_for_absent_symbol():
+    batch = pa.record_batch(
+        [pa.array([1]), *(pa.array([1.0]) for _ in range(5))],
+        names=["timestamp", "open", "high", "low", "close", "volume"],
+    )
+
+    with pytest.raises(ValueError, match="Missing column symbol and no default"):
+        normalize(batch, exchange="binance")
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from app.db import candles
+from app.db.candles import (
+    UpsertResult,
+    advance_cursors,
+    candle_rows,
+    epoch_ms,
+    load_cursors,
+    upsert_candles,
+)
+from app.db.models import CryptoPrice, IngestionCursor
+from app.services.binance_service import BinanceService
+from app.services.exchange_adapter import (
+    BOOTSTRAP_LIMIT,
+    CANDLE_MS,
+    SimulatedExchange,
+)
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def ohlcv(minutes, close: float = 100.0) -> list:
+    return [
+        [epoch_ms(START + timedelta(minutes=minute)), 100.0, 101.0, 99.0, close, 1.0]
+        for minute in minutes
+    ]
+
+
+def closes(db, symbol: str = "BTC") -> list:
+    db.expire_all()
+    return list(
+        db.scalars(
+            select(CryptoPrice.close)
+            .where(CryptoPrice.symbol == symbol)
+            .order_by(CryptoPrice.timestamp)
+        )
+    )
+
+
+def test_upsert_counts_inserted_and_changed_candles(db):
+    rows = candle_rows("BTC", "binance", ohlcv(range(5)))
+
+    assert upsert_candles(db, rows) == UpsertResult(inserted=5)
+    db.commit()
+    # Rewriting identical candles touches nothing
+    assert upsert_candles(db, rows) == UpsertResult()
+
+    changed = candle_rows("BTC", "binance", ohlcv(range(3, 7), close=105.0))
+    assert upsert_candles(db, changed) == UpsertResult(inserted=2, updated=2)
+    db.commit()
+    assert closes(db) == [100.0] * 3 + [105.0] * 4
+
+
+def test_duplicate_candles_in_a_batch_keep_the_last(db):
+    rows = candle_rows("BTC", "binance", ohlcv([0], 1.0) + ohlcv([0], 2.0))
+
+    assert upsert_candles(db, rows) == UpsertResult(inserted=1)
+    db.commit()
+    assert closes(db) == [2.0]
+
+
+def test_counts_add_up_across_statement_chunks(db, monkeypatch):
+    monkeypatch.setattr(candles, "UPSERT_CHUNK_SIZE", 3)
+    upsert_candles(db, candle_rows("BTC", "binance", ohlcv(range(0, 10, 2))))
+    db.commit()
+
+    result = upsert_candles(db, candle_rows("BTC", "binance", ohlcv(range(10), 99.5)))
+
+    assert result == UpsertResult(inserted=5, updated=5)
+
+
+@pytest.mark.parametrize("exchange", ["binance", "upbit"])
+def test_same_minute_on_another_symbol_or_venue_is_a_new_candle(db, exchange):
+    upsert_candles(db, candle_rows("BTC", "binance", ohlcv([0])))
+
+    result = upsert_candles(
+        db,
+        candle_rows("ETH", "binance", ohlcv([0]))
+        + candle_rows("BTC", exchange, ohlcv([0], 101.0)),
+    )
+
+    assert result.inserted == (2 if exchange == "upbit" else 1)
+    assert result.updated == (0 if exchange == "upbit" else 1)
+
+
+def test_save_price_data_reports_counts(db):
+    service = BinanceService(symbols=["BTC"])
+
+    assert service.save_price_data(db, "BTC/USDT", ohlcv(range(3))).inserted == 3
+    assert service.save_price_data(db, "BTC/USDT", ohlcv(range(2, 4), 1.0)) == (
+        UpsertResult(inserted=1, updated=1)
+    )
+
+
+class RecordingExchange(SimulatedExchange):
+    """Remembers the `since` of every candle request"""
+
+    def __init__(self, symbols, latency: float = 0):
+        super().__init__(symbols, latency)
+        self.requests = []
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        self.requests.append((symbol, since))
+        return await super().fetch_ohlcv(symbol, timeframe, since, limit)
+
+
+def test_cursors_only_move_forward(db):
+    advance_cursors(db, "binance", {"BTC": START + timedelta(minutes=5)})
+    advance_cursors(
+        db,
+        "binance",
+        {"BTC": START, "ETH": START + timedelta(minutes=1)},
+    )
+    db.commit()
+
+    assert {
+        symbol: epoch_ms(ts)
+        for symbol, ts in load_cursors(db, "binance", ["BTC", "ETH"]).items()
+    } == {
+        "BTC": epoch_ms(START + timedelta(minutes=5)),
+        "ETH": epoch_ms(START + timedelta(minutes=1)),
+    }
+
+
+def test_load_cursors_falls_back_to_stored_candles(db):
+    # Candles written before cursors existed, and a cursor on another venue
+    db.execute(
+        CryptoPrice.__table__.insert(),
+        candle_rows("ETH", "binance", ohlcv(range(3))),
+    )
+    db.add(IngestionCursor(exchange="upbit", symbol="SOL", last_timestamp=START))
+    advance_cursors(db, "binance", {"BTC": START})
+    db.commit()
+
+    cursors = load_cursors(db, "binance", ["BTC", "ETH", "SOL"])
+
+    assert {symbol: epoch_ms(ts) for symbol, ts in cursors.items()} == {
+        "BTC": epoch_ms(START),
+        "ETH": epoch_ms(START + timedelta(minutes=2)),
+    }
+
+
+def test_incremental_request_covers_the_gap_since_the_cursor():
+    service = BinanceService(symbols=["BTC"])
+    now = datetime.now(timezone.utc)
+    cursor = now - timedelta(minutes=10)
+
+    assert service._incremental_request(None) == {"limit": BOOTSTRAP_LIMIT}
+    request = service._incremental_request(cursor)
+    # The cursor candle itself is fetched again, plus every minute since
+    assert request["since"] == epoch_ms(cursor)
+    assert 11 <= request["limit"] <= 13
+    # A long outage is capped at one page; the next run continues from there
+    assert service._incremental_request(now - timedelta(days=30)) == {
+        "since": epoch_ms(now - timedelta(days=30)),
+        "limit": service.max_ohlcv_limit,
+    }
+
+
+async def test_updates_fetch_only_candles_since_each_cursor(db):
+    service = BinanceService(symbols=["BTC", "ETH", "SOL"])
+    client = RecordingExchange(service.symbols)
+    service.client_factory = lambda: client
+
+    first = await service.fetch_updates(db, ["BTC/USDT", "ETH/USDT"])
+    service.save_candles(db, first)
+
+    assert sorted(client.requests) == [("BTC/USDT", None), ("ETH/USDT", None)]
+    assert {symbol: len(rows) for symbol, rows in first.items()} == {
+        "BTC/USDT": BOOTSTRAP_LIMIT,
+        "ETH/USDT": BOOTSTRAP_LIMIT,
+    }
+
+    cursors = load_cursors(db, "binance", ["BTC", "ETH"])
+    client.requests.clear()
+    second = await service.fetch_updates(db, ["BTC/USDT"])
+
+    # Only the requested symbol, starting at its cursor candle
+    assert client.requests == [("BTC/USDT", epoch_ms(cursors["BTC"]))]
+    assert second["BTC/USDT"][0][0] == epoch_ms(cursors["BTC"])
+    assert all(
+        candle[0] - epoch_ms(cursors["BTC"]) < 3 * CANDLE_MS
+        for candle in second["BTC/USDT"]
+    )
@@ -0,0 +1,13 @@
+"""
+Entry points must start without the heavy SDKs; they are imported on
+first use. Each import runs in a fresh interpreter so modules loaded by
+other tests do not mask an eager import.
+"""
+
+import pytest
+from benchmarks.bench_cold_start import ENTRY_POINTS, measure
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_defers_heavy_imports(module):
+    assert measure(module)["loaded"] == []
@@ -0,0 +1,110 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.db.models import DirectionEnum, PersonaEnum, Prediction
+from app.services import consensus_service as consensus_module
+from app.services.consensus_service import consensus_service
+from app.services.response_cache import PREDICTIONS, bump_generation
+
+NOW = datetime.now(timezone.utc).replace(microsecond=0)
+
+VALUE = PersonaEnum.VALUE_INVESTOR
+TECHNICAL = PersonaEnum.TECHNICAL_ANALYST
+MOMENTUM = PersonaEnum.MOMENTUM_TRADER
+
+
+def add(db, persona, direction, confidence, hours_ago=0, **fields) -> Prediction:
+    prediction = Prediction(
+        persona=persona,
+        symbol=fields.pop("symbol", "BTC"),
+        direction=direction,
+        confidence=confidence,
+        timeframe=fields.pop("timeframe", "24h"),
+        reasoning="",
+        created_at=NOW - timedelta(hours=hours_ago),
+        is_active=fields.pop("is_active", True),
+    )
+    db.add(prediction)
+    db.flush()
+    return prediction
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    monkeypatch.setattr(
+        consensus_service, "stats", dict.fromkeys(consensus_service.stats, 0)
+    )
+    return consensus_service.stats
+
+
+def test_consensus_uses_each_personas_newest_active_prediction(db):
+    add(db, VALUE, DirectionEnum.BEARISH, 90, hours_ago=8)
+    value = add(db, VALUE, DirectionEnum.BULLISH, 80, hours_ago=4)
+    # Newer, but expired, for another timeframe or for another symbol
+    add(db, VALUE, DirectionEnum.BEARISH, 90, is_active=False)
+    add(db, VALUE, DirectionEnum.BEARISH, 90, timeframe="7d")
+    add(db, VALUE, DirectionEnum.BEARISH, 90, symbol="ETH")
+    # Two runs stamped alike: the later row wins the tie
+    add(db, TECHNICAL, DirectionEnum.BULLISH, 10, hours_ago=1)
+    technical = add(db, TECHNICAL, DirectionEnum.BEARISH, 60, hours_ago=1)
+    momentum = add(db, MOMENTUM, DirectionEnum.BEARISH, 30, hours_ago=2)
+    db.commit()
+
+    consensus = consensus_service.refresh(db, "BTC", "24h")
+
+    assert [p["id"] for p in consensus["predictions"]] == [
+        technical.id,
+        momentum.id,
+        value.id,
+    ]
+    # Confidence-weighted: bearish 60 + 30 outweighs bullish 80
+    assert consensus["consensus_direction"] == "bearish"
+    assert consensus["consensus_confidence"] == pytest.approx(30.0)
+    assert (consensus["bullish_count"], consensus["bearish_count"]) == (1, 2)
+
+
+def test_consensus_without_predictions_is_neutral(db):
+    consensus = consensus_service.refresh(db, "BTC", "24h")
+
+    assert consensus["consensus_direction"] == "neutral"
+    assert consensus["consensus_confidence"] == 0
+    assert consensus["predictions"] == []
+
+
+async def test_reads_are_served_from_the_materialized_copy(db, client, stats):
+    add(db, VALUE, DirectionEnum.BULLISH, 80)
+    db.commit()
+    consensus_service.refresh(db, "BTC", "24h")
+
+    # A row written without a refresh is not seen: reads never query
+    add(db, TECHNICAL, DirectionEnum.BEARISH, 90)
+    db.commit()
+    response = await client.get("/api/v1/predictions/btc/consensus")
+
+    assert response.json()["consensus_direction"] == "bullish"
+    assert stats["hits"] == 1 and stats["misses"] == 0
+
+    # Writers refresh it (and bump the response cache generation)
+    consensus_service.refresh(db, "BTC", "24h")
+    bump_generation(PREDICTIONS)
+    response = await client.get("/api/v1/predictions/btc/consensus")
+
+    assert response.json()["consensus_direction"] == "bearish"
+    assert stats["hits"] == 2
+
+
+async def test_miss_computes_and_stores_the_consensus(db, client, stats):
+    add(db, MOMENTUM, DirectionEnum.BEARISH, 70, timeframe="7d")
+    db.commit()
+
+    response = await client.get(
+        "/api/v1/predictions/btc/consensus", params={"timeframe": "7d"}
+    )
+
+    assert response.json()["bearish_count"] == 1
+    assert stats["misses"] == 1
+    stored = json.loads(
+        consensus_module.get_redis().get(consensus_service.key("BTC", "7d"))
+    )
+    assert stored["consensus_direction"] == "bearish"
+    assert [p["persona"] for p in stored["predictions"]] == [MOMENTUM.value]
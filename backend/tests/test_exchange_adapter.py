@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import func, select
+from app.db.models import CryptoPrice, IngestionCursor
+from app.services.binance_service import BinanceService
+from app.services.exchange_adapter import (
+    BOOTSTRAP_LIMIT,
+    SimulatedExchange,
+    ingest_all,
+)
+from app.services.upbit_service import UpbitService
+
+SYMBOLS = ["BTC", "ETH"]
+
+
+class DownExchange(SimulatedExchange):
+    """A venue whose candle endpoint is unreachable"""
+
+    async def fetch_ohlcv(self, symbol, timeframe="1m", since=None, limit=None):
+        self.calls["fetch_ohlcv"] += 1
+        raise ConnectionError(f"{symbol}: connection reset by peer")
+
+
+def venue(cls, client_cls=SimulatedExchange):
+    adapter = cls(symbols=SYMBOLS)
+    markets = adapter.symbols
+    adapter.client_factory = lambda: client_cls(markets, latency=0)
+    return adapter
+
+
+def stored(db) -> dict:
+    return dict(
+        db.execute(
+            select(CryptoPrice.exchange, func.count()).group_by(CryptoPrice.exchange)
+        ).all()
+    )
+
+
+def cursor_venues(db) -> set:
+    return set(db.scalars(select(IngestionCursor.exchange).distinct()))
+
+
+async def test_failing_venue_does_not_block_the_others(db):
+    binance = venue(BinanceService)
+    upbit = venue(UpbitService, DownExchange)
+
+    results = await ingest_all(db, {binance: None, upbit: None})
+
+    assert results["binance"].inserted == len(SYMBOLS) * BOOTSTRAP_LIMIT
+    assert results["upbit"].written == 0
+    assert stored(db) == {"binance": len(SYMBOLS) * BOOTSTRAP_LIMIT}
+    # Only the venue that wrote candles moves its cursors
+    assert cursor_venues(db) == {"binance"}
+
+
+async def test_venue_raising_outright_is_isolated(db, monkeypatch):
+    binance = venue(BinanceService)
+    upbit = venue(UpbitService)
+
+    async def broken(db, symbols=None, cursors=None):
+        raise RuntimeError("upbit is down")
+
+    monkeypatch.setattr(upbit, "fetch_updates", broken)
+
+    results = await ingest_all(db, {upbit: None, binance: ["BTC"]})
+
+    assert results["upbit"].written == 0
+    assert results["binance"].inserted == BOOTSTRAP_LIMIT
+    assert stored(db) == {"binance": BOOTSTRAP_LIMIT}
+
+
+@pytest.mark.parametrize("failing", ["binance", "upbit"])
+async def test_next_run_catches_up_the_failed_venue(db, failing):
+    clients = {"binance": SimulatedExchange, "upbit": SimulatedExchange}
+    clients[failing] = DownExchange
+    binance = venue(BinanceService, clients["binance"])
+    upbit = venue(UpbitService, clients["upbit"])
+    await ingest_all(db, {binance: None, upbit: None})
+
+    # The venue recovers; its symbols bootstrap as if never fetched
+    adapter = binance if failing == "binance" else upbit
+    adapter.client_factory = lambda: SimulatedExchange(adapter.symbols, latency=0)
+    results = await ingest_all(db, {binance: None, upbit: None})
+
+    assert results[failing].inserted == len(SYMBOLS) * BOOTSTRAP_LIMIT
+    counts = stored(db)
+    assert counts[failing] == len(SYMBOLS) * BOOTSTRAP_LIMIT
+    # The healthy venue only picks up candles closed since the first run
+    assert all(count >= len(SYMBOLS) * BOOTSTRAP_LIMIT for count in counts.values())
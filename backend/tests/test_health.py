@@ -0,0 +1,96 @@
+import asyncio
+import time
+import pytest
+from app.api.v1 import health
+from app.services.health import HealthProber
+
+
+class Counting:
+    """A component check that records its calls and can hang or fail"""
+
+    def __init__(self, delay: float = 0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+
+
+def prober(checks: dict, **kwargs) -> HealthProber:
+    prober = HealthProber(**{"interval": 60, "timeout": 0.1, **kwargs})
+    prober.CHECKS = checks
+    return prober
+
+
+async def test_real_dependencies_are_healthy():
+    status = await HealthProber(timeout=5).check()
+
+    assert status["database"]["status"] == "healthy"
+    assert status["redis"]["status"] == "healthy"
+    assert HealthProber().healthy(status)
+
+
+async def test_slow_and_failing_components_are_reported_concurrently():
+    probe = prober(
+        {
+            "database": Counting(delay=10),
+            "redis": Counting(error=ConnectionError("connection refused")),
+        }
+    )
+
+    started = time.monotonic()
+    status = await probe.check()
+
+    # Components are probed side by side, each bounded by the timeout
+    assert time.monotonic() - started < 1
+    assert status["database"]["status"] == "unhealthy: timed out after 0.1s"
+    assert status["redis"]["status"] == "unhealthy: connection refused"
+    assert not probe.healthy(status)
+
+
+async def test_reads_share_one_probe_until_it_is_stale():
+    check = Counting(delay=0.05)
+    probe = prober({"database": check}, ttl=0.2)
+
+    await asyncio.gather(*(probe.get() for _ in range(10)))
+    await probe.get()
+    assert check.calls == 1
+
+    await asyncio.sleep(0.25)
+    await asyncio.gather(*(probe.get() for _ in range(10)))
+    assert check.calls == 2
+
+
+async def test_background_loop_keeps_the_status_fresh():
+    check = Counting()
+    probe = prober({"database": check}, interval=0.05)
+
+    probe.start()
+    await asyncio.sleep(0.2)
+    await probe.stop()
+    calls = check.calls
+    await asyncio.sleep(0.1)
+
+    assert calls >= 3
+    assert check.calls == calls
+    assert probe.healthy(await probe.get())
+
+
+@pytest.mark.parametrize(
+    "error, code, status", [(None, 200, "ready"), (OSError("down"), 503, "unavailable")]
+)
+async def test_readiness_answers_from_the_prober(
+    client, monkeypatch, error, code, status
+):
+    checks = {"database": Counting(error=error), "redis": Counting()}
+    monkeypatch.setattr(health, "health_prober", prober(checks))
+
+    responses = [await client.get("/api/v1/health/ready") for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [code] * 3
+    assert responses[0].json()["status"] == status
+    assert checks["database"].calls == 1
@@ -0,0 +1,113 @@
+import pytest
+from app.db.models import PersonaEnum
+from app.services import ai_service as ai_module
+from app.services.ai_service import AIPersona
+from app.services.llm_cache import STATS_KEY, LLMResponseCache, fingerprint
+from app.services.llm_providers import LocalProvider
+from app.services.market_snapshot import MarketSnapshot
+
+PROMPT = "persona prompt"
+MODEL = "local:local"
+ANALYSIS = {
+    "direction": "bullish",
+    "confidence": 70.0,
+    "timeframe": "24h",
+    "reasoning": "",
+}
+
+
+def snapshot(price: float, symbol: str = "BTC") -> MarketSnapshot:
+    return MarketSnapshot(
+        symbol=symbol,
+        price=price,
+        open_price=100.0,
+        high=max(price, 100.0),
+        low=min(price, 100.0),
+        avg_volume=1000.0,
+        current_volume=1000.0,
+        candles=1440,
+    )
+
+
+def cache(**kwargs) -> LLMResponseCache:
+    options = dict(step_pct=0.5, material_change_pct=1.0, enabled=True)
+    return LLMResponseCache(**{**options, **kwargs})
+
+
+def lookup(llm_cache: LLMResponseCache, price: float, model: str = MODEL):
+    return llm_cache.get("value_investor", PROMPT, model, snapshot(price), "24h")
+
+
+def remember(llm_cache: LLMResponseCache, price: float):
+    llm_cache.put("value_investor", PROMPT, MODEL, snapshot(price), "24h", ANALYSIS)
+
+
+def stats(fake_redis) -> dict:
+    return {k.decode(): int(v) for k, v in fake_redis.hgetall(STATS_KEY).items()}
+
+
+def test_noise_below_the_step_shares_a_fingerprint():
+    def digest(price):
+        return fingerprint(PROMPT, MODEL, snapshot(price), "24h", 0.5)
+
+    assert digest(100.0) == digest(100.02)
+    assert digest(100.0) != digest(101.0)
+
+
+@pytest.mark.parametrize(
+    "price, served, counter",
+    [
+        (100.02, True, "hits"),  # same bucket
+        (100.8, True, "reused"),  # another bucket, but under the 1% threshold
+        (102.0, False, "misses"),  # a material move asks the model again
+    ],
+)
+def test_lookup_reuses_answers_until_a_material_change(
+    fake_redis, price, served, counter
+):
+    llm_cache = cache()
+    remember(llm_cache, 100.0)
+
+    assert lookup(llm_cache, price) == (ANALYSIS if served else None)
+    assert stats(fake_redis) == {counter: 1}
+
+
+def test_reuse_needs_the_same_model_and_can_be_disabled():
+    llm_cache = cache()
+    remember(llm_cache, 100.0)
+
+    assert lookup(llm_cache, 100.8, model="gemini:other") is None
+    strict = cache(material_change_pct=0)
+    assert lookup(strict, 100.8) is None
+    assert lookup(cache(enabled=False), 100.0) is None
+
+
+def test_least_recently_used_fingerprints_are_evicted():
+    llm_cache = cache(max_entries=2)
+    remember(llm_cache, 100.0)
+    remember(llm_cache, 110.0)
+    # Reading the first makes the second the oldest
+    assert lookup(llm_cache, 100.0) == ANALYSIS
+    remember(llm_cache, 120.0)
+
+    exact = cache(material_change_pct=0)
+    assert lookup(exact, 100.0) == ANALYSIS
+    assert lookup(exact, 110.0) is None
+    assert lookup(exact, 120.0) == ANALYSIS
+
+
+async def test_persona_calls_the_model_only_on_material_change(monkeypatch):
+    monkeypatch.setattr(ai_module, "llm_cache", cache())
+    provider = LocalProvider(latency=0, jitter=0)
+    persona = AIPersona(PersonaEnum.VALUE_INVESTOR, provider)
+
+    async def analyze(price):
+        return await persona.analyze(None, "BTC", snapshots={"BTC": snapshot(price)})
+
+    first = await analyze(100.0)
+    assert await analyze(100.0) == first
+    assert await analyze(100.8) == first
+    assert provider.calls == 1
+
+    await analyze(103.0)
+    assert provider.calls == 2
@@ -0,0 +1,75 @@
+import json
+import sys
+import pytest
+from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.llm_providers import (
+    GeminiProvider,
+    LLMProvider,
+    LocalProvider,
+    get_provider,
+)
+
+SINGLE = "Cryptocurrency: BTC\nProvide your analysis for the 7d timeframe."
+BATCH = "Cryptocurrency: BTC\nCryptocurrency: ETH\nReturn ONLY a JSON array"
+
+
+def test_provider_follows_the_setting(monkeypatch):
+    assert isinstance(get_provider(), LocalProvider)
+
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "gemini")
+    gemini = get_provider()
+
+    assert isinstance(gemini, GeminiProvider)
+    assert gemini.model_name == settings.GEMINI_MODEL
+    # The SDK is only imported on the first call
+    assert "google.generativeai" not in sys.modules
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError, match="Unknown LLM provider: openai"):
+        get_provider("openai")
+
+
+def test_providers_must_implement_generate_json():
+    class Incomplete(LLMProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+async def test_local_answers_are_deterministic():
+    first, second = LocalProvider(latency=0), LocalProvider(latency=0, seed=1)
+
+    answer = json.loads(await first.generate_json(SINGLE))
+
+    assert await second.generate_json(SINGLE) == json.dumps(answer)
+    assert answer["symbol"] == "BTC" and answer["timeframe"] == "7d"
+    assert [
+        item["symbol"] for item in json.loads(await first.generate_json(BATCH))
+    ] == [
+        "BTC",
+        "ETH",
+    ]
+    assert first.calls == 2
+
+
+async def test_local_direction_and_errors_can_be_pinned():
+    pinned = LocalProvider(latency=0, direction="bearish")
+    assert json.loads(await pinned.generate_json(SINGLE))["direction"] == "bearish"
+
+    with pytest.raises(RuntimeError):
+        await LocalProvider(latency=0, error_rate=1.0).generate_json(SINGLE)
+
+
+def test_service_routes_every_persona_through_its_provider():
+    service = AIService()
+    assert all(isinstance(p.provider, LocalProvider) for p in service.personas)
+
+    provider = LocalProvider(latency=0)
+    service.use_provider(provider)
+
+    assert service.provider is provider
+    assert all(persona.provider is provider for persona in service.personas)
+    assert {persona.model_name for persona in service.personas} == {"local:local"}
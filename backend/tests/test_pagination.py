@@ -0,0 +1,182 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from app.api.pagination import NDJSON
+from app.db.candles import _aware, upsert_candles
+from app.db.models import DirectionEnum, PersonaEnum, Prediction
+
+NOW = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+
+@pytest.fixture
+def candles(db):
+    """20 minutes of BTC candles, newest first"""
+    stamps = [NOW - timedelta(minutes=m) for m in range(20)]
+    upsert_candles(
+        db,
+        [
+            {
+                "symbol": "BTC",
+                "exchange": "binance",
+                "timestamp": ts,
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": float(i),
+                "volume": 1.0,
+            }
+            for i, ts in enumerate(stamps)
+        ],
+    )
+    db.commit()
+    return stamps
+
+
+@pytest.fixture
+def predictions(db):
+    """Ids of 12 active BTC predictions, newest first; pairs share created_at"""
+    db.execute(
+        Prediction.__table__.insert(),
+        [
+            {
+                "persona": PersonaEnum.VALUE_INVESTOR,
+                "symbol": "BTC",
+                "direction": DirectionEnum.BULLISH,
+                "confidence": 60.0,
+                "timeframe": "24h",
+                "reasoning": "",
+                "created_at": NOW - timedelta(hours=i // 2),
+                "is_active": True,
+            }
+            for i in range(12)
+        ],
+    )
+    db.commit()
+    return db.scalars(
+        select(Prediction.id).order_by(
+            Prediction.created_at.desc(), Prediction.id.desc()
+        )
+    ).all()
+
+
+async def walk(client, url: str, **params) -> list:
+    """Follow X-Next-Cursor until the last page; returns every page"""
+    pages = []
+    while True:
+        response = await client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in response.headers
+            return pages
+        assert f"cursor={cursor}" in response.headers["Link"]
+        params["cursor"] = cursor
+
+
+async def test_price_pages_cover_the_range_once(client, candles):
+    pages = await walk(client, "/api/v1/prices/btc", hours=1, limit=7)
+
+    assert [len(page) for page in pages] == [7, 7, 6]
+    stamps = [
+        _aware(datetime.fromisoformat(row["timestamp"])) for p in pages for row in p
+    ]
+    assert stamps == candles
+
+
+async def test_price_pages_end_with_an_empty_page_on_exact_fill(client, candles):
+    pages = await walk(client, "/api/v1/prices/btc", hours=1, limit=10)
+
+    # A full last page still offers a cursor; following it yields nothing
+    assert [len(page) for page in pages] == [10, 10, 0]
+
+
+async def test_price_history_window_ends_hours_ago(client, db, candles):
+    # Just outside the one-hour window
+    stale = NOW - timedelta(minutes=61)
+    upsert_candles(
+        db,
+        [
+            {
+                "symbol": "BTC",
+                "exchange": "binance",
+                "timestamp": stale,
+                **dict.fromkeys(["open", "high", "low", "close", "volume"], 1.0),
+            }
+        ],
+    )
+    db.commit()
+
+    pages = await walk(client, "/api/v1/prices/btc", hours=1)
+
+    stamps = [
+        _aware(datetime.fromisoformat(row["timestamp"])) for p in pages for row in p
+    ]
+    assert stamps == candles
+
+
+async def test_prediction_pages_break_created_at_ties_by_id(client, predictions):
+    pages = await walk(client, "/api/v1/predictions/btc", limit=5)
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert [row["id"] for page in pages for row in page] == predictions
+
+
+async def test_prediction_pages_end_with_an_empty_page_on_exact_fill(
+    client, predictions
+):
+    pages = await walk(client, "/api/v1/predictions/btc", limit=6)
+
+    assert [len(page) for page in pages] == [6, 6, 0]
+
+
+@pytest.mark.parametrize("url", ["/api/v1/prices/btc", "/api/v1/predictions/btc"])
+async def test_invalid_cursor_is_rejected(client, url):
+    response = await client.get(url, params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+# Asked for with ?stream=true or by Accept header
+STREAM_REQUESTS = [({"stream": "true"}, {}), ({}, {"Accept": NDJSON})]
+
+
+def ndjson(response) -> list:
+    assert response.headers["content-type"].startswith(NDJSON)
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("params, headers", STREAM_REQUESTS)
+async def test_prices_stream_the_whole_range(client, candles, params, headers):
+    response = await client.get(
+        "/api/v1/prices/btc", params={"hours": 1, "limit": 5, **params}, headers=headers
+    )
+
+    assert response.status_code == 200
+    rows = ndjson(response)
+    # Streaming ignores the page size
+    assert [_aware(datetime.fromisoformat(row["timestamp"])) for row in rows] == candles
+    assert rows[0]["symbol"] == "BTC" and rows[0]["close"] == 0.0
+
+
+@pytest.mark.parametrize("params, headers", STREAM_REQUESTS)
+async def test_predictions_stream_every_match(client, predictions, params, headers):
+    response = await client.get(
+        "/api/v1/predictions/btc", params={"limit": 5, **params}, headers=headers
+    )
+
+    assert response.status_code == 200
+    rows = ndjson(response)
+    assert [row["id"] for row in rows] == predictions
+    assert rows[0]["persona"] == PersonaEnum.VALUE_INVESTOR.value
+
+
+async def test_stream_continues_from_a_cursor(client, predictions):
+    first = await client.get("/api/v1/predictions/btc", params={"limit": 4})
+    response = await client.get(
+        "/api/v1/predictions/btc",
+        params={"stream": "true", "cursor": first.headers["X-Next-Cursor"]},
+    )
+
+    assert [row["id"] for row in ndjson(response)] == predictions[4:]
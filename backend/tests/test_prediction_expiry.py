@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import event, select
+from app.db.models import DirectionEnum, PersonaEnum, Prediction
+from app.db.predictions import LEGACY_MAX_AGE, expire_predictions, target_date_for
+from app.db.session import engine
+from app.services.ai_service import AIService
+
+NOW = datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "timeframe, horizon",
+    [
+        ("24h", timedelta(hours=24)),
+        ("7d", timedelta(days=7)),
+        ("30d", timedelta(days=30)),
+        ("15m", timedelta(minutes=15)),
+        ("2w", timedelta(weeks=2)),
+        (" 7D ", timedelta(days=7)),
+    ],
+)
+def test_target_date_adds_the_timeframe(timeframe, horizon):
+    assert target_date_for(timeframe, NOW) == NOW + horizon
+
+
+@pytest.mark.parametrize("timeframe", ["", None, "soon", "7y", "h24"])
+def test_unknown_timeframe_has_no_target_date(timeframe):
+    assert target_date_for(timeframe, NOW) is None
+
+
+def test_saved_prediction_targets_its_timeframe(db):
+    ai = AIService()
+    before = datetime.now(timezone.utc)
+    analysis = {
+        "direction": "bullish",
+        "confidence": 70,
+        "timeframe": "7d",
+        "reasoning": "",
+    }
+    ai.save_predictions(db, [(ai.personas[0], "BTC", analysis)])
+
+    target = db.scalar(select(Prediction.target_date))
+    if target.tzinfo is None:
+        target = target.replace(tzinfo=timezone.utc)
+    assert before + timedelta(days=7) <= target
+    assert target <= datetime.now(timezone.utc) + timedelta(days=7)
+
+
+def prediction(symbol, timeframe, created_at, target_date, is_active=True) -> dict:
+    return {
+        "persona": PersonaEnum.MOMENTUM_TRADER,
+        "symbol": symbol,
+        "direction": DirectionEnum.NEUTRAL,
+        "confidence": 50.0,
+        "timeframe": timeframe,
+        "reasoning": "",
+        "created_at": created_at,
+        "target_date": target_date,
+        "is_active": is_active,
+    }
+
+
+@pytest.fixture
+def updates():
+    """UPDATE statements issued against predictions"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE PREDICTIONS"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_expiry_flips_due_rows_in_chunks(db, updates):
+    hour = timedelta(hours=1)
+    rows = (
+        # Past their target date
+        [prediction("BTC", "24h", NOW - 30 * hour, NOW - i * hour) for i in range(5)]
+        + [prediction("ETH", "7d", NOW - 8 * 24 * hour, NOW - hour)]
+        # Not due yet
+        + [prediction("BTC", "7d", NOW - hour, NOW + 6 * 24 * hour) for _ in range(2)]
+        # Saved before target_date existed: expired by age alone
+        + [
+            prediction("SOL", "24h", NOW - LEGACY_MAX_AGE - i * hour, None)
+            for i in range(1, 4)
+        ]
+        + [prediction("SOL", "24h", NOW - hour, None)]
+        # Already expired
+        + [prediction("XRP", "24h", NOW - 48 * hour, NOW - 24 * hour, False)]
+    )
+    db.execute(Prediction.__table__.insert(), rows)
+    db.commit()
+
+    expired, affected = expire_predictions(db, now=NOW, chunk_size=2)
+
+    assert expired == 9
+    assert affected == {("BTC", "24h"), ("ETH", "7d"), ("SOL", "24h")}
+    # Six due by date in chunks of 2, 2, 2 plus an empty check; three
+    # legacy rows in chunks of 2, 1
+    assert len(updates) == 4 + 2
+    active = db.execute(
+        select(Prediction.symbol, Prediction.timeframe).where(
+            Prediction.is_active == True
+        )
+    ).all()
+    assert sorted(active) == [("BTC", "7d"), ("BTC", "7d"), ("SOL", "24h")]
+
+    assert expire_predictions(db, now=NOW, chunk_size=2) == (0, set())
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.db.models import CryptoPrice
+from app.services import price_cache
+from app.services.binance_service import BinanceService
+from app.services.exchange_adapter import SimulatedExchange
+from app.services.price_cache import LatestPriceCache
+
+NOW = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+
+
+def candle(minutes_ago: int, close: float = 100.0) -> CryptoPrice:
+    return CryptoPrice(
+        id=minutes_ago,
+        symbol="BTC",
+        exchange="binance",
+        timestamp=NOW - timedelta(minutes=minutes_ago),
+        open=100.0,
+        high=101.0,
+        low=99.0,
+        close=close,
+        volume=1.0,
+    )
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """The shared cache, emptied and rebound to this test's Redis"""
+    cache = price_cache.latest_price_cache
+    monkeypatch.setattr(cache, "_local", {})
+    monkeypatch.setattr(cache, "_sync_script", None)
+    monkeypatch.setattr(cache, "_async_script", None)
+    monkeypatch.setattr(cache, "stats", dict.fromkeys(cache.stats, 0))
+    return cache
+
+
+def other_worker() -> LatestPriceCache:
+    """A second process: no in-process layer to hide what Redis holds"""
+    return LatestPriceCache(local_ttl=0)
+
+
+async def test_late_writer_cannot_move_latest_backwards(cache):
+    cache.set_many([candle(1)])
+    # A backfill or slower poll lands afterwards with an older candle
+    other_worker().set_many([candle(5)])
+    await other_worker().set(candle(10))
+
+    latest = await other_worker().get("binance", "BTC")
+    assert latest["timestamp"] == candle(1).timestamp.isoformat()
+    assert (await cache.get("binance", "BTC"))["id"] == 1
+
+
+async def test_same_candle_is_replaced_with_its_final_values(cache):
+    cache.set_many([candle(0, close=100.0)])
+    other_worker().set_many([candle(0, close=105.0)])
+
+    assert (await other_worker().get("binance", "BTC"))["close"] == 105.0
+
+
+async def test_local_layer_serves_repeat_reads(cache):
+    cache.set_many([candle(0)])
+
+    await cache.get("binance", "BTC")
+    await other_worker().get("binance", "BTC")
+
+    assert cache.stats["local_hits"] == 1
+    assert cache.stats["redis_hits"] == 0
+    assert await cache.get("binance", "ETH") is None
+    assert cache.get_stats()["hit_rate"] == 0.5
+
+
+async def test_ingestion_writes_through_and_misses_fill_the_cache(db, client, cache):
+    service = BinanceService(symbols=["BTC"])
+    service.client_factory = lambda: SimulatedExchange(service.symbols, latency=0)
+    service.save_candles(db, await service.fetch_updates(db))
+
+    response = await client.get("/api/v1/prices/btc/latest")
+
+    newest = db.query(CryptoPrice).order_by(CryptoPrice.timestamp.desc()).first()
+    assert response.json()["id"] == newest.id
+    assert cache.stats["misses"] == 0
+
+    # Redis restarted and this worker's copy expired: the database answers
+    # and refills the cache
+    await price_cache.get_async_redis().flushall()
+    cache._local.clear()
+
+    assert (await client.get("/api/v1/prices/btc/latest")).json()["id"] == newest.id
+    assert cache.stats["misses"] == 1
+    assert (await other_worker().get("binance", "BTC"))["id"] == newest.id
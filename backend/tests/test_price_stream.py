@@ -0,0 +1,180 @@
+import asyncio
+import json
+import time
+import pytest
+from starlette.websockets import WebSocketDisconnect
+from app.api.v1 import live
+from app.core.config import settings
+from app.core.redis import get_async_redis, price_channel
+from app.services.price_stream import PriceBroadcaster, Subscription
+
+BTC = price_channel("binance", "BTC")
+ETH = price_channel("binance", "ETH")
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def tick(symbol: str, close: float) -> str:
+    return json.dumps({"exchange": "binance", "symbol": symbol, "close": close})
+
+
+class FakeSocket:
+    """Plays back commands, then disconnects; records what the server sends"""
+
+    def __init__(self, commands=None, send_delay: float = 0):
+        self.commands = commands
+        self.send_delay = send_delay
+        self.sent = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def receive_json(self):
+        if self.commands is None:
+            # A client that never sends anything
+            await asyncio.Event().wait()
+        if not self.commands:
+            raise WebSocketDisconnect(code=1000)
+        return self.commands.pop(0)
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_text(self, data):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(json.loads(data))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+@pytest.fixture
+async def broadcaster(monkeypatch):
+    """A fresh broadcaster behind the live endpoints"""
+    monkeypatch.setattr(settings, "PRICE_PUSH_INTERVAL", 0)
+    broadcaster = PriceBroadcaster()
+    monkeypatch.setattr(live, "price_broadcaster", broadcaster)
+    yield broadcaster
+    await broadcaster.close()
+
+
+async def test_subscription_keeps_only_the_newest_update_per_channel():
+    subscription = Subscription(interval=0)
+    for close in (1.0, 2.0, 3.0):
+        subscription.offer(BTC, tick("BTC", close))
+    subscription.offer(ETH, tick("ETH", 10.0))
+
+    batch = await anext(subscription.updates())
+
+    assert sorted(json.loads(data)["close"] for data in batch) == [3.0, 10.0]
+    assert subscription.coalesced == 2
+
+
+async def test_subscription_releases_at_most_once_per_interval():
+    subscription = Subscription(interval=0.2)
+    updates = subscription.updates()
+    subscription.offer(BTC, tick("BTC", 1.0))
+    await anext(updates)
+    released = time.monotonic()
+    subscription.offer(BTC, tick("BTC", 2.0))
+
+    batch = await anext(updates)
+
+    assert time.monotonic() - released >= 0.2
+    assert [json.loads(data)["close"] for data in batch] == [2.0]
+
+
+async def test_idle_subscription_yields_heartbeats():
+    updates = Subscription(interval=0, heartbeat=0.05).updates()
+
+    assert [await anext(updates) for _ in range(2)] == [[], []]
+
+
+async def test_one_redis_delivery_fans_out_to_every_subscriber(broadcaster):
+    first, second = Subscription(interval=0), Subscription(interval=0)
+    await broadcaster.subscribe(first, [BTC])
+    await broadcaster.subscribe(second, [BTC, ETH])
+
+    await get_async_redis().publish(BTC, tick("BTC", 1.0))
+    batches = await asyncio.wait_for(
+        asyncio.gather(anext(first.updates()), anext(second.updates())), 5
+    )
+
+    assert batches == [[tick("BTC", 1.0)], [tick("BTC", 1.0)]]
+    assert broadcaster.stats["messages"] == 1
+    assert broadcaster.stats["deliveries"] == 2
+
+
+async def test_unsubscribe_drops_idle_channels(broadcaster):
+    first, second = Subscription(), Subscription()
+    await broadcaster.subscribe(first, [BTC])
+    await broadcaster.subscribe(second, [BTC, ETH])
+
+    await broadcaster.unsubscribe(second)
+
+    assert second.channels == set()
+    assert broadcaster.get_stats()["channels"] == 1
+    assert dict(await get_async_redis().pubsub_numsub(BTC, ETH)) == {
+        BTC.encode(): 1,
+        ETH.encode(): 0,
+    }
+
+    await broadcaster.unsubscribe(first)
+
+    assert broadcaster.get_stats()["subscribers"] == 0
+    assert await get_async_redis().pubsub_numsub(BTC) == [(BTC.encode(), 0)]
+
+
+async def test_slow_websocket_client_is_disconnected(broadcaster, monkeypatch):
+    monkeypatch.setattr(settings, "PRICE_PUSH_SEND_TIMEOUT", 0.05)
+    socket = FakeSocket(send_delay=10)
+    session = asyncio.create_task(live.price_socket(socket, symbols="BTC"))
+    await wait_for(lambda: broadcaster.get_stats()["channels"] == 1)
+
+    await get_async_redis().publish(BTC, tick("BTC", 1.0))
+    await asyncio.wait_for(session, 5)
+
+    assert socket.close_code == 1013
+    assert broadcaster.stats["slow_disconnects"] == 1
+    # The dropped client no longer holds its channel
+    assert broadcaster.get_stats() == {
+        **broadcaster.stats,
+        "channels": 0,
+        "subscribers": 0,
+    }
+
+
+async def test_websocket_rejects_symbols_that_are_not_a_list(broadcaster):
+    socket = FakeSocket(
+        [
+            {"action": "subscribe", "symbols": "BTC"},
+            {"action": "subscribe", "symbols": ["ETH"]},
+        ]
+    )
+
+    await asyncio.wait_for(live.price_socket(socket), 5)
+
+    assert socket.sent == [{"error": "Invalid command"}, {"subscribed": [ETH]}]
+    assert broadcaster.get_stats()["channels"] == 0
+
+
+async def test_failed_stream_subscribe_is_cleaned_up(broadcaster, client, monkeypatch):
+    async def unreachable(*channels):
+        raise ConnectionError("redis is down")
+
+    pubsub = get_async_redis().pubsub()
+    monkeypatch.setattr(pubsub, "subscribe", unreachable)
+    broadcaster._pubsub = pubsub
+
+    with pytest.raises(ConnectionError):
+        await client.get("/api/v1/stream/prices", params={"symbols": "BTC,ETH"})
+
+    assert broadcaster.get_stats()["subscribers"] == 0
+    assert broadcaster.get_stats()["channels"] == 0
@@ -0,0 +1,165 @@
+"""
+The hot price and prediction queries, built by the same functions the
+endpoints use, must be served by their composite indexes with the ORDER BY
+satisfied by the index rather than a sort. Plans are taken over a seeded,
+analyzed dataset so the planner sees realistic selectivity rather than
+empty tables.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.api.pagination import encode_cursor
+from app.api.v1.predictions import listing_query
+from app.api.v1.prices import MAX_POINTS, history_query, latest_price_query
+from app.db.models import CryptoPrice, DirectionEnum, PersonaEnum, Prediction
+from app.db.predictions import due_batch, due_filters, target_date_for
+from app.db.session import SessionLocal, engine
+from app.services.consensus_service import latest_per_persona_query
+
+PRICE_INDEX = "ix_crypto_prices_symbol_exchange_timestamp"
+TIMEFRAME_INDEX = "ix_predictions_symbol_timeframe_created_at"
+PERSONA_INDEX = "ix_predictions_symbol_persona_created_at"
+ACTIVE_INDEX = "ix_predictions_active_symbol_created_at"
+CONSENSUS_INDEX = "ix_predictions_active_consensus"
+ACTIVE_INDEX_PREFIX = "ix_predictions_active_"
+
+now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+since = now - timedelta(hours=24)
+
+SYMBOLS = [f"SYM{i}" for i in range(7)] + ["BTC"]
+
+# A second page of each listing
+price_cursor = encode_cursor(now - timedelta(hours=2))
+prediction_cursor = encode_cursor(now - timedelta(hours=8), 1_000_000)
+
+# Statements built exactly as the endpoints build them, each with the
+# indexes allowed to serve it
+HOT_QUERIES = {
+    # GET /prices/{symbol}
+    "price_history": (
+        history_query("BTC", "binance", since).limit(MAX_POINTS),
+        [PRICE_INDEX],
+    ),
+    "price_history_next_page": (
+        history_query("BTC", "binance", since, price_cursor).limit(MAX_POINTS),
+        [PRICE_INDEX],
+    ),
+    # GET /prices/{symbol}/latest on a cache miss
+    "latest_price": (latest_price_query("BTC", "binance"), [PRICE_INDEX]),
+    # GET /predictions/{symbol}: active only by default
+    "predictions": (listing_query("BTC").limit(50), [ACTIVE_INDEX]),
+    "predictions_next_page": (
+        listing_query("BTC", cursor=prediction_cursor).limit(50),
+        [ACTIVE_INDEX],
+    ),
+    "predictions_by_timeframe": (
+        listing_query("BTC", timeframe="24h").limit(50),
+        [TIMEFRAME_INDEX, ACTIVE_INDEX],
+    ),
+    "predictions_by_persona": (
+        listing_query("BTC", persona=PersonaEnum.VALUE_INVESTOR).limit(50),
+        [PERSONA_INDEX, ACTIVE_INDEX],
+    ),
+    "predictions_history_by_persona": (
+        listing_query(
+            "BTC", persona=PersonaEnum.VALUE_INVESTOR, active_only=False
+        ).limit(50),
+        [PERSONA_INDEX],
+    ),
+    # GET /predictions/{symbol}/consensus on a cache miss, and its refresh
+    "consensus": (latest_per_persona_query("BTC", "24h"), [CONSENSUS_INDEX]),
+}
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """Two days of 1m candles on two venues and a prediction history"""
+    db = SessionLocal()
+    db.execute(
+        CryptoPrice.__table__.insert(),
+        [
+            {
+                "symbol": symbol,
+                "exchange": exchange,
+                "timestamp": now - timedelta(minutes=minute),
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": 1.0,
+                "volume": 1.0,
+            }
+            for symbol in SYMBOLS
+            for exchange in ("binance", "upbit")
+            for minute in range(2 * 24 * 60)
+        ],
+    )
+    # A run every 4 hours for 100 days; rows stay active until their target
+    # date, as the expiry sweep leaves them
+    created = [now - timedelta(hours=4 * run) for run in range(600)]
+    db.execute(
+        Prediction.__table__.insert(),
+        [
+            {
+                "persona": persona,
+                "symbol": symbol,
+                "direction": DirectionEnum.NEUTRAL,
+                "confidence": 50.0,
+                "timeframe": timeframe,
+                "reasoning": "",
+                "created_at": created_at,
+                "target_date": target_date_for(timeframe, created_at),
+                "is_active": target_date_for(timeframe, created_at) > now,
+            }
+            for symbol in SYMBOLS
+            for persona in list(PersonaEnum)[:3]
+            for timeframe in ("24h", "7d", "30d")
+            for created_at in created
+        ],
+    )
+    db.commit()
+    # As autovacuum would: statistics, plus the visibility map that lets the
+    # covering price index answer without heap visits
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("VACUUM ANALYZE crypto_prices, predictions"))
+        else:
+            conn.execute(text("ANALYZE"))
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.execute(CryptoPrice.__table__.delete())
+        db.execute(Prediction.__table__.delete())
+        db.commit()
+        db.close()
+
+
+def explain(db, stmt) -> str:
+    dialect = db.get_bind().dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "postgresql":
+        rows = db.execute(text(f"EXPLAIN {sql}")).scalars()
+    else:
+        rows = (row.detail for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    return "\n".join(rows)
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_composite_index(seeded, name):
+    stmt, indexes = HOT_QUERIES[name]
+    plan = explain(seeded, stmt)
+
+    assert any(index in plan for index in indexes), plan
+    # The index already yields rows in ORDER BY (or window) order
+    assert "Sort" not in plan and "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.parametrize("sweep", ["target_date", "legacy"])
+def test_expiry_sweep_uses_partial_index(seeded, sweep):
+    due = due_filters(now)[["target_date", "legacy"].index(sweep)]
+    plan = explain(seeded, due_batch(due))
+
+    # Either partial index confines the sweep to active rows; PostgreSQL
+    # may prefer the listing one when target_date looks unselective
+    assert ACTIVE_INDEX_PREFIX in plan, plan
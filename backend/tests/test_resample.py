@@ -0,0 +1,110 @@
+import random
+from datetime import datetime, timedelta, timezone
+import httpx
+from app.db.candles import _aware, resample_query, upsert_candles
+from app.db.session import async_engine
+from app.main import app
+
+DAY = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def candle(ts: datetime, open_: float, close: float, volume: float = 1.0) -> dict:
+    return {
+        "symbol": "BTC",
+        "exchange": "binance",
+        "timestamp": ts,
+        "open": open_,
+        "high": max(open_, close) + 1,
+        "low": min(open_, close) - 1,
+        "close": close,
+        "volume": volume,
+    }
+
+
+def store(db, rows):
+    # Insertion order must not decide which candle opens or closes a bucket
+    rows = list(rows)
+    random.Random(7).shuffle(rows)
+    upsert_candles(db, rows)
+    db.commit()
+
+
+def resample(db, start: datetime, seconds: int) -> list:
+    stmt = resample_query(
+        "BTC", "binance", start, seconds, dialect=db.get_bind().dialect.name
+    )
+    return db.execute(stmt.order_by(stmt.selected_columns.timestamp)).all()
+
+
+def test_buckets_align_to_interval_boundaries(db):
+    # 12:03 .. 12:11, straddling the 12:05 and 12:10 boundaries of 5m buckets
+    minutes = range(3, 12)
+    store(
+        db,
+        (
+            candle(DAY + timedelta(hours=12, minutes=m), 100 + m, 200 + m, m)
+            for m in minutes
+        ),
+    )
+
+    rows = resample(db, DAY, 300)
+
+    assert [_aware(row.timestamp) for row in rows] == [
+        DAY + timedelta(hours=12, minutes=0),
+        DAY + timedelta(hours=12, minutes=5),
+        DAY + timedelta(hours=12, minutes=10),
+    ]
+    # Buckets hold minutes 3-4, 5-9 and 10-11
+    first, middle, last = rows
+    assert (first.open, first.close) == (103, 204)
+    assert (middle.open, middle.close) == (105, 209)
+    assert (last.open, last.close) == (110, 211)
+    assert middle.high == 209 + 1 and middle.low == 105 - 1
+    assert middle.volume == sum(range(5, 10))
+
+
+def test_daily_buckets_start_at_midnight_utc(db):
+    stamps = [
+        DAY - timedelta(minutes=1),  # 23:59 on the previous day
+        DAY,
+        DAY + timedelta(hours=23, minutes=59),
+        DAY + timedelta(days=1),
+    ]
+    store(db, (candle(ts, i, i + 0.5) for i, ts in enumerate(stamps)))
+
+    rows = resample(db, DAY - timedelta(days=1), 86400)
+
+    assert [_aware(row.timestamp) for row in rows] == [
+        DAY - timedelta(days=1),
+        DAY,
+        DAY + timedelta(days=1),
+    ]
+    # The day's first candle opens it and its last one closes it
+    assert (rows[1].open, rows[1].close) == (1, 2.5)
+
+
+async def test_resampled_history_endpoint(db):
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    store(db, (candle(now - timedelta(minutes=m), m, m + 0.5) for m in range(30)))
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get(
+                "/api/v1/prices/btc", params={"interval": "5m", "hours": 1}
+            )
+    finally:
+        await async_engine.dispose()
+
+    assert response.status_code == 200
+    buckets = response.json()
+    assert buckets and len(buckets) <= 7
+    for bucket in buckets:
+        ts = _aware(datetime.fromisoformat(bucket["timestamp"]))
+        assert ts.timestamp() % 300 == 0
+        assert bucket["id"] is None and bucket["symbol"] == "BTC"
+    # Newest first; the newest bucket closes on the newest candle (m=0)
+    assert buckets[0]["close"] == 0.5
+    assert sum(bucket["volume"] for bucket in buckets) == 30
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+import msgpack
+import pytest
+from app.api.formats import MSGPACK
+from app.db.candles import upsert_candles
+from app.services.response_cache import PREDICTIONS, PRICES, bump_generation
+
+NOW = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+URL = "/api/v1/prices/btc"
+
+
+@pytest.fixture
+def candles(db):
+    def write(minutes: int, close: float = 1.0):
+        upsert_candles(
+            db,
+            [
+                {
+                    "symbol": "BTC",
+                    "exchange": "binance",
+                    "timestamp": NOW - timedelta(minutes=minute),
+                    **dict.fromkeys(["open", "high", "low", "volume"], 1.0),
+                    "close": close,
+                }
+                for minute in range(minutes)
+            ],
+        )
+        db.commit()
+
+    write(5)
+    return write
+
+
+async def test_repeat_reads_are_served_from_the_cache(client, candles):
+    first = await client.get(URL, params={"hours": 1})
+    second = await client.get(URL, params={"hours": 1})
+
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["content-type"] == first.headers["content-type"]
+    assert first.headers["vary"] == second.headers["vary"] == "Accept"
+
+
+@pytest.mark.parametrize("validator", ["if-none-match", "if-modified-since"])
+async def test_revalidation_answers_304(client, candles, validator):
+    first = await client.get(URL)
+    value = first.headers["etag" if validator == "if-none-match" else "last-modified"]
+
+    revalidated = await client.get(URL, headers={validator: value})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert revalidated.headers["vary"] == "Accept"
+
+
+async def test_writers_invalidate_their_namespace(client, candles):
+    first = await client.get(URL)
+    # Another namespace's writer leaves price responses alone
+    bump_generation(PREDICTIONS)
+    assert (await client.get(URL)).headers["x-cache"] == "HIT"
+
+    candles(6, close=2.0)
+    bump_generation(PRICES)
+    response = await client.get(URL, headers={"if-none-match": first.headers["etag"]})
+
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "MISS"
+    assert response.headers["etag"] != first.headers["etag"]
+    assert len(response.json()) == 6
+
+
+async def test_each_encoding_is_cached_apart(client, candles):
+    packed = await client.get(URL, headers={"accept": MSGPACK})
+    rows = await client.get(URL)
+    columnar = await client.get(URL, params={"format": "columnar"})
+    # Parameter names are case-sensitive: the route ignores FORMAT
+    ignored = await client.get(URL, params={"FORMAT": "columnar"})
+
+    assert [r.headers["x-cache"] for r in (packed, rows, columnar, ignored)] == [
+        "MISS"
+    ] * 4
+    assert packed.headers["content-type"] == MSGPACK
+    assert msgpack.unpackb(packed.content)["c"] == [1.0] * 5
+    assert isinstance(rows.json(), list)
+    assert columnar.json()["c"] == [1.0] * 5
+    assert ignored.json() == rows.json()
+
+    again = await client.get(URL, headers={"accept": f"{MSGPACK}, */*"})
+    assert again.headers["x-cache"] == "HIT"
+    assert again.content == packed.content
+
+
+async def test_streams_bypass_the_cache(client, candles):
+    response = await client.get(URL, params={"stream": "true"})
+
+    assert "x-cache" not in response.headers
+    assert "etag" not in response.headers